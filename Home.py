@@ -1,17 +1,13 @@
 from __future__ import annotations
 
 import streamlit as st
-from datetime import datetime, timezone, timedelta
 
-from app.db import supabase_admin
-from app.parse import parse_line
-from app.logic import tick_session, load_session, load_participants
+from app.logic import create_session, tick_session, load_session, load_participants
+from app.seasons import create_season, load_seasons
 
 st.set_page_config(page_title="LOL 내전 전광판", layout="centered")
 st.title("LOL 내전 전광판 (Supabase + Streamlit)")
 
-sb = supabase_admin()
-
 with st.expander("1) 새 세션 만들기", expanded=True):
     name = st.text_input("세션 이름", value="내전")
 
@@ -21,6 +17,24 @@ with st.expander("1) 새 세션 만들기", expanded=True):
 
     duration_hours = st.number_input("제한시간(시간)", min_value=1, max_value=12, value=3, step=1)
 
+    # 시즌에 묶으면 경기 결과가 시즌 리더보드(Pages → Leaderboard)에도 누적됨
+    try:
+        seasons = load_seasons()
+    except Exception as e:
+        seasons = []
+        st.caption(f"시즌 목록을 불러오지 못했습니다: {e}")
+    season_opts = [None] + [x["id"] for x in seasons]
+    season_names = {x["id"]: x["name"] for x in seasons}
+    season_id = st.selectbox("시즌", season_opts, format_func=lambda sid: season_names.get(sid, "(시즌 없음)"))
+    with st.popover("새 시즌 만들기"):
+        new_season = st.text_input("시즌 이름", value="")
+        if st.button("시즌 생성"):
+            try:
+                create_season(new_season)
+                st.rerun()
+            except Exception as e:
+                st.error(str(e))
+
     st.caption("참가자 입력: 각 줄에 `본명,게임닉#태그` (인원수는 짝수면 OK)")
     st.caption("예: 홍길동,Hide on bush#KR1")
     raw = st.text_area("참가자 리스트", height=220, value="")
@@ -28,52 +42,23 @@ with st.expander("1) 새 세션 만들기", expanded=True):
     st.caption("팀 배정: 앞 절반 = A, 뒤 절반 = B")
 
     if st.button("세션 생성", type="primary"):
-        lines = [x for x in raw.splitlines() if x.strip()]
-        total = len(lines)
-
-        if total < 2:
-            st.error("최소 2명 이상이어야 합니다.")
-        elif total % 2 != 0:
-            st.error("참가자 수는 짝수여야 합니다.")
-        else:
-            try:
-                now_utc = datetime.now(timezone.utc)
-                ends_utc = now_utc + timedelta(hours=int(duration_hours))
-
-                # 세션 insert
-                s = sb.table("sessions").insert({
-                    "name": name,
-                    "team_a_name": team_a,
-                    "team_b_name": team_b,
-                    "started_at": now_utc.isoformat(),
-                    "ends_at": ends_utc.isoformat(),
-                    "team_a_wins": 0,
-                    "team_b_wins": 0,
-                }).execute()
-
-                session_id_new = s.data[0]["id"]
-                half = total // 2
-
-                # 참가자 insert
-                for i, line in enumerate(lines):
-                    info = parse_line(line)
-                    team = "A" if i < half else "B"
-                    sb.table("session_participants").insert({
-                        "session_id": session_id_new,
-                        "real_name": info["real_name"],
-                        "riot_game_name": info["game_name"],
-                        "riot_tag_line": info["tag_line"],
-                        "team": team,
-                    }).execute()
-
-            except Exception as e:
-                st.error("세션 생성 중 오류:")
-                st.exception(e)
-                st.stop()
-
-            st.success(f"세션 생성 완료: {session_id_new}")
-            st.info("오버레이 페이지는 왼쪽 Pages → Overlay 또는 아래 링크 사용")
-            st.code(f"/Overlay?session={session_id_new}")
+        try:
+            # Riot ID → PUUID를 먼저 병렬 조회, 틀린 ID가 있으면 세션을 만들지 않음
+            with st.spinner("Riot ID 확인 중..."):
+                s = create_session(name, team_a, team_b, int(duration_hours), raw.splitlines(), season_id=season_id)
+        except ValueError as e:
+            st.error("세션을 만들지 않았습니다. 아래 항목을 고쳐주세요:")
+            st.code(str(e))
+            st.stop()
+        except Exception as e:
+            st.error("세션 생성 중 오류:")
+            st.exception(e)
+            st.stop()
+
+        session_id_new = s["id"]
+        st.success(f"세션 생성 완료: {session_id_new}")
+        st.info("오버레이 페이지는 왼쪽 Pages → Overlay 또는 아래 링크 사용")
+        st.code(f"/Overlay?session={session_id_new}")
 
 st.divider()
 
@@ -103,6 +88,8 @@ if session_id:
 
         st.caption("OBS 오버레이: Pages → Overlay에서 session 파라미터로 접근")
         st.code(f"/Overlay?session={session_id}")
+        st.caption("정적 오버레이(OBS 권장, rerun 없음): `python -m app.overlay_server` 실행 후")
+        st.code(f"http://<host>:8765/overlay?session={session_id}")
 
     except Exception as e:
         st.error(str(e))
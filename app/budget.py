@@ -0,0 +1,120 @@
+# app/budget.py
+"""
+tick 시간 예산 (deadline).
+
+    with tick_deadline(12.0, heartbeat=keeper.heartbeat):   # app.lock.LeaseKeeper
+        ...   # Riot 호출 (app.ratelimit.acquire가 예산을 넘는 대기는 하지 않고 DeadlineExceeded)
+        progress()   # 작업 1단위 끝날 때마다 → heartbeat_every 간격으로 락 연장
+
+- 예산 안에 못 끝낸 참가자/경기는 sleep으로 버티지 않고 sessions.tick_backlog에 남겨 다음 tick에 먼저 처리
+- 현재 예산은 contextvars로 전달 (app.metrics.submit으로 넘긴 워커 스레드 포함)
+- 예산 밖(페이지의 단발 호출 등)에서는 제한 없음
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+log = logging.getLogger("app.budget")
+
+# 락 연장 최소 간격 (progress가 자주 불려도 DB 호출은 이 간격으로만)
+HEARTBEAT_EVERY_SEC = 10.0
+
+
+class DeadlineExceeded(RuntimeError):
+    """
+    이번 tick 예산 안에 끝낼 수 없는 대기/호출. 실패가 아니라 "다음 tick으로 미룸".
+    """
+
+
+class TickDeadline:
+    def __init__(
+        self,
+        seconds: float,
+        heartbeat: Optional[Callable[[], bool]] = None,
+        heartbeat_every: float = HEARTBEAT_EVERY_SEC,
+    ):
+        self.ends_at = time.monotonic() + seconds
+        self.heartbeat = heartbeat
+        self.heartbeat_every = heartbeat_every
+        self._last_beat = time.monotonic()
+        self._lock = threading.Lock()
+        self.lease_lost = False
+
+    def remaining(self) -> float:
+        if self.lease_lost:
+            return 0.0
+        return self.ends_at - time.monotonic()
+
+    def beat(self, force: bool = False) -> None:
+        """
+        heartbeat_every가 지났으면 락 연장. 락을 잃었으면 남은 예산을 0으로 만들어 새 Riot 호출을 멈춘다.
+        """
+        if self.heartbeat is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_beat < self.heartbeat_every:
+                return
+            self._last_beat = now
+            try:
+                ok = self.heartbeat()
+            except Exception as e:
+                log.warning("heartbeat 실패: %s", e)
+                return
+            if ok is False:
+                log.warning("tick 도중 락을 잃음 → 남은 작업은 미룸")
+                self.lease_lost = True
+
+
+_CURRENT: contextvars.ContextVar[Optional[TickDeadline]] = contextvars.ContextVar("tick_deadline", default=None)
+
+
+@contextmanager
+def tick_deadline(
+    seconds: Optional[float],
+    heartbeat: Optional[Callable[[], bool]] = None,
+    heartbeat_every: float = HEARTBEAT_EVERY_SEC,
+) -> Iterator[Optional[TickDeadline]]:
+    """
+    seconds 동안의 예산 범위. seconds가 None이거나 이미 범위 안이면 바깥 것을 그대로 쓴다.
+    """
+    outer = _CURRENT.get()
+    if outer is not None or seconds is None:
+        yield outer
+        return
+    d = TickDeadline(seconds, heartbeat, heartbeat_every)
+    token = _CURRENT.set(d)
+    try:
+        yield d
+    finally:
+        _CURRENT.reset(token)
+
+
+def remaining() -> float:
+    d = _CURRENT.get()
+    return math.inf if d is None else d.remaining()
+
+
+def check_wait(seconds: float, what: str = "") -> None:
+    """
+    지금부터 seconds를 기다려도 예산 안인지. 아니면 DeadlineExceeded.
+    예산이 이미 끝났으면 대기가 0이어도 새 작업을 시작하지 않는다.
+    """
+    left = remaining()
+    if left <= 0 or seconds > left:
+        raise DeadlineExceeded(f"tick 시간 예산 초과{f' ({what})' if what else ''}: 대기 {seconds:.1f}s > 남은 {max(0.0, left):.1f}s")
+
+
+def progress() -> None:
+    """
+    작업 1단위 완료 알림 → 필요하면 락 연장.
+    """
+    d = _CURRENT.get()
+    if d is not None:
+        d.beat()
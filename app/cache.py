@@ -0,0 +1,100 @@
+# app/cache.py
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+import streamlit as st
+
+from .config import setting
+
+# 같은 호스트의 여러 runner 프로세스가 하나의 파일을 공유 (sqlite 파일 락 + WAL)
+DEFAULT_CACHE_PATH = os.path.join(".cache", "match_cache.sqlite3")
+DEFAULT_CACHE_MAX_MB = 256
+
+_SCHEMA = """
+create table if not exists match_cache (
+  match_id    text primary key,
+  body        blob not null,
+  size        integer not null,
+  last_access real not null
+);
+create index if not exists match_cache_last_access on match_cache(last_access);
+"""
+
+
+class MatchCache:
+    """
+    match_id -> match-v5 상세 JSON 디스크 캐시.
+    - 종료된 경기 상세는 바뀌지 않으므로 만료 없이 보관
+    - 전체 크기가 max_bytes를 넘으면 last_access 오래된 순(LRU)으로 제거
+    - 연결은 스레드별로 따로 연다 (sqlite3 연결은 스레드 간 공유 불가)
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("pragma journal_mode=WAL")
+            conn.execute("pragma synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, match_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._conn()
+        row = conn.execute("select body from match_cache where match_id = ?", (match_id,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("update match_cache set last_access = ? where match_id = ?", (time.time(), match_id))
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, match_id: str, data: Dict[str, Any]) -> None:
+        body = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        conn = self._conn()
+        conn.execute("begin immediate")
+        try:
+            conn.execute(
+                "insert or replace into match_cache(match_id, body, size, last_access) values (?, ?, ?, ?)",
+                (match_id, body, len(body), time.time()),
+            )
+            self._evict(conn)
+            conn.execute("commit")
+        except Exception:
+            conn.execute("rollback")
+            raise
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("select coalesce(sum(size), 0) from match_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 오래된 것부터 넘친 만큼 제거
+        over = total - self.max_bytes
+        freed = 0
+        victims = []
+        for mid, size in conn.execute("select match_id, size from match_cache order by last_access"):
+            victims.append((mid,))
+            freed += size
+            if freed >= over:
+                break
+        conn.executemany("delete from match_cache where match_id = ?", victims)
+
+
+@st.cache_resource
+def match_cache() -> MatchCache:
+    path = setting("MATCH_CACHE_PATH", DEFAULT_CACHE_PATH)
+    max_mb = int(setting("MATCH_CACHE_MAX_MB", str(DEFAULT_CACHE_MAX_MB)))
+    return MatchCache(path, max_mb * 1024 * 1024)
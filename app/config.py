@@ -0,0 +1,18 @@
+# app/config.py
+from __future__ import annotations
+
+import os
+
+import streamlit as st
+
+
+def setting(name: str, default: str = "") -> str:
+    """
+    st.secrets 우선, 없으면 환경변수.
+    streamlit 밖(python -m app.daemon)에서는 secrets.toml이 없을 수 있으므로 조회 실패는 무시.
+    """
+    try:
+        v = st.secrets.get(name)
+    except Exception:
+        v = None
+    return str(v or os.getenv(name, default)).strip()
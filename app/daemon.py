@@ -0,0 +1,114 @@
+# app/daemon.py
+"""
+브라우저 탭 없이 도는 집계 runner.
+
+    python -m app.daemon --session <SESSION_ID>
+    python -m app.daemon --all        # 진행 중인 모든 세션 (app.scheduler)
+
+- TICK_EVERY 초마다 tick_session_auto 실행 (고정 간격 스케줄, tick이 길어지면 밀린 만큼 바로 다음 tick)
+- TickRunner 페이지와 같은 lease(app.lock, sql/010_tick_leases.sql)를 사용 → 둘 중 하나만 집계
+  대기 중이면 현재 리더의 lease가 끝날 때까지 DB를 건드리지 않음
+- tick 시간 예산 = TICK_EVERY, 조회 진행에 맞춰 lease 연장 (못 끝낸 참가자는 다음 tick으로)
+  집계 쓰기는 lease token으로 fencing → 락을 잃은 뒤 끝난 tick은 반영되지 않음
+- SIGINT/SIGTERM 받으면 진행 중 tick을 마치고 락을 풀고 종료
+- 라운드로빈 위치는 sessions.tick_rr_cursor에 저장되므로 재시작해도 이어서 진행
+설정은 st.secrets(.streamlit/secrets.toml) 또는 환경변수에서 읽는다.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import signal
+import threading
+import time
+import uuid
+
+from .lock import DEFAULT_LOCK_TTL_SEC, LeaseKeeper
+from .logic import AUTO_TICK_HORIZON_SEC, _is_session_over, load_session, tick_session_auto
+from .scheduler import MultiSessionScheduler
+
+log = logging.getLogger("app.daemon")
+
+
+def run(session_id: str, owner: str, every: float, ttl_sec: int, stop: threading.Event) -> None:
+    next_at = time.monotonic()
+    holding = False
+    keeper = LeaseKeeper(session_id, owner, ttl_sec)
+    try:
+        while not stop.is_set():
+            try:
+                got = keeper.ensure()
+            except Exception as e:
+                log.warning("락 확인 실패: %s", e)
+                got = False
+
+            if got != holding:
+                log.info("락 %s", "획득" if got else "없음 (다른 runner가 집계 중)")
+                holding = got
+
+            if holding:
+                try:
+                    if _is_session_over(load_session(session_id)):
+                        log.info("세션 제한시간 종료 → daemon 종료")
+                        return
+                    new_count, logs = tick_session_auto(
+                        session_id,
+                        horizon_sec=every,
+                        heartbeat=keeper.heartbeat,
+                        fence_token=keeper.token,
+                    )
+                    log.info("tick 완료: 신규 %d건", new_count)
+                    for line in logs:
+                        log.info("  %s", line)
+                except Exception as e:
+                    log.error("tick 자체 실패: %s", e)
+
+            next_at += every
+            delay = next_at - time.monotonic()
+            if delay < 0:
+                # 밀린 tick을 몰아서 돌리지 않고 지금부터 다시 간격 계산
+                next_at = time.monotonic()
+                delay = 0
+            stop.wait(delay)
+    finally:
+        if holding:
+            try:
+                keeper.release()
+                log.info("락 해제")
+            except Exception as e:
+                log.warning("락 해제 실패: %s", e)
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="LOL 내전 전광판 집계 daemon")
+    target = ap.add_mutually_exclusive_group(required=True)
+    target.add_argument("--session", help="집계할 세션 ID")
+    target.add_argument("--all", action="store_true", help="ends_at이 남은 모든 세션을 하나의 Riot 키 예산으로 집계")
+    ap.add_argument("--every", type=float, default=AUTO_TICK_HORIZON_SEC, help="tick 간격(초)")
+    ap.add_argument("--ttl", type=int, default=DEFAULT_LOCK_TTL_SEC, help="락 유효시간(초)")
+    ap.add_argument("--owner", default=None, help="락 소유자 ID (기본: daemon-<uuid>)")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    stop = threading.Event()
+
+    def _on_signal(signum, _frame):
+        log.info("종료 신호(%s) 수신 → 현재 tick 마무리 후 종료", signal.Signals(signum).name)
+        stop.set()
+
+    signal.signal(signal.SIGINT, _on_signal)
+    signal.signal(signal.SIGTERM, _on_signal)
+
+    owner = args.owner or f"daemon-{uuid.uuid4()}"
+    if args.all:
+        log.info("scheduler 시작: 전체 세션 owner=%s every=%ss ttl=%ss", owner, args.every, args.ttl)
+        MultiSessionScheduler(owner, args.every, args.ttl).run(stop)
+        return
+
+    log.info("daemon 시작: session=%s owner=%s every=%ss ttl=%ss", args.session, owner, args.every, args.ttl)
+    run(args.session, owner, args.every, args.ttl, stop)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,205 @@
 # app/db.py
 from __future__ import annotations
 
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+import httpx
 import streamlit as st
 from supabase import create_client, Client
 
+from .config import setting
+
+# use_client()로 바꿔 끼운 클라이언트 (오프라인 벤치마크 bench/ 용). None이면 실제 Supabase
+_CLIENT_OVERRIDE: Optional[Any] = None
+
+
+def use_client(client: Optional[Any]) -> None:
+    """
+    supabase_admin()이 돌려줄 클라이언트를 교체. 같은 query builder 인터페이스면 된다.
+    None을 넘기면 원래 Supabase 클라이언트로 복귀.
+    """
+    global _CLIENT_OVERRIDE
+    _CLIENT_OVERRIDE = client
+
+
 @st.cache_resource
-def supabase_admin() -> Client:
-    url = st.secrets["SUPABASE_URL"]
-    key = st.secrets["SUPABASE_SERVICE_ROLE_KEY"]
+def _supabase_client() -> Client:
+    url = setting("SUPABASE_URL")
+    key = setting("SUPABASE_SERVICE_ROLE_KEY")
+    if not url or not key:
+        raise RuntimeError("SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY가 없습니다. (secrets 또는 환경변수)")
     return create_client(url, key)
+
+
+def supabase_admin() -> Client:
+    if _CLIENT_OVERRIDE is not None:
+        return _CLIENT_OVERRIDE
+    return _supabase_client()
+
+
+# ====== 에러 분류 (logic._sb_exec 재시도 판단) ======
+TRANSIENT = "transient"   # 잠깐 뒤 다시 하면 될 수 있음: 네트워크, 5xx, 타임아웃, 직렬화 실패
+CONFLICT = "conflict"     # unique 위반(23505): 이미 있음. 재시도해도 같은 결과
+PERMANENT = "permanent"   # 쿼리/권한/스키마 문제: 재시도해도 같은 결과
+FENCED = "fenced"         # lease fencing token이 낡음(P0F01): 다른 runner가 집계를 넘겨받음 (sql/010_tick_leases.sql)
+
+_FENCED_SQLSTATE = "P0F01"
+
+# 재시도할 만한 SQLSTATE (연결/자원 부족/운영자 개입 계열 + 직렬화·데드락·문장 타임아웃)
+_TRANSIENT_SQLSTATE_PREFIX = ("08", "53", "57P")
+_TRANSIENT_SQLSTATE = {"40001", "40P01", "57014"}
+_TRANSIENT_HTTP = {408, 425, 429, 500, 502, 503, 504}
+
+
+class DBError(RuntimeError):
+    """
+    _sb_exec가 재시도를 멈추고 던지는 에러. kind로 원인 구분, 원래 예외는 __cause__.
+    """
+
+    kind = PERMANENT
+
+    def __init__(self, op: str, cause: BaseException | None = None, message: str = ""):
+        super().__init__(message or f"DB {self.kind} 실패 ({op}): {cause}")
+        self.op = op
+
+
+class DBConflictError(DBError):
+    kind = CONFLICT
+
+
+class DBPermanentError(DBError):
+    kind = PERMANENT
+
+
+class DBFencedError(DBError):
+    """
+    이 runner의 lease가 더 이상 유효하지 않아 집계 쓰기가 거부됨. 재시도하지 않고 이번 tick 결과는 버린다.
+    """
+
+    kind = FENCED
+
+
+class DBUnavailableError(DBError):
+    """
+    순간 장애가 재시도 예산을 다 쓰거나, 회로 차단기가 열려 있어서 호출하지 않은 경우.
+    """
+
+    kind = TRANSIENT
+
+
+def classify_db_error(e: BaseException) -> str:
+    code = str(getattr(e, "code", "") or "")
+    if code == "23505":
+        return CONFLICT
+    if code == _FENCED_SQLSTATE:
+        return FENCED
+    if code in _TRANSIENT_SQLSTATE or code.startswith(_TRANSIENT_SQLSTATE_PREFIX):
+        return TRANSIENT
+    if code.isdigit() and len(code) == 3:
+        # PostgREST가 JSON 에러 본문을 못 만들면 HTTP 상태 코드가 code로 온다
+        return TRANSIENT if int(code) in _TRANSIENT_HTTP else PERMANENT
+    if isinstance(e, (httpx.TransportError, OSError, TimeoutError)):
+        # ReadError(EAGAIN), 연결 끊김, 타임아웃 등
+        return TRANSIENT
+    if code:
+        # PGRST116(single 0건), 42xxx(스키마), 22xxx(데이터) ...
+        return PERMANENT
+    # 모르는 예외는 예전처럼 재시도 대상으로 둔다
+    return TRANSIENT
+
+
+# ====== 회로 차단기 ======
+DB_BREAKER_THRESHOLD = 3        # 연속 순간 장애가 이만큼이면 차단
+DB_BREAKER_COOLDOWN_SEC = 30.0  # 차단 후 이만큼 지나면 1건만 시험 호출
+
+
+class CircuitBreaker:
+    """
+    Supabase 전체 장애 시 호출마다 재시도 sleep을 하지 않도록 일정 시간 호출 자체를 막는다.
+    closed → (연속 실패 threshold) → open → (cooldown) → half-open: 시험 호출 1건 성공이면 closed
+    스레드 안전. 프로세스 전체 공유.
+    """
+
+    def __init__(self, threshold: int = DB_BREAKER_THRESHOLD, cooldown_sec: float = DB_BREAKER_COOLDOWN_SEC):
+        self.threshold = threshold
+        self.cooldown_sec = cooldown_sec
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown_sec or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None and time.monotonic() - self._opened_at < self.cooldown_sec
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+@st.cache_resource
+def db_breaker() -> CircuitBreaker:
+    return CircuitBreaker()
+
+
+# ====== tick 단위 재시도 예산 ======
+DB_TICK_RETRY_BUDGET = 6   # tick 1번에서 모든 DB 호출이 합쳐서 쓸 수 있는 재시도 수
+
+
+class _RetryBudget:
+    def __init__(self, n: int):
+        self.left = n
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            if self.left <= 0:
+                return False
+            self.left -= 1
+            return True
+
+
+_BUDGET: contextvars.ContextVar[Optional[_RetryBudget]] = contextvars.ContextVar("db_retry_budget", default=None)
+
+
+@contextmanager
+def retry_budget(n: int = DB_TICK_RETRY_BUDGET) -> Iterator[None]:
+    """
+    이 범위 안의 _sb_exec 재시도를 합쳐서 n번으로 제한 (이미 범위 안이면 바깥 예산 사용).
+    범위 밖(페이지 조회 등)은 호출별 retries만 적용.
+    """
+    if _BUDGET.get() is not None:
+        yield
+        return
+    token = _BUDGET.set(_RetryBudget(n))
+    try:
+        yield
+    finally:
+        _BUDGET.reset(token)
+
+
+def take_retry() -> bool:
+    b = _BUDGET.get()
+    return True if b is None else b.take()
@@ -0,0 +1,124 @@
+# app/fetch.py
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import metrics
+from .budget import DeadlineExceeded, progress
+from .riot import get_account_by_riot_id, get_match_ids_by_puuid, get_match_summary
+from .summary import MatchSummary
+
+# 동시 Riot 호출 수 상한 (실제 호출 속도는 app.ratelimit이 조절)
+DEFAULT_WORKERS = 8
+
+
+@dataclass
+class ParticipantFetch:
+    """
+    참가자 1명 몫의 조회 결과. error가 있으면 그 참가자만 실패로 처리한다.
+    error가 DeadlineExceeded면 실패가 아니라 tick 예산 초과로 미룬 것.
+    """
+
+    participant: Dict[str, Any]
+    match_ids: List[str] = field(default_factory=list)
+    matches: Dict[str, MatchSummary] = field(default_factory=dict)
+    error: Exception | None = None
+
+    @property
+    def deferred(self) -> bool:
+        return isinstance(self.error, DeadlineExceeded)
+
+
+def _match_ids(participant: Dict[str, Any], start_sec: int, count: int, end_sec: Optional[int]) -> List[str]:
+    # 참가자별 구간 (레이트 리밋 대기 포함)
+    with metrics.span("fetch.match_ids", participant=participant.get("real_name")):
+        return get_match_ids_by_puuid(participant["puuid"], start_sec, count, end_sec)
+
+
+def fetch_participants(
+    participants: List[Dict[str, Any]],
+    window: Callable[[Dict[str, Any]], Tuple[int, Optional[int]]],
+    count: int,
+    skip: Callable[[str, Dict[str, Any]], bool],
+    max_workers: int = DEFAULT_WORKERS,
+    known_ids: Optional[Callable[[Dict[str, Any]], Optional[List[str]]]] = None,
+) -> List[ParticipantFetch]:
+    """
+    여러 참가자의 match id 목록과 상세를 병렬로 조회.
+    - 1단계: 참가자별 match id 목록 (병렬). window(participant) -> (startTime, endTime) 초
+    - 2단계: skip(match_id, participant)가 아닌 상세만, 같은 match_id는 1번만 (병렬, 요약으로 받음)
+    participants는 puuid가 채워져 있어야 한다. 결과 순서는 입력 순서와 같다.
+    known_ids(participant)가 목록을 주면(지난 tick에 미룬 경기) 1단계 조회 없이 그 목록을 쓴다.
+    """
+    out = [ParticipantFetch(participant=p) for p in participants]
+    if not out:
+        return out
+
+    workers = max(1, min(max_workers, len(out)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="riot-fetch") as pool:
+        id_futs = []
+        for f in out:
+            known = known_ids(f.participant) if known_ids is not None else None
+            if known:
+                id_futs.append(None)
+                f.match_ids = list(known)
+                continue
+            start_sec, end_sec = window(f.participant)
+            id_futs.append(metrics.submit(pool, _match_ids, f.participant, start_sec, count, end_sec))
+        for f, fut in zip(out, id_futs):
+            if fut is None:
+                continue
+            try:
+                f.match_ids = list(fut.result())
+            except Exception as e:
+                f.error = e
+            progress()
+
+        wanted: Dict[str, List[ParticipantFetch]] = {}
+        for f in out:
+            if f.error is not None:
+                continue
+            for mid in f.match_ids:
+                if not skip(mid, f.participant):
+                    wanted.setdefault(mid, []).append(f)
+
+        match_futs = {mid: metrics.submit(pool, get_match_summary, mid) for mid in wanted}
+        for mid, fut in match_futs.items():
+            try:
+                match = fut.result()
+            except Exception as e:
+                for f in wanted[mid]:
+                    if f.error is None or (f.deferred and not isinstance(e, DeadlineExceeded)):
+                        f.error = e
+                continue
+            finally:
+                progress()
+            for f in wanted[mid]:
+                f.matches[mid] = match
+
+    return out
+
+
+def resolve_riot_ids(
+    riot_ids: List[Tuple[str, str]],
+    max_workers: int = DEFAULT_WORKERS,
+) -> List[Tuple[Optional[str], Optional[Exception]]]:
+    """
+    (game_name, tag_line) 목록을 병렬로 PUUID 조회. 입력 순서대로 (puuid, error) 반환.
+    호출 속도는 app.ratelimit이 조절하므로 워커 수만큼 동시에 던져도 한도를 넘지 않는다.
+    """
+    if not riot_ids:
+        return []
+
+    out: List[Tuple[Optional[str], Optional[Exception]]] = []
+    workers = max(1, min(max_workers, len(riot_ids)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="riot-account") as pool:
+        futs = [metrics.submit(pool, get_account_by_riot_id, gn, tl) for gn, tl in riot_ids]
+        for fut in futs:
+            try:
+                out.append((fut.result()["puuid"], None))
+            except Exception as e:
+                out.append((None, e))
+    return out
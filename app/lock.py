@@ -0,0 +1,136 @@
+# app/lock.py
+"""
+집계 runner 리더 lease (sql/010_tick_leases.sql).
+
+    keeper = LeaseKeeper(session_id, owner, ttl_sec)
+    if keeper.ensure():   # 대부분 DB 호출 없이 들고 있는 lease로 답함
+        tick_session_auto(session_id, heartbeat=keeper.heartbeat, fence_token=keeper.token)
+    ...
+    keeper.release()
+
+- 리더: 남은 시간이 ttl의 RENEW_FRACTION 아래로 내려갔을 때만 연장 (rerun/tick마다 쓰지 않음)
+- 대기(standby): 현재 리더 lease가 끝날 때까지 DB를 읽지도 쓰지도 않고 기다렸다가 1번 시도
+- token: 다른 runner가(또는 만료 후 다시) 인수할 때마다 +1.
+  record_match_results가 낡은 token의 쓰기(결과 + 커서/backlog/rr)를 거부 → 락을 잃은 runner가 같은 경기를 두 번 반영하거나
+  새 리더의 진행 상태를 덮어쓰지 못함 (sql/011_fenced_tick_state.sql)
+- 만료 시각은 서버가 계산한 남은 시간(ttl_left_sec)을 이 프로세스의 monotonic 시계로 옮겨서 쓴다
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from .db import supabase_admin
+
+DEFAULT_LOCK_TTL_SEC = 45
+RENEW_FRACTION = 1 / 3       # 남은 시간이 ttl의 이 비율 아래면 연장 (45초 → 15초 남았을 때)
+STANDBY_JITTER_SEC = 1.0     # 대기 runner들이 만료 순간에 한꺼번에 시도하지 않게
+
+
+@dataclass(frozen=True)
+class Lease:
+    session_id: str
+    owner: Optional[str]     # 현재 소유자 (acquired=False면 다른 runner)
+    token: int
+    acquired: bool
+    expires_at: float        # time.monotonic() 기준
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+
+def acquire_lease(session_id: str, owner: str, ttl_sec: int = DEFAULT_LOCK_TTL_SEC) -> Lease:
+    """
+    내 lease면 연장(token 유지), 비었거나 만료면 인수(token + 1), 남의 유효한 lease면 그 정보만 돌려줌.
+    """
+    sb = supabase_admin()
+    t0 = time.monotonic()
+    r = sb.rpc("acquire_tick_lease", {"p_session_id": session_id, "p_owner": owner, "p_ttl_sec": int(ttl_sec)}).execute()
+    d = r.data or {}
+    return Lease(
+        session_id=str(session_id),
+        owner=d.get("owner"),
+        token=int(d.get("token") or 0),
+        acquired=bool(d.get("acquired")),
+        # 요청을 보낸 시각 기준 → 왕복 시간만큼 만료를 이르게 잡는다 (안전한 쪽)
+        expires_at=t0 + float(d.get("ttl_left_sec") or 0),
+    )
+
+
+def release_lease(lease: Lease) -> None:
+    """
+    종료 시 바로 놓아줘서 대기 runner가 TTL을 다 기다리지 않게 함.
+    """
+    if not lease.acquired:
+        return
+    sb = supabase_admin()
+    sb.rpc(
+        "release_tick_lease",
+        {"p_session_id": lease.session_id, "p_owner": lease.owner, "p_token": lease.token},
+    ).execute()
+
+
+class LeaseKeeper:
+    """
+    runner 1개(TickRunner 탭 / daemon / scheduler의 세션 1개)가 들고 있는 lease 상태.
+    ensure()를 자주 불러도 DB 호출은 연장 시점 / 대기 만료 시점에만 한다.
+    """
+
+    def __init__(self, session_id: str, owner: str, ttl_sec: int = DEFAULT_LOCK_TTL_SEC):
+        self.session_id = str(session_id)
+        self.owner = owner
+        self.ttl_sec = ttl_sec
+        self.lease: Optional[Lease] = None
+        self._token: Optional[int] = None
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def held(self) -> bool:
+        lease = self.lease
+        return lease is not None and lease.acquired and lease.remaining() > 0
+
+    @property
+    def token(self) -> Optional[int]:
+        """
+        마지막으로 획득한 lease의 fencing token. lease가 만료되거나 넘어가도 그대로 돌려준다
+        → 락을 잃은 runner의 쓰기는 서버에서 P0F01로 거부됨 (None이면 fence 확인 자체를 건너뛰므로 fail open).
+        한 번도 획득하지 못했으면 None.
+        """
+        return self._token
+
+    def ensure(self) -> bool:
+        """
+        리더면 True. 필요할 때만 acquire_tick_lease 호출 (DB 에러는 그대로 던짐).
+        """
+        with self._lock:
+            now = time.monotonic()
+            lease = self.lease
+            if lease is not None:
+                if lease.acquired and lease.expires_at - now > self.ttl_sec * RENEW_FRACTION:
+                    return True
+                if not lease.acquired and now < self._retry_at:
+                    return False
+            self.lease = acquire_lease(self.session_id, self.owner, self.ttl_sec)
+            if self.lease.acquired:
+                self._token = self.lease.token
+            else:
+                self._retry_at = self.lease.expires_at + random.uniform(0, STANDBY_JITTER_SEC)
+            return self.lease.acquired
+
+    def heartbeat(self) -> bool:
+        """
+        tick 진행 중 연장 (app.budget heartbeat). 연장할 때가 아니면 DB 호출 없음.
+        """
+        return self.ensure()
+
+    def release(self) -> None:
+        with self._lock:
+            lease, self.lease = self.lease, None
+            self._token = None
+            self._retry_at = 0.0
+        if lease is not None and lease.acquired:
+            release_lease(lease)
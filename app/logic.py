@@ -1,46 +1,137 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Tuple
-from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Tuple
+from datetime import datetime, timezone, timedelta
+import threading
 import time
 import random
 
-import streamlit as st
 from dateutil import parser as dtparser
 
-from .db import supabase_admin
-from .riot import get_account_by_riot_id, get_match_ids_by_puuid, get_match
+from . import metrics
+from .budget import DeadlineExceeded, check_wait, tick_deadline
+from .db import (
+    CONFLICT,
+    FENCED,
+    PERMANENT,
+    DBConflictError,
+    DBFencedError,
+    DBPermanentError,
+    DBUnavailableError,
+    classify_db_error,
+    db_breaker,
+    retry_budget,
+    supabase_admin,
+    take_retry,
+)
+from .parse import parse_line
+from .fetch import ParticipantFetch, fetch_participants
+from .realtime import pubsub
+from .players import player_directory
+from .riot import RiotAPIError, affordable_participants
+from .stats import session_stats
+from .summary import MatchSummary
 
 QUEUE_SOLO_RANKED = 420
+AUTO_TICK_HORIZON_SEC = 15.0   # tick_session_auto 호출 간격 (레이트 리밋 예산 산정 기준)
+AUTO_MATCH_ID_COUNT = 6        # 자동 집계 시 참가자당 조회할 최근 match id 수
+SEEN_MATCH_IDS_KEEP = 20       # 참가자 커서에 같이 저장하는 최근 match id 수
+MANUAL_TICK_BUDGET_SEC = 40.0  # 수동 tick 시간 예산 (넘는 작업은 sessions.tick_backlog로 미룸)
+TICK_RECORD_RESERVE_SEC = 3.0  # 예산 중 RPC 반영/커서 저장 몫 (Riot 조회는 그 전까지만)
 
 
 def _iso_to_dt(iso: str) -> datetime:
     return dtparser.isoparse(iso)
 
 
-def _sb_exec(fn, retries: int = 5):
+def _sb_exec(fn, retries: int = 5, op: str = "db"):
     """
     Streamlit Cloud/Supabase에서 가끔 발생하는 ReadError(EAGAIN) 같은 순간 장애 대응.
-    - 짧게 대기하며 재시도
+    - 에러를 분류(app.db.classify_db_error)해서 순간 장애만 짧게 대기하며 재시도
+      unique 위반은 DBConflictError, 쿼리/권한 문제는 DBPermanentError,
+      낡은 lease fencing token은 DBFencedError로 바로 던짐
+    - 재시도는 tick 단위 예산(app.db.retry_budget) 안에서만, 다 쓰면 DBUnavailableError
+      재시도 대기가 tick 시간 예산(app.budget)을 넘으면 기다리지 않고 DBUnavailableError
+    - 연속 장애로 회로 차단기가 열려 있으면 호출 없이 바로 DBUnavailableError
+    - op: 계측(app.metrics) / 에러 메시지 라벨
     """
-    last = None
+    breaker = db_breaker()
     for i in range(retries):
+        if not breaker.allow():
+            metrics.count("db.breaker_open", op=op)
+            raise DBUnavailableError(op, message=f"DB 차단 중 ({op}): 연속 장애로 잠시 호출하지 않음")
         try:
-            return fn()
+            with metrics.span("db.call", op=op):
+                out = fn()
         except Exception as e:
-            last = e
-            time.sleep(0.35 + i * 0.45 + random.random() * 0.2)
-    raise last
+            kind = classify_db_error(e)
+            metrics.count("db.error", op=op, kind=kind)
+            if kind == CONFLICT:
+                breaker.record_success()
+                raise DBConflictError(op, e) from e
+            if kind == PERMANENT:
+                breaker.record_success()
+                raise DBPermanentError(op, e) from e
+            if kind == FENCED:
+                breaker.record_success()
+                raise DBFencedError(op, e) from e
+            breaker.record_failure()
+            if i + 1 >= retries or breaker.is_open() or not take_retry():
+                raise DBUnavailableError(op, e) from e
+            wait = 0.35 + i * 0.45 + random.random() * 0.2
+            try:
+                check_wait(wait, op)
+            except DeadlineExceeded:
+                metrics.count("db.retry_deadline", op=op)
+                raise DBUnavailableError(op, e) from e
+            metrics.count("db.retry", op=op)
+            metrics.observe("db.retry_sleep", wait, op=op)
+            time.sleep(wait)
+            continue
+        breaker.record_success()
+        return out
 
 
 def load_session(session_id: str) -> Dict[str, Any]:
     sb = supabase_admin()
-    s = _sb_exec(lambda: sb.table("sessions").select("*").eq("id", session_id).single().execute())
+    s = _sb_exec(lambda: sb.table("sessions").select("*").eq("id", session_id).single().execute(), op="load_session")
     if not s.data:
         raise RuntimeError("세션을 찾을 수 없습니다.")
     return s.data
 
 
+def load_active_sessions() -> List[Dict[str, Any]]:
+    """
+    ends_at이 아직 안 지난 세션 전체 (app.scheduler용).
+    """
+    sb = supabase_admin()
+    now_iso = datetime.now(timezone.utc).isoformat()
+    r = _sb_exec(lambda: sb.table("sessions").select("*").gt("ends_at", now_iso).order("ends_at").execute())
+    return r.data or []
+
+
+def load_events_after(session_id: str, cursor: Tuple[str, Any] | None, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    오버레이 팝업용 이벤트 피드: cursor=(created_at, id) 이후 이벤트를 오래된 순으로.
+    (session_id, created_at, id) 인덱스 범위 스캔 (sql/005_events_feed_index.sql). 보통 빈 결과.
+    cursor가 None이면 처음부터.
+    """
+    sb = supabase_admin()
+
+    def q():
+        b = sb.table("events").select("*").eq("session_id", session_id)
+        if cursor is not None:
+            created_at, event_id = cursor
+            b = b.or_(f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{event_id})')
+        return b.order("created_at").order("id").limit(limit).execute()
+
+    return _sb_exec(q).data or []
+
+
+def event_cursor(event: Dict[str, Any] | None) -> Tuple[str, Any] | None:
+    return (event["created_at"], event["id"]) if event else None
+
+
 def load_participants(session_id: str) -> List[Dict[str, Any]]:
     sb = supabase_admin()
     p = _sb_exec(
@@ -49,39 +140,192 @@ def load_participants(session_id: str) -> List[Dict[str, Any]]:
         .eq("session_id", session_id)
         .order("team")
         .order("real_name")
-        .execute()
+        .execute(),
+        op="load_participants",
     )
     return p.data or []
 
 
+def create_session(
+    name: str,
+    team_a_name: str,
+    team_b_name: str,
+    duration_hours: int,
+    lines: List[str],
+    season_id: str | None = None,
+) -> Dict[str, Any]:
+    """
+    세션 + 참가자 생성. 참가자 줄은 "본명,게임닉#태그", 앞 절반 = A팀, 뒤 절반 = B팀.
+    - season_id를 주면 그 시즌(app.seasons)에 묶여서 경기가 시즌 누적에도 반영됨
+    - 모든 Riot ID를 먼저 PUUID 조회 (플레이어 디렉터리, 처음 보는 ID만 Account API 병렬) → 하나라도 틀리면 아무것도 만들지 않고 ValueError
+      (제한시간이 시작되기 전에 오타를 잡고, 첫 tick이 Account API에 시간을 쓰지 않도록)
+    - 참가자는 insert 1번으로 한꺼번에 저장. 실패하면 방금 만든 세션을 지워서 참가자 없는 빈 세션이 남지 않게 함
+    """
+    lines = [x for x in lines if x.strip()]
+    total = len(lines)
+    if total < 2:
+        raise ValueError("최소 2명 이상이어야 합니다.")
+    if total % 2 != 0:
+        raise ValueError("참가자 수는 짝수여야 합니다.")
+
+    errors: List[str] = []
+    infos: List[Dict[str, Any]] = []
+    for line in lines:
+        try:
+            infos.append(parse_line(line))
+        except ValueError as e:
+            errors.append(str(e))
+    if errors:
+        raise ValueError("\n".join(errors))
+
+    resolved = player_directory().resolve_many([(x["game_name"], x["tag_line"]) for x in infos])
+    for info, (_puuid, err) in zip(infos, resolved):
+        if err is not None:
+            errors.append(f"{info['real_name']} ({info['game_name']}#{info['tag_line']}) 조회 실패: {err}")
+    if errors:
+        raise ValueError("\n".join(errors))
+
+    sb = supabase_admin()
+    now_utc = datetime.now(timezone.utc)
+    ends_utc = now_utc + timedelta(hours=int(duration_hours))
+
+    # 세션 insert
+    row = {
+        "name": name,
+        "team_a_name": team_a_name,
+        "team_b_name": team_b_name,
+        "started_at": now_utc.isoformat(),
+        "ends_at": ends_utc.isoformat(),
+        "team_a_wins": 0,
+        "team_b_wins": 0,
+    }
+    if season_id:
+        row["season_id"] = season_id
+    s = _sb_exec(lambda: sb.table("sessions").insert(row).execute(), op="create_session")
+    session = s.data[0]
+
+    # 참가자 bulk insert (PUUID까지 채워서)
+    half = total // 2
+    rows = [
+        {
+            "session_id": session["id"],
+            "real_name": info["real_name"],
+            "riot_game_name": info["game_name"],
+            "riot_tag_line": info["tag_line"],
+            "puuid": puuid,
+            "team": "A" if i < half else "B",
+        }
+        for i, (info, (puuid, _err)) in enumerate(zip(infos, resolved))
+    ]
+    try:
+        _sb_exec(lambda: sb.table("session_participants").insert(rows).execute(), op="create_participants")
+    except Exception as e:
+        try:
+            _sb_exec(lambda: sb.table("session_participants").delete().eq("session_id", session["id"]).execute(), op="create_rollback")
+            _sb_exec(lambda: sb.table("sessions").delete().eq("id", session["id"]).execute(), op="create_rollback")
+        except Exception as e2:
+            raise RuntimeError(f"참가자 저장 실패: {e} (빈 세션 {session['id']} 정리도 실패: {e2})") from e
+        raise
+
+    return session
+
+
 def ensure_puuid(participant: Dict[str, Any]) -> str:
     """
-    participant.puuid가 없으면 Riot Account API로 조회해 저장.
+    participant.puuid가 없으면 플레이어 디렉터리(app.players → 없으면 Riot Account API)로 조회해 저장.
     """
     if participant.get("puuid"):
         return participant["puuid"]
 
-    acc = get_account_by_riot_id(participant["riot_game_name"], participant["riot_tag_line"])
-    puuid = acc["puuid"]
+    puuid = player_directory().resolve(participant["riot_game_name"], participant["riot_tag_line"])
+    _save_puuid(participant, puuid)
+    return puuid
+
 
+def _save_puuid(participant: Dict[str, Any], puuid: str) -> None:
     sb = supabase_admin()
-    _sb_exec(lambda: sb.table("session_participants").update({"puuid": puuid}).eq("id", participant["id"]).execute())
+    _sb_exec(lambda: sb.table("session_participants").update({"puuid": puuid}).eq("id", participant["id"]).execute(), op="save_puuid")
     participant["puuid"] = puuid
-    return puuid
 
 
-def _already_processed(session_id: str, match_id: str, puuid: str) -> bool:
-    sb = supabase_admin()
-    r = _sb_exec(
-        lambda: sb.table("matches")
-        .select("id")
-        .eq("session_id", session_id)
-        .eq("match_id", match_id)
-        .eq("participant_puuid", puuid)
-        .limit(1)
-        .execute()
-    )
-    return bool(r.data)
+def _refresh_stale_puuid(participant: Dict[str, Any], err: Exception, logs: List[str]) -> None:
+    """
+    저장된 PUUID로 match id 조회가 400/404면 PUUID가 낡았다고 보고 디렉터리를 갱신.
+    바뀌었으면 참가자 행도 고쳐서 다음 tick부터 새 PUUID로 조회.
+    """
+    if not isinstance(err, RiotAPIError) or err.status_code not in (400, 404):
+        return
+    try:
+        puuid = player_directory().refresh(participant["riot_game_name"], participant["riot_tag_line"])
+    except Exception as e:
+        logs.append(f"{participant.get('real_name','(unknown)')} PUUID 재조회 실패: {e}")
+        return
+    if puuid != participant.get("puuid"):
+        _save_puuid(participant, puuid)
+        logs.append(f"{participant.get('real_name','(unknown)')} PUUID 갱신됨 (다음 tick부터 적용)")
+
+
+class _ProcessedSet:
+    """
+    세션별로 이미 집계된 (match_id, puuid) 집합.
+    - 첫 tick에 세션 matches 전체를 1번 읽고, 이후 tick은 game_end_ms 커서 이후 행만 추가로 읽음
+    - 중복 판정은 메모리에서 끝남 (최종 중복 방지는 여전히 matches unique 제약)
+    """
+
+    PAGE = 1000
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.pairs: Dict[Tuple[str, str], int | None] = {}
+        self.cursor_ms: int | None = None
+
+    def refresh(self) -> None:
+        sb = supabase_admin()
+        # 커서는 읽기 시작할 때 값으로 고정 (add()가 페이지를 읽는 동안 올려서 offset이 어긋나지 않게)
+        since = self.cursor_ms
+        offset = 0
+        while True:
+            def q(offset=offset):
+                b = sb.table("matches").select("match_id,participant_puuid,game_end_ms").eq("session_id", self.session_id)
+                if since is not None:
+                    # 같은 game_end_ms가 경계에 걸칠 수 있으므로 gte (중복은 set이 흡수)
+                    b = b.gte("game_end_ms", since)
+                return b.order("game_end_ms").order("id").range(offset, offset + self.PAGE - 1).execute()
+
+            rows = _sb_exec(q, op="load_processed").data or []
+            for r in rows:
+                self.add(r["match_id"], r["participant_puuid"], r.get("game_end_ms"))
+            if len(rows) < self.PAGE:
+                return
+            offset += self.PAGE
+
+    def add(self, match_id: str, puuid: str, game_end_ms: int | None = None) -> None:
+        if game_end_ms is not None or (match_id, puuid) not in self.pairs:
+            self.pairs[(match_id, puuid)] = game_end_ms
+        if game_end_ms is not None and (self.cursor_ms is None or int(game_end_ms) > self.cursor_ms):
+            self.cursor_ms = int(game_end_ms)
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self.pairs
+
+    def game_end_ms(self, match_id: str, puuid: str) -> int | None:
+        return self.pairs.get((match_id, puuid))
+
+
+_PROCESSED: Dict[str, _ProcessedSet] = {}
+_PROCESSED_LOCK = threading.Lock()
+
+
+def _load_processed(session_id: str) -> _ProcessedSet:
+    """
+    tick 시작 시 1번 호출: 세션의 처리 집합을 (증분) 동기화해서 돌려줌.
+    """
+    with _PROCESSED_LOCK:
+        ps = _PROCESSED.get(session_id)
+        if ps is None:
+            ps = _PROCESSED[session_id] = _ProcessedSet(session_id)
+    ps.refresh()
+    return ps
 
 
 def _session_window_ms(session: Dict[str, Any]) -> Tuple[int, int | None]:
@@ -114,201 +358,415 @@ def _is_session_over(session: Dict[str, Any]) -> bool:
         return False
 
 
-def _insert_match_and_update(
+def _build_result(
     session: Dict[str, Any],
     participant: Dict[str, Any],
     match_id: str,
-    match: Dict[str, Any],
-) -> bool:
+    match: MatchSummary,
+) -> Dict[str, Any] | None:
     """
-    신규 match를 DB에 반영.
-    성공적으로 '집계(승/패 + 팀승 + 이벤트)'가 반영되면 True, 아니면 False.
+    match 요약(app.summary)에서 참가자 1명의 집계 대상 결과를 만든다 (DB 호출 없음).
+    집계 대상이 아니면 None.
     """
-    info = match.get("info", {})
-    if info.get("queueId") != QUEUE_SOLO_RANKED:
-        return False
+    if match.queue_id != QUEUE_SOLO_RANKED:
+        return None
 
-    game_end = info.get("gameEndTimestamp")
+    game_end = match.game_end_ms
     if not game_end:
-        return False
+        return None
 
     # ✅ 세션 시간 범위 필터(started_at ~ ends_at)
     try:
         started_ms, ends_ms = _session_window_ms(session)
-        game_start_ms = info.get("gameStartTimestamp")
-        game_end_ms = info.get("gameEndTimestamp")
 
         # started_at 이전 시작한 게임 제외
-        if game_start_ms and int(game_start_ms) < started_ms:
-            return False
+        if match.game_start_ms and match.game_start_ms < started_ms:
+            return None
 
         # ends_at 이후 끝난 게임 제외 (타임어택 룰)
-        if ends_ms and game_end_ms and int(game_end_ms) > ends_ms:
-            return False
+        if ends_ms and game_end > ends_ms:
+            return None
     except Exception:
         pass
 
     puuid = participant["puuid"]
 
-    me = next((x for x in info.get("participants", []) if x.get("puuid") == puuid), None)
+    me = match.find(puuid)
     if not me:
-        return False
-
-    result = "WIN" if bool(me.get("win")) else "LOSS"
-
-    # ✅ KDA 추출
-    kills = int(me.get("kills", 0))
-    deaths = int(me.get("deaths", 0))
-    assists = int(me.get("assists", 0))
-    kda_text = f"KDA: {kills}/{deaths}/{assists}"
-
-    team = participant["team"]
+        return None
+
+    result = "WIN" if me.win else "LOSS"
+
+    return {
+        "participant_id": participant["id"],
+        "participant_puuid": puuid,
+        "match_id": match_id,
+        "result": result,
+        "team": participant["team"],
+        "game_end_ms": game_end,
+        "real_name": participant["real_name"],
+        "kda_text": f"KDA: {me.kills}/{me.deaths}/{me.assists} · CS {me.cs}",
+        "kills": me.kills,
+        "deaths": me.deaths,
+        "assists": me.assists,
+        "cs": me.cs,
+        "damage": me.damage,
+        "vision_score": me.vision_score,
+        "game_seconds": match.game_duration_sec or 0,
+    }
+
+
+def _record_results(
+    session: Dict[str, Any],
+    participants: List[Dict[str, Any]],
+    results: List[Dict[str, Any]],
+    processed: _ProcessedSet | None = None,
+    fence_token: int | None = None,
+    cursors: List[Tuple[Dict[str, Any], Dict[str, Any]]] | None = None,
+    backlog: Dict[str, Any] | None = None,
+    rr_cursor: int | None = None,
+) -> int:
+    """
+    결과 묶음을 record_match_results RPC 1번으로 반영 (sql/001_record_match_results.sql).
+    - fence_token: 집계 runner의 lease token (app.lock). 그 사이 다른 runner가 lease를 넘겨받았으면
+      서버가 거부 → DBFencedError (sql/010_tick_leases.sql)
+    - matches insert / W/L / 팀승 / events 가 서버에서 한 트랜잭션으로 처리됨
+    - tick 진행 상태도 같은 트랜잭션에서 저장 (sql/011_fenced_tick_state.sql). 결과가 없어도 저장할 게 있으면 호출
+      cursors: (참가자, 새 커서) 목록 / backlog: sessions.tick_backlog 새 값 / rr_cursor: 라운드로빈 위치 (None = 그대로)
+    - 카운터/누적 스탯(sql/008_player_game_stats.sql)은 서버 값으로 로컬 dict(session, participants)를 갱신
+    반환: 실제로 새로 집계된 건수
+    """
+    if not results and not cursors and backlog is None and rr_cursor is None:
+        return 0
+
+    params: Dict[str, Any] = {"p_session_id": session["id"], "p_results": results}
+    if fence_token is not None:
+        params["p_fence_token"] = fence_token
+    if cursors:
+        params["p_cursors"] = [{"id": p["id"], **cur} for p, cur in cursors]
+    if backlog is not None:
+        params["p_backlog"] = backlog
+    if rr_cursor is not None:
+        params["p_rr_cursor"] = rr_cursor
     sb = supabase_admin()
+    r = _sb_exec(lambda: sb.rpc("record_match_results", params).execute(), op="record_match_results")
+    out = r.data or {}
+
+    for p, cur in cursors or ():
+        p.update(cur)
+    if backlog is not None:
+        session["tick_backlog"] = backlog
+    if rr_cursor is not None:
+        session["tick_rr_cursor"] = rr_cursor
+
+    # 새로 들어갔든 이미 있었든(unique 충돌) DB에 존재하는 쌍이므로 처리 집합에 추가
+    if processed is not None:
+        for x in results:
+            processed.add(x["match_id"], x["participant_puuid"], x["game_end_ms"])
+
+    applied = out.get("applied") or []
+    if applied:
+        # 같은 프로세스의 구독자(오버레이 스냅샷)에게 바로 알림. 다른 프로세스는 Supabase Realtime으로 받음
+        pubsub().publish(str(session["id"]), {"table": "events", "type": "INSERT", "record": {}})
+
+    if "team_a_wins" in out:
+        session["team_a_wins"] = out["team_a_wins"]
+        session["team_b_wins"] = out["team_b_wins"]
+
+    by_id = {str(p["id"]): p for p in participants}
+    for row in out.get("participants") or []:
+        p = by_id.get(str(row["id"]))
+        if p is not None:
+            p.update({k: v for k, v in row.items() if k != "id"})
+
+    # 인메모리 전적(app.stats): 새로 집계된 경기를 누적한 뒤 서버 누적값으로 맞춤
+    if applied:
+        stats = session_stats(session["id"])
+        by_key = {(str(x["participant_id"]), x["match_id"]): x for x in results}
+        for a in applied:
+            x = by_key.get((str(a["participant_id"]), a["match_id"]))
+            p = by_id.get(str(a["participant_id"]))
+            if x is not None and p is not None:
+                stats.record(p, x)
+        stats.sync(participants)
+
+    return len(applied)
+
+
+def _poll_window(session: Dict[str, Any], participant: Dict[str, Any]) -> Tuple[int, int | None]:
+    """
+    참가자별 match id 조회 범위(초).
+    - startTime: max(세션 started_at, 참가자 커서 = 마지막으로 본 경기 종료 시각)
+    - endTime: 세션 ends_at (이후 끝난 경기는 어차피 집계 안 함)
+    """
+    started_ms, ends_ms = _session_window_ms(session)
+    start_ms = max(started_ms, int(participant.get("match_cursor_ms") or 0))
+    return start_ms // 1000, (ends_ms // 1000 if ends_ms else None)
 
-    # 1) matches insert (unique 제약으로 중복 방지)
-    try:
-        _sb_exec(
-            lambda: sb.table("matches").insert(
-                {
-                    "session_id": session["id"],
-                    "match_id": match_id,
-                    "participant_puuid": puuid,
-                    "result": result,
-                    "team": team,
-                    "game_end_ms": int(game_end),
-                }
-            ).execute()
-        )
-    except Exception:
-        return False
-
-    # 2) 개인 W/L 업데이트 + 3) 팀 승리 업데이트
-    if result == "WIN":
-        _sb_exec(lambda: sb.table("session_participants").update({"wins": participant["wins"] + 1}).eq("id", participant["id"]).execute())
-        participant["wins"] += 1
 
-        if team == "A":
-            _sb_exec(lambda: sb.table("sessions").update({"team_a_wins": session["team_a_wins"] + 1}).eq("id", session["id"]).execute())
-            session["team_a_wins"] += 1
+def _next_cursor(participant: Dict[str, Any], f: ParticipantFetch, processed: _ProcessedSet) -> Dict[str, Any] | None:
+    """
+    이번 조회 결과로 참가자 커서를 얼마나 당길 수 있는지 계산. 바뀔 게 없으면 None.
+    조회 중 실패가 있으면 놓친 경기가 커서 뒤로 밀릴 수 있으므로 당기지 않는다.
+    """
+    if f.error is not None or not f.match_ids:
+        return None
+
+    cursor = int(participant.get("match_cursor_ms") or 0)
+    new_cursor = cursor
+    for mid in f.match_ids:
+        match = f.matches.get(mid)
+        if match is not None:
+            end = match.game_end_ms
         else:
-            _sb_exec(lambda: sb.table("sessions").update({"team_b_wins": session["team_b_wins"] + 1}).eq("id", session["id"]).execute())
-            session["team_b_wins"] += 1
-    else:
-        _sb_exec(lambda: sb.table("session_participants").update({"losses": participant["losses"] + 1}).eq("id", participant["id"]).execute())
-        participant["losses"] += 1
-
-    # 4) 이벤트 insert (오버레이 팝업용)
-    _sb_exec(
-        lambda: sb.table("events").insert(
-            {
-                "session_id": session["id"],
-                "real_name": participant["real_name"],
-                "result": result,
-                "match_id": match_id,
-                "kda_text": kda_text,
-            }
-        ).execute()
-    )
+            end = processed.game_end_ms(mid, participant["puuid"])
+        if end:
+            new_cursor = max(new_cursor, int(end))
 
-    return True
+    old_seen = list(participant.get("seen_match_ids") or [])
+    seen = list(dict.fromkeys(list(f.match_ids) + old_seen))[:SEEN_MATCH_IDS_KEEP]
+    if new_cursor == cursor and seen == old_seen:
+        return None
+    return {"match_cursor_ms": new_cursor or None, "seen_match_ids": seen}
 
 
-def tick_session(session_id: str) -> Tuple[int, List[str]]:
+def _backlog(session: Dict[str, Any]) -> Dict[str, List[str]]:
     """
-    (수동 버튼용)
+    지난 tick에 미룬 참가자 (sql/007_tick_backlog.sql): participant_id -> 이미 받은 match id 목록.
     """
-    logs: List[str] = []
-    session = load_session(session_id)
-
-    if _is_session_over(session):
-        return 0, ["세션 제한시간이 종료되어 집계를 중단했습니다."]
+    return dict((session.get("tick_backlog") or {}).get("participants") or {})
 
-    participants = load_participants(session_id)
 
-    started_ms, _ends_ms = _session_window_ms(session)
-    start_time_sec = int(started_ms / 1000)
+def _backlog_update(session: Dict[str, Any], backlog: Dict[str, List[str]]) -> Dict[str, Any] | None:
+    """
+    sessions.tick_backlog에 저장할 값. 바뀌지 않았으면 None (저장 안 함).
+    """
+    if backlog == _backlog(session):
+        return None
+    return {"participants": backlog} if backlog else {}
 
-    new_count = 0
 
-    for p in participants:
+def _credit_matches(
+    session: Dict[str, Any],
+    participants: List[Dict[str, Any]],
+    matches: Dict[str, MatchSummary],
+    processed: _ProcessedSet,
+) -> List[Dict[str, Any]]:
+    """
+    경기 단위 집계: 받은 경기마다 info.participants를 1번 훑어서 그 경기에 있는 세션 참가자 전원의 결과를 만든다.
+    (듀오면 둘 중 누가 폴링됐든 둘 다 이번 tick에 반영, 상대는 따로 조회/반영할 필요 없음)
+    """
+    by_puuid = {p["puuid"]: p for p in participants if p.get("puuid")}
+    out: List[Dict[str, Any]] = []
+    for match_id, match in matches.items():
+        for line in match.participants:
+            p = by_puuid.get(line.puuid)
+            if p is None or (match_id, line.puuid) in processed:
+                continue
+            res = _build_result(session, p, match_id, match)
+            if res is not None:
+                out.append(res)
+                metrics.count("tick.results", participant=p.get("real_name"))
+    return out
+
+
+def _collect_results(
+    session: Dict[str, Any],
+    participants: List[Dict[str, Any]],
+    picked: List[Dict[str, Any]],
+    count: int,
+    processed: _ProcessedSet,
+    logs: List[str],
+) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], Dict[str, Any]]], Dict[str, List[str]]]:
+    """
+    picked 참가자들의 신규 match id를 모아(중복 제거) 경기마다 상세를 1번만 조회(app.fetch)하고,
+    그 경기에 있는 세션 참가자(participants 전체 중) 모두의 결과를 만든다 (_credit_matches).
+    실패는 참가자 단위로 logs에 남기고 나머지는 계속 진행.
+    시간 예산(app.budget)을 넘어 못 끝낸 참가자는 실패가 아니라 미룸 → 다음 tick이 먼저 처리.
+    반환: (반영할 결과, 저장할 참가자 커서, 미룬 참가자 id -> 이미 받은 match id)
+    """
+    backlog = _backlog(session)
+    deferred: Dict[str, List[str]] = {}
+    ready: List[Dict[str, Any]] = []
+    for i, p in enumerate(picked):
         try:
             ensure_puuid(p)
-            puuid = p["puuid"]
-
-            match_ids = get_match_ids_by_puuid(puuid, start_time_sec, count=20)
-
-            for match_id in match_ids:
-                if _already_processed(session_id, match_id, puuid):
-                    continue
-
-                match = get_match(match_id)
-
-                if _insert_match_and_update(session, p, match_id, match):
-                    new_count += 1
-
+            ready.append(p)
+        except DeadlineExceeded:
+            deferred[str(p["id"])] = []
+        except DBUnavailableError as e:
+            # DB가 안 되면 나머지 PUUID 조회/저장도 실패하므로 멈춤 (PUUID가 이미 있는 참가자는 계속)
+            logs.append(f"{p.get('real_name','(unknown)')} 처리 실패: {e}")
+            ready.extend(x for x in picked[i + 1:] if x.get("puuid"))
+            break
         except Exception as e:
             logs.append(f"{p.get('real_name','(unknown)')} 처리 실패: {e}")
 
-    return new_count, logs
+    def skip(mid: str, p: Dict[str, Any]) -> bool:
+        return (mid, p["puuid"]) in processed or mid in (p.get("seen_match_ids") or ())
 
-
-def tick_session_auto(session_id: str) -> Tuple[int, List[str]]:
+    cursors: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+    fetched = fetch_participants(
+        ready,
+        lambda p: _poll_window(session, p),
+        count,
+        skip=skip,
+        known_ids=lambda p: backlog.get(str(p["id"])) or None,
+    )
+    matches: Dict[str, MatchSummary] = {}
+    for f in fetched:
+        matches.update(f.matches)
+    pending = _credit_matches(session, participants, matches, processed)
+    metrics.count("tick.matches", len(matches))
+
+    for f in fetched:
+        p = f.participant
+        if f.deferred:
+            # 받은 id는 그대로 넘겨서 다음 tick은 상세 조회만 (커서는 다 받은 뒤에 전진)
+            deferred[str(p["id"])] = list(f.match_ids)
+            metrics.count("tick.deferred", participant=p.get("real_name"))
+            continue
+        if f.error is not None:
+            metrics.count("tick.participant_errors", participant=p.get("real_name"))
+            logs.append(f"{p.get('real_name','(unknown)')} 처리 실패: {f.error}")
+            if not f.match_ids:
+                _refresh_stale_puuid(p, f.error, logs)
+        cur = _next_cursor(p, f, processed)
+        if cur is not None:
+            cursors.append((p, cur))
+
+    if deferred:
+        logs.append(f"시간 예산 초과 → 참가자 {len(deferred)}명은 다음 tick으로 미룸")
+    return pending, cursors, deferred
+
+
+def tick_participants(
+    session: Dict[str, Any],
+    participants: List[Dict[str, Any]],
+    picked: List[Dict[str, Any]],
+    count: int = AUTO_MATCH_ID_COUNT,
+    budget_sec: float | None = None,
+    heartbeat: Callable[[], bool] | None = None,
+    fence_token: int | None = None,
+    rr_cursor: int | None = None,
+) -> Tuple[int, List[str]]:
     """
-    (자동 집계용 - 라운드로빈)
-    - 전체 참가자 중 일부만 처리해서 429를 피함
-    - 세션 ends_at이 지나면 자동 중지
+    세션의 참가자 일부(picked)만 집계. tick_session / tick_session_auto / app.scheduler 공용.
+    participants는 세션 전체 참가자 (RPC 결과로 로컬 카운터를 맞출 때 사용).
+    budget_sec: tick 시간 예산. Riot 조회는 TICK_RECORD_RESERVE_SEC 전까지만 하고
+      못 끝낸 참가자는 sessions.tick_backlog에 남긴다. heartbeat: 진행 중 lease 연장 (app.budget)
+    fence_token: lease token (app.lock.Lease.token). 낡았으면 결과도 진행 상태(커서/backlog/rr)도 반영하지 않는다.
+    rr_cursor: 이번 tick 뒤의 라운드로빈 위치 (tick_session_auto). 결과와 같은 RPC로 저장
     """
-    logs: List[str] = []
-    new_count = 0
-
-    session = load_session(session_id)
-
-    if _is_session_over(session):
-        return 0, ["세션 제한시간이 종료되어 집계를 중단했습니다."]
-
-    participants = load_participants(session_id)
-
-    started_ms, _ends_ms = _session_window_ms(session)
-    start_time_sec = int(started_ms / 1000)
-
-    MAX_PLAYERS_PER_TICK = 3   # 10명 기준 1분 내 1바퀴 목표
-    MATCH_ID_COUNT = 6
-
-    n = len(participants)
-    if n == 0:
-        return 0, ["참가자가 없습니다."]
-
-    rr_key = f"rr_idx_{session_id}"
-    if rr_key not in st.session_state:
-        st.session_state[rr_key] = 0
-
-    start_idx = st.session_state[rr_key] % n
-
-    picked: List[Dict[str, Any]] = []
-    idx = start_idx
-    for _ in range(min(MAX_PLAYERS_PER_TICK, n)):
-        picked.append(participants[idx])
-        idx = (idx + 1) % n
+    with metrics.tick_scope(session["id"]), retry_budget():
+        logs: List[str] = []
+        if db_breaker().is_open():
+            return 0, ["DB 연속 장애로 이번 tick은 건너뜁니다. (잠시 후 자동 재시도)"]
+        processed = _load_processed(session["id"])
+
+        fetch_sec = None if budget_sec is None else max(1.0, budget_sec - TICK_RECORD_RESERVE_SEC)
+        ends_at = None if budget_sec is None else time.monotonic() + budget_sec
+        with tick_deadline(fetch_sec, heartbeat):
+            with metrics.span("tick.collect"):
+                pending, cursors, deferred = _collect_results(session, participants, picked, count, processed, logs)
+
+        # 반영 단계는 남겨 둔 시간(최소 TICK_RECORD_RESERVE_SEC) 안에서 → DB 재시도 대기도 이 안에서만
+        record_sec = None if ends_at is None else max(TICK_RECORD_RESERVE_SEC, ends_at - time.monotonic())
+        with tick_deadline(record_sec, heartbeat) as deadline:
+            # tick 1번 분량(결과 + 커서 + 미룬 작업 + rr 위치)을 RPC 1번, 트랜잭션 1개로 반영
+            new_count = 0
+            try:
+                with metrics.span("tick.record"):
+                    done = {str(p["id"]) for p in picked}
+                    backlog = {k: v for k, v in _backlog(session).items() if k not in done}
+                    backlog.update(deferred)
+                    new_count = _record_results(
+                        session,
+                        participants,
+                        pending,
+                        processed,
+                        fence_token,
+                        cursors=cursors,
+                        backlog=_backlog_update(session, backlog),
+                        rr_cursor=rr_cursor,
+                    )
+                metrics.count("tick.applied", new_count)
+            except DBFencedError:
+                metrics.count("tick.fenced")
+                logs.append("집계 권한(lease)을 다른 runner가 넘겨받음 → 이번 tick 결과는 반영하지 않음")
+            except Exception as e:
+                logs.append(f"집계 반영 실패: {e}")
+            if deadline is not None:
+                deadline.beat(force=True)
+
+        return new_count, logs
 
-    st.session_state[rr_key] = idx
 
-    for p in picked:
-        try:
-            ensure_puuid(p)
-            puuid = p["puuid"]
-
-            match_ids = get_match_ids_by_puuid(puuid, start_time_sec, count=MATCH_ID_COUNT)
+def tick_session(session_id: str) -> Tuple[int, List[str]]:
+    """
+    (수동 버튼용)
+    """
+    with metrics.tick_scope(session_id), retry_budget():
+        session = load_session(session_id)
 
-            for match_id in match_ids:
-                if _already_processed(session_id, match_id, puuid):
-                    continue
+        if _is_session_over(session):
+            return 0, ["세션 제한시간이 종료되어 집계를 중단했습니다."]
 
-                match = get_match(match_id)
+        participants = load_participants(session_id)
+        return tick_participants(session, participants, participants, count=20, budget_sec=MANUAL_TICK_BUDGET_SEC)
 
-                if _insert_match_and_update(session, p, match_id, match):
-                    new_count += 1
 
-        except Exception as e:
-            logs.append(f"{p.get('real_name','(unknown)')} 처리 실패: {e}")
+def tick_session_auto(
+    session_id: str,
+    horizon_sec: float = AUTO_TICK_HORIZON_SEC,
+    budget_sec: float | None = None,
+    heartbeat: Callable[[], bool] | None = None,
+    fence_token: int | None = None,
+) -> Tuple[int, List[str]]:
+    """
+    (자동 집계용 - 라운드로빈)
+    - 레이트 리밋 예산(horizon_sec 동안 쓸 수 있는 호출 수)만큼만 참가자를 골라 429를 피함
+    - 지난 tick에 미룬 참가자(sessions.tick_backlog)를 먼저, 남는 자리는 라운드로빈
+    - tick 시간 예산은 budget_sec (기본 horizon_sec) → 다음 tick과 겹치지 않게
+    - 세션 ends_at이 지나면 자동 중지
+    """
+    with metrics.tick_scope(session_id), retry_budget():
+        session = load_session(session_id)
+
+        if _is_session_over(session):
+            return 0, ["세션 제한시간이 종료되어 집계를 중단했습니다."]
+
+        participants = load_participants(session_id)
+
+        n = len(participants)
+        if n == 0:
+            return 0, ["참가자가 없습니다."]
+
+        # 개발 키면 몇 명, 프로덕션 키면 전원
+        max_players = max(1, min(n, affordable_participants(horizon_sec)))
+
+        # 라운드로빈 위치는 sessions.tick_rr_cursor에 저장 (sql/002_tick_rr_cursor.sql)
+        start_idx = int(session.get("tick_rr_cursor") or 0) % n
+
+        backlog = _backlog(session)
+        picked: List[Dict[str, Any]] = [p for p in participants if str(p["id"]) in backlog][:max_players]
+        chosen = {str(p["id"]) for p in picked}
+        idx = start_idx
+        for _ in range(n):
+            if len(picked) >= max_players:
+                break
+            p = participants[idx]
+            idx = (idx + 1) % n
+            if str(p["id"]) not in chosen:
+                picked.append(p)
+
+        return tick_participants(
+            session,
+            participants,
+            picked,
+            budget_sec=horizon_sec if budget_sec is None else budget_sec,
+            heartbeat=heartbeat,
+            fence_token=fence_token,
+            rr_cursor=idx if idx != start_idx else None,
+        )
 
-    return new_count, logs
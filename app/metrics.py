@@ -0,0 +1,234 @@
+# app/metrics.py
+"""
+tick 단위 계측 (구간 시간 + 호출 수).
+
+    with tick_scope(session_id) as m:      # logic.tick_* 진입점
+        with span("riot.request", endpoint=M_MATCH):
+            ...
+        count("riot.status", endpoint=M_MATCH, status=200)
+        observe("ratelimit.wait", waited, endpoint=M_MATCH)
+
+- 현재 tick은 contextvars로 전달 → submit()으로 넘긴 워커 스레드(app.fetch)에서도 같은 tick에 기록
+- tick 밖에서 호출되면 아무것도 안 함 (Home 세션 생성 등)
+- 끝난 tick은 세션별로 최근 TICK_HISTORY개를 프로세스 메모리에 보관 → TickRunner 표/차트
+- 내보내기: TickMetrics.to_dict() (JSON), to_prometheus() (Prometheus text format)
+"""
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+# 세션별로 보관하는 최근 tick 수
+TICK_HISTORY = 20
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+class _Stat:
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+
+class TickMetrics:
+    """
+    tick 1번 분량. 구간(span/observe)은 (이름, 라벨)별 횟수/합계/최대 초, 카운터는 (이름, 라벨)별 합.
+    여러 워커 스레드가 동시에 기록하므로 lock으로 보호.
+    """
+
+    def __init__(self, session_id: str) -> None:
+        self.session_id = str(session_id)
+        self.started_at = time.time()
+        self.wall_sec = 0.0
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.spans: Dict[Tuple[str, LabelKey], _Stat] = {}
+        self.counters: Dict[Tuple[str, LabelKey], float] = {}
+
+    def observe(self, name: str, seconds: float, labels: LabelKey) -> None:
+        with self._lock:
+            stat = self.spans.get((name, labels))
+            if stat is None:
+                stat = self.spans[(name, labels)] = _Stat()
+            stat.add(seconds)
+
+    def count(self, name: str, n: float, labels: LabelKey) -> None:
+        with self._lock:
+            self.counters[(name, labels)] = self.counters.get((name, labels), 0) + n
+
+    def finish(self) -> None:
+        self.wall_sec = time.perf_counter() - self._t0
+
+    # ---- 읽기 ----
+    def rows(self) -> List[Dict[str, Any]]:
+        """
+        표 출력용 평탄화. 구간은 total_ms 큰 순, 카운터는 뒤에.
+        """
+        with self._lock:
+            spans = sorted(self.spans.items(), key=lambda kv: -kv[1].total)
+            counters = sorted(self.counters.items())
+        out: List[Dict[str, Any]] = []
+        for (name, labels), stat in spans:
+            out.append({
+                "kind": "span",
+                "name": name,
+                "labels": ", ".join(f"{k}={v}" for k, v in labels),
+                "count": stat.count,
+                "total_ms": round(stat.total * 1000, 1),
+                "max_ms": round(stat.max * 1000, 1),
+            })
+        for (name, labels), n in counters:
+            out.append({
+                "kind": "counter",
+                "name": name,
+                "labels": ", ".join(f"{k}={v}" for k, v in labels),
+                "count": n,
+                "total_ms": None,
+                "max_ms": None,
+            })
+        return out
+
+    def totals_by_name(self) -> Dict[str, float]:
+        """
+        구간 이름별 합계(ms). 차트용.
+        """
+        out: Dict[str, float] = {}
+        with self._lock:
+            for (name, _labels), stat in self.spans.items():
+                out[name] = out.get(name, 0.0) + stat.total * 1000
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "started_at": self.started_at,
+            "wall_ms": round(self.wall_sec * 1000, 1),
+            "rows": self.rows(),
+        }
+
+    def to_prometheus(self, prefix: str = "lol_tick") -> str:
+        def fmt(labels: LabelKey) -> str:
+            pairs = [("session", self.session_id)] + list(labels)
+            body = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+            return "{" + body + "}"
+
+        def metric(name: str) -> str:
+            return f"{prefix}_{name}".replace(".", "_").replace("-", "_")
+
+        lines = [
+            f"# TYPE {prefix}_wall_seconds gauge",
+            f"{prefix}_wall_seconds{fmt(())} {self.wall_sec:.6f}",
+        ]
+        with self._lock:
+            spans = sorted(self.spans.items())
+            counters = sorted(self.counters.items())
+        seen = set()
+        for (name, labels), stat in spans:
+            m = metric(name)
+            if m not in seen:
+                seen.add(m)
+                lines.append(f"# TYPE {m}_seconds summary")
+            lines.append(f"{m}_seconds_sum{fmt(labels)} {stat.total:.6f}")
+            lines.append(f"{m}_seconds_count{fmt(labels)} {stat.count}")
+        for (name, labels), n in counters:
+            m = metric(name) + "_total"
+            if m not in seen:
+                seen.add(m)
+                lines.append(f"# TYPE {m} counter")
+            lines.append(f"{m}{fmt(labels)} {n:g}")
+        return "\n".join(lines) + "\n"
+
+
+_CURRENT: contextvars.ContextVar[Optional[TickMetrics]] = contextvars.ContextVar("tick_metrics", default=None)
+_HISTORY: Dict[str, Deque[TickMetrics]] = {}
+_HISTORY_LOCK = threading.Lock()
+
+
+def current() -> Optional[TickMetrics]:
+    return _CURRENT.get()
+
+
+@contextmanager
+def tick_scope(session_id: str) -> Iterator[TickMetrics]:
+    """
+    tick 1번의 계측 범위. 이미 tick 안이면(tick_session_auto -> tick_participants) 바깥 것을 그대로 쓴다.
+    """
+    outer = _CURRENT.get()
+    if outer is not None:
+        yield outer
+        return
+
+    m = TickMetrics(session_id)
+    token = _CURRENT.set(m)
+    try:
+        yield m
+    finally:
+        _CURRENT.reset(token)
+        m.finish()
+        with _HISTORY_LOCK:
+            _HISTORY.setdefault(m.session_id, deque(maxlen=TICK_HISTORY)).append(m)
+
+
+@contextmanager
+def span(name: str, **labels: Any) -> Iterator[None]:
+    m = _CURRENT.get()
+    if m is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        m.observe(name, time.perf_counter() - t0, _labels(labels))
+
+
+def observe(name: str, seconds: float, **labels: Any) -> None:
+    """
+    이미 잰 시간(초)을 구간으로 기록. 예) 레이트 리밋 대기, 재시도 sleep
+    """
+    m = _CURRENT.get()
+    if m is not None:
+        m.observe(name, seconds, _labels(labels))
+
+
+def count(name: str, n: float = 1, **labels: Any) -> None:
+    m = _CURRENT.get()
+    if m is not None:
+        m.count(name, n, _labels(labels))
+
+
+def submit(pool: Executor, fn: Callable[..., Any], *args: Any) -> Future:
+    """
+    pool.submit과 같지만 현재 tick 컨텍스트를 워커 스레드로 넘긴다 (작업마다 컨텍스트 복사).
+    """
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def recent_ticks(session_id: str) -> List[TickMetrics]:
+    """
+    이 프로세스에서 끝난 최근 tick들 (오래된 순).
+    """
+    with _HISTORY_LOCK:
+        return list(_HISTORY.get(str(session_id), ()))
+
+
+def last_tick(session_id: str) -> Optional[TickMetrics]:
+    ticks = recent_ticks(session_id)
+    return ticks[-1] if ticks else None
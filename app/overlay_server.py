@@ -0,0 +1,150 @@
+# app/overlay_server.py
+"""
+OBS 브라우저 소스용 정적 오버레이 서버.
+
+    python -m app.overlay_server --port 8765
+    → OBS 브라우저 소스: http://<host>:8765/overlay?session=<SESSION_ID>
+
+- /overlay            : 정적 HTML/JS (app/static/overlay.html). 화면 전환/팝업/타이머는 브라우저에서 처리
+- /state/<session_id> : 세션 상태 JSON. ETag = 스냅샷 version → 안 바뀌었으면 304 (본문 없음)
+- /events/<session_id>?after=<created_at>&after_id=<id> : 커서 이후 이벤트(오름차순). 팝업 큐용
+Streamlit 페이지(pages/1_Overlay.py)와 달리 rerun/iframe 재생성이 없고,
+데이터는 app.snapshot의 공유 스냅샷(= realtime push + fallback 폴링)에서 읽는다.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import urllib.parse
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+from .logic import _session_window_ms, load_events_after
+from .snapshot import Snapshot, get_snapshot
+from .ui import BASE_CSS
+
+log = logging.getLogger("app.overlay_server")
+
+_STATIC = os.path.join(os.path.dirname(__file__), "static", "overlay.html")
+# 서버 재시작 후 version이 0부터 다시 시작해도 예전 ETag와 겹치지 않도록
+_BOOT = uuid.uuid4().hex[:8]
+
+
+def overlay_state(snap: Snapshot) -> Dict[str, Any]:
+    """
+    오버레이가 쓰는 값만 담은 작은 상태 문서.
+    players: [id, real_name, team, wins, losses]
+    """
+    s = snap.session
+    _started_ms, ends_ms = _session_window_ms(s)
+    ev = snap.latest_event
+    return {
+        "v": snap.version,
+        "name": s["name"],
+        "team_a_name": s["team_a_name"],
+        "team_b_name": s["team_b_name"],
+        "team_a_wins": s["team_a_wins"],
+        "team_b_wins": s["team_b_wins"],
+        "ends_at_ms": ends_ms,
+        "players": [[p["id"], p["real_name"], p["team"], p["wins"], p["losses"]] for p in snap.participants],
+        "latest_event": _event_doc(ev) if ev else None,
+    }
+
+
+def _event_doc(ev: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: ev.get(k) for k in ("id", "created_at", "real_name", "result", "kda_text")}
+
+
+def _load_page() -> bytes:
+    with open(_STATIC, encoding="utf-8") as f:
+        return f.read().replace("{{BASE_CSS}}", BASE_CSS).encode("utf-8")
+
+
+class OverlayHandler(BaseHTTPRequestHandler):
+    page = b""
+
+    def log_message(self, fmt, *args):
+        log.debug("%s - %s", self.address_string(), fmt % args)
+
+    def _send(self, code: int, body: bytes = b"", ctype: str = "", etag: str = "") -> None:
+        self.send_response(code)
+        if ctype:
+            self.send_header("Content-Type", ctype)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+
+        if url.path in ("/", "/overlay"):
+            self._send(200, self.page, "text/html; charset=utf-8")
+            return
+
+        if url.path.startswith("/state/"):
+            session_id = urllib.parse.unquote(url.path[len("/state/"):])
+            if not session_id:
+                self._send(404)
+                return
+            try:
+                snap = get_snapshot(session_id)
+            except Exception as e:
+                log.warning("스냅샷 로드 실패 session=%s: %s", session_id, e)
+                self._send(503)
+                return
+
+            etag = f'"{_BOOT}-{snap.version}"'
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, etag=etag)
+                return
+            body = json.dumps(overlay_state(snap), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self._send(200, body, "application/json; charset=utf-8", etag)
+            return
+
+        if url.path.startswith("/events/"):
+            session_id = urllib.parse.unquote(url.path[len("/events/"):])
+            qs = urllib.parse.parse_qs(url.query)
+            after = (qs.get("after") or [""])[0]
+            after_id = (qs.get("after_id") or [""])[0]
+            cursor = (after, after_id) if after and after_id else None
+            try:
+                events = load_events_after(session_id, cursor)
+            except Exception as e:
+                log.warning("이벤트 피드 로드 실패 session=%s: %s", session_id, e)
+                self._send(503)
+                return
+            body = json.dumps([_event_doc(ev) for ev in events], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self._send(200, body, "application/json; charset=utf-8")
+            return
+
+        self._send(404)
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="LOL 내전 전광판 정적 오버레이 서버")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    OverlayHandler.page = _load_page()
+    server = ThreadingHTTPServer((args.host, args.port), OverlayHandler)
+    log.info("overlay 서버 시작: http://%s:%d/overlay?session=<SESSION_ID>", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# app/players.py
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import streamlit as st
+
+from .db import supabase_admin
+from .fetch import resolve_riot_ids
+from .riot import get_account_by_riot_id
+
+# 프로세스 안 LRU 크기 (내전 로스터 규모면 충분)
+PLAYER_LRU_SIZE = 2048
+
+
+def riot_key(game_name: str, tag_line: str) -> str:
+    """
+    Riot ID 정규화 키: 앞뒤 공백 제거 + 대소문자 무시. "Hide on bush#KR1" -> "hide on bush#kr1"
+    """
+    return f"{game_name.strip()}#{tag_line.strip()}".casefold()
+
+
+class PlayerDirectory:
+    """
+    세션을 넘어 재사용하는 Riot ID -> PUUID 디렉터리.
+    조회 순서: 프로세스 LRU -> players 테이블(sql/006_players_directory.sql) -> Account API(조회 후 저장)
+    디렉터리는 캐시일 뿐이라 DB 오류는 무시하고 Riot 조회로 넘어간다.
+    """
+
+    def __init__(self, lru_size: int = PLAYER_LRU_SIZE):
+        self.lru_size = lru_size
+        self._lru: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---- LRU ----
+    def _lru_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            puuid = self._lru.get(key)
+            if puuid is not None:
+                self._lru.move_to_end(key)
+            return puuid
+
+    def _lru_put(self, key: str, puuid: str) -> None:
+        with self._lock:
+            self._lru[key] = puuid
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    # ---- DB ----
+    def _db_get_many(self, keys: List[str]) -> Dict[str, str]:
+        if not keys:
+            return {}
+        try:
+            sb = supabase_admin()
+            r = sb.table("players").select("riot_key,puuid").in_("riot_key", keys).execute()
+            return {row["riot_key"]: row["puuid"] for row in (r.data or [])}
+        except Exception:
+            return {}
+
+    def _db_save_many(self, rows: List[Tuple[str, str, str]]) -> None:
+        """
+        rows: (game_name, tag_line, puuid)
+        """
+        if not rows:
+            return
+        now_iso = datetime.now(timezone.utc).isoformat()
+        payload = [
+            {"riot_key": riot_key(gn, tl), "game_name": gn.strip(), "tag_line": tl.strip(), "puuid": pu, "updated_at": now_iso}
+            for gn, tl, pu in rows
+        ]
+        try:
+            supabase_admin().table("players").upsert(payload, on_conflict="riot_key").execute()
+        except Exception:
+            pass
+
+    # ---- 공개 API ----
+    def resolve(self, game_name: str, tag_line: str) -> str:
+        puuid, err = self.resolve_many([(game_name, tag_line)])[0]
+        if err is not None:
+            raise err
+        return puuid
+
+    def resolve_many(self, riot_ids: List[Tuple[str, str]]) -> List[Tuple[Optional[str], Optional[Exception]]]:
+        """
+        여러 Riot ID를 한 번에: LRU 히트 → DB 1회 조회 → 나머지만 Account API 병렬 조회 + DB upsert 1회.
+        입력 순서대로 (puuid, error) 반환.
+        """
+        keys = [riot_key(gn, tl) for gn, tl in riot_ids]
+        found: Dict[str, str] = {}
+        for k in keys:
+            pu = self._lru_get(k)
+            if pu is not None:
+                found[k] = pu
+
+        missing = [k for k in dict.fromkeys(keys) if k not in found]
+        for k, pu in self._db_get_many(missing).items():
+            found[k] = pu
+            self._lru_put(k, pu)
+
+        errors: Dict[str, Exception] = {}
+        todo = [(k, rid) for k, rid in dict(zip(keys, riot_ids)).items() if k not in found]
+        if todo:
+            fresh: List[Tuple[str, str, str]] = []
+            for (k, (gn, tl)), (pu, err) in zip(todo, resolve_riot_ids([rid for _k, rid in todo])):
+                if err is not None:
+                    errors[k] = err
+                    continue
+                found[k] = pu
+                self._lru_put(k, pu)
+                fresh.append((gn, tl, pu))
+            self._db_save_many(fresh)
+
+        return [(found.get(k), errors.get(k)) for k in keys]
+
+    def refresh(self, game_name: str, tag_line: str) -> str:
+        """
+        저장된 PUUID가 틀린 것 같을 때(Riot이 400/404) Account API로 다시 조회해서 덮어씀.
+        """
+        puuid = get_account_by_riot_id(game_name, tag_line)["puuid"]
+        self._lru_put(riot_key(game_name, tag_line), puuid)
+        self._db_save_many([(game_name, tag_line, puuid)])
+        return puuid
+
+
+@st.cache_resource
+def player_directory() -> PlayerDirectory:
+    return PlayerDirectory()
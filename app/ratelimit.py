@@ -0,0 +1,198 @@
+# app/ratelimit.py
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import streamlit as st
+
+from . import metrics
+from .budget import check_wait
+from .config import setting
+
+# 헤더를 한 번도 못 본 상태에서 쓰는 앱 한도 (개발 키 기준)
+DEFAULT_APP_LIMIT = "20:1,100:120"
+
+
+def parse_limits(header: str) -> List[Tuple[int, int]]:
+    """
+    "20:1,100:120" -> [(20, 1), (100, 120)]  (호출 수, 윈도우 초)
+    """
+    out: List[Tuple[int, int]] = []
+    for part in (header or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        a, _, b = part.partition(":")
+        try:
+            out.append((int(a), int(b)))
+        except ValueError:
+            continue
+    return out
+
+
+class _Window:
+    """
+    윈도우 1개 = 슬라이딩 로그 (최근 seconds 동안의 호출 시각).
+    서버가 알려준 count가 로컬 기록보다 크면(다른 프로세스가 같은 키 사용) 그만큼 채워 넣는다.
+    """
+
+    def __init__(self, limit: int, seconds: int):
+        self.limit = limit
+        self.seconds = seconds
+        self.calls: Deque[float] = deque()
+
+    def _trim(self, now: float) -> None:
+        edge = now - self.seconds
+        while self.calls and self.calls[0] <= edge:
+            self.calls.popleft()
+
+    def free(self, now: float) -> int:
+        self._trim(now)
+        return max(0, self.limit - len(self.calls))
+
+    def wait_time(self, now: float) -> float:
+        self._trim(now)
+        if len(self.calls) < self.limit:
+            return 0.0
+        # 가장 오래된 호출이 윈도우 밖으로 나가는 시점
+        return self.calls[len(self.calls) - self.limit] + self.seconds - now
+
+    def sync(self, server_count: int, now: float) -> None:
+        self._trim(now)
+        for _ in range(server_count - len(self.calls)):
+            self.calls.append(now)
+
+
+class _Bucket:
+    def __init__(self, limits: List[Tuple[int, int]]):
+        self.windows: Dict[int, _Window] = {}
+        self.set_limits(limits)
+
+    def set_limits(self, limits: List[Tuple[int, int]]) -> None:
+        new: Dict[int, _Window] = {}
+        for limit, seconds in limits:
+            w = self.windows.get(seconds) or _Window(limit, seconds)
+            w.limit = limit
+            new[seconds] = w
+        self.windows = new
+
+    def wait_time(self, now: float) -> float:
+        return max((w.wait_time(now) for w in self.windows.values()), default=0.0)
+
+    def record(self, now: float) -> None:
+        for w in self.windows.values():
+            w.calls.append(now)
+
+    def sync(self, counts: List[Tuple[int, int]], now: float) -> None:
+        for count, seconds in counts:
+            w = self.windows.get(seconds)
+            if w is not None:
+                w.sync(count, now)
+
+    def affordable(self, now: float, horizon_sec: float) -> int:
+        """
+        horizon_sec 동안 쓸 수 있는 호출 수.
+        긴 윈도우(예: 100/120s)는 남은 양 전부가 아니라 horizon 비율만큼만 허용해서
+        한 번의 tick이 긴 윈도우를 다 써버리지 않게 한다.
+        """
+        best: Optional[int] = None
+        for w in self.windows.values():
+            share = w.limit if w.seconds <= horizon_sec else max(1, int(w.limit * horizon_sec / w.seconds))
+            n = min(w.free(now), share)
+            best = n if best is None else min(best, n)
+        return best if best is not None else 1 << 30
+
+
+class RateLimiter:
+    """
+    Riot 응답 헤더 기반 레이트 리미터 (앱 전체 버킷 + 메서드별 버킷).
+    - acquire(method): 모든 윈도우에 자리가 날 때까지 기다렸다가 호출 1건을 기록 → 429가 나기 전에 조절
+    - update(method, headers): X-App-Rate-Limit(-Count), X-Method-Rate-Limit(-Count)로 한도/사용량 동기화
+    - penalize(seconds): 그래도 429가 오면 Retry-After 동안 전체 정지
+    - affordable(costs, horizon): 지금 감당 가능한 작업 단위 수 (tick 참가자 수 산정용)
+    스레드 안전.
+    """
+
+    def __init__(self, app_limit: str = DEFAULT_APP_LIMIT):
+        self._lock = threading.Lock()
+        self._app = _Bucket(parse_limits(app_limit))
+        self._methods: Dict[str, _Bucket] = {}
+        self._blocked_until = 0.0
+
+    def _method(self, method: str) -> _Bucket:
+        b = self._methods.get(method)
+        if b is None:
+            b = self._methods[method] = _Bucket([])
+        return b
+
+    def _wait_time(self, method: str, now: float) -> float:
+        return max(
+            self._blocked_until - now,
+            self._app.wait_time(now),
+            self._method(method).wait_time(now),
+            0.0,
+        )
+
+    def acquire(self, method: str) -> float:
+        """
+        호출 1건 자리를 잡는다. 기다린 시간(초)을 반환.
+        tick 시간 예산(app.budget) 안이면 예산을 넘는 대기는 하지 않고 DeadlineExceeded.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._wait_time(method, now)
+                if wait <= 0:
+                    check_wait(0.0, method)
+                    self._app.record(now)
+                    self._method(method).record(now)
+                    if waited > 0:
+                        metrics.observe("ratelimit.wait", waited, endpoint=method)
+                    return waited
+            check_wait(wait, method)
+            time.sleep(wait)
+            waited += wait
+
+    def update(self, method: str, headers) -> None:
+        app_limit = headers.get("X-App-Rate-Limit")
+        app_count = headers.get("X-App-Rate-Limit-Count")
+        method_limit = headers.get("X-Method-Rate-Limit")
+        method_count = headers.get("X-Method-Rate-Limit-Count")
+        with self._lock:
+            now = time.monotonic()
+            if app_limit:
+                self._app.set_limits(parse_limits(app_limit))
+            if app_count:
+                self._app.sync(parse_limits(app_count), now)
+            if method_limit:
+                self._method(method).set_limits(parse_limits(method_limit))
+            if method_count:
+                self._method(method).sync(parse_limits(method_count), now)
+
+    def penalize(self, seconds: float) -> None:
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def affordable(self, costs: Dict[str, int], horizon_sec: float) -> int:
+        """
+        costs: 작업 1단위당 메서드별 호출 수. 예) {"match-v5.ids": 1, "match-v5.match": 1}
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._blocked_until > now:
+                return 0
+            total = sum(costs.values()) or 1
+            units = self._app.affordable(now, horizon_sec) // total
+            for method, cost in costs.items():
+                if cost > 0:
+                    units = min(units, self._method(method).affordable(now, horizon_sec) // cost)
+            return units
+
+
+@st.cache_resource
+def rate_limiter() -> RateLimiter:
+    return RateLimiter(setting("RIOT_APP_RATE_LIMIT", DEFAULT_APP_LIMIT))
@@ -0,0 +1,167 @@
+# app/realtime.py
+"""
+세션 단위 변경 알림 (pub/sub).
+
+- LocalPubSub: 같은 프로세스 안에서만 전달. 오프라인 테스트용 / 같은 서버의 TickRunner → Overlay
+- SupabaseRealtimePubSub: Local 전달 + Supabase Realtime(postgres_changes) 구독
+  events INSERT(경기 집계 = W/L/팀승이 같은 트랜잭션에서 바뀜) + sessions UPDATE 중 화면에 보이는 열이
+  바뀐 것만 세션별 채널로 받는다. tick 진행 상태(커서/backlog/rr/lease) 쓰기로는 알림이 가지 않음.
+  (테이블이 supabase_realtime publication에 있어야 함: sql/004_realtime_publication.sql)
+
+백엔드는 OVERLAY_PUBSUB 설정으로 고른다: "supabase"(기본) | "local"
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Set
+
+import streamlit as st
+
+from .config import setting
+
+log = logging.getLogger("app.realtime")
+
+# (session_id, change) -> None.  change = {"table": ..., "type": "INSERT"|"UPDATE"|..., "record": {...}}
+Callback = Callable[[str, Dict[str, Any]], None]
+
+# (테이블, 세션 필터 열, 이벤트)
+WATCHED = (
+    ("events", "session_id", "INSERT"),
+    ("sessions", "id", "UPDATE"),
+)
+
+# 오버레이에 보이는 sessions 열. sessions UPDATE는 이 값이 바뀌었을 때만 알림
+SESSION_DISPLAY_COLUMNS = ("name", "team_a_name", "team_b_name", "team_a_wins", "team_b_wins", "ends_at")
+
+
+class LocalPubSub:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subs: Dict[str, Dict[int, Callback]] = {}
+        self._seq = 0
+
+    def subscribe(self, session_id: str, cb: Callback) -> Callable[[], None]:
+        with self._lock:
+            self._seq += 1
+            token = self._seq
+            self._subs.setdefault(session_id, {})[token] = cb
+
+        def _unsubscribe() -> None:
+            with self._lock:
+                self._subs.get(session_id, {}).pop(token, None)
+
+        return _unsubscribe
+
+    def publish(self, session_id: str, change: Dict[str, Any]) -> None:
+        with self._lock:
+            cbs = list(self._subs.get(session_id, {}).values())
+        for cb in cbs:
+            try:
+                cb(session_id, change)
+            except Exception as e:
+                log.warning("구독 콜백 실패 session=%s: %s", session_id, e)
+
+    def is_live(self, session_id: str) -> bool:
+        """
+        다른 프로세스(daemon 등)의 변경까지 push로 받는지. Local은 항상 False → 폴링 유지.
+        """
+        return False
+
+
+class SupabaseRealtimePubSub(LocalPubSub):
+    """
+    별도 스레드의 asyncio 루프에서 Supabase Realtime에 붙는다.
+    연결이 끊기면 is_live()가 False가 되어 읽는 쪽은 폴링으로 돌아간다.
+    """
+
+    def __init__(self, url: str, key: str) -> None:
+        super().__init__()
+        self._url = url
+        self._key = key
+        self._client = None
+        self._joined: Set[str] = set()
+        self._joining: Set[str] = set()
+        self._shown: Dict[str, tuple] = {}
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="supabase-realtime", daemon=True).start()
+
+    def subscribe(self, session_id: str, cb: Callback) -> Callable[[], None]:
+        unsubscribe = super().subscribe(session_id, cb)
+        with self._lock:
+            need = session_id not in self._joined and session_id not in self._joining
+            if need:
+                self._joining.add(session_id)
+        if need:
+            asyncio.run_coroutine_threadsafe(self._join(session_id), self._loop)
+        return unsubscribe
+
+    def is_live(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._joined
+
+    async def _connect(self):
+        if self._client is None:
+            from supabase import acreate_client
+
+            client = await acreate_client(self._url, self._key)
+            await client.realtime.connect()
+            self._client = client
+        return self._client
+
+    async def _join(self, session_id: str) -> None:
+        try:
+            client = await self._connect()
+            channel = client.channel(f"overlay-{session_id}")
+            for table, column, event in WATCHED:
+                channel.on_postgres_changes(
+                    event,
+                    schema="public",
+                    table=table,
+                    filter=f"{column}=eq.{session_id}",
+                    callback=lambda payload, table=table: self._on_change(session_id, table, payload),
+                )
+
+            def _on_status(status, err=None):
+                with self._lock:
+                    if str(status).endswith("SUBSCRIBED"):
+                        self._joined.add(session_id)
+                    else:
+                        self._joined.discard(session_id)
+                if err:
+                    log.warning("realtime 채널 상태 session=%s: %s %s", session_id, status, err)
+
+            await channel.subscribe(_on_status)
+        except Exception as e:
+            log.warning("realtime 구독 실패 session=%s: %s (폴링으로 동작)", session_id, e)
+            self._client = None
+        finally:
+            with self._lock:
+                self._joining.discard(session_id)
+
+    def _on_change(self, session_id: str, table: str, payload: Dict[str, Any]) -> None:
+        data = payload.get("data", payload) if isinstance(payload, dict) else {}
+        record = data.get("record") or {}
+        if table == "sessions":
+            shown = tuple(record.get(c) for c in SESSION_DISPLAY_COLUMNS)
+            with self._lock:
+                if self._shown.get(session_id) == shown:
+                    return
+                self._shown[session_id] = shown
+        self.publish(
+            session_id,
+            {"table": table, "type": data.get("type") or data.get("eventType"), "record": record},
+        )
+
+
+@st.cache_resource
+def pubsub() -> LocalPubSub:
+    backend = setting("OVERLAY_PUBSUB", "supabase").lower()
+    if backend == "supabase":
+        url = setting("SUPABASE_URL")
+        key = setting("SUPABASE_SERVICE_ROLE_KEY")
+        if url and key:
+            return SupabaseRealtimePubSub(url, key)
+        log.warning("SUPABASE_URL/KEY 없음 → local pub/sub 사용")
+    return LocalPubSub()
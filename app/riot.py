@@ -1,26 +1,54 @@
 # app/riot.py
 from __future__ import annotations
 
-import os
-import time
+import sqlite3
+import threading
 import urllib.parse
 from typing import Any, Dict, List, Optional
 
-import streamlit as st
 import requests
 
-_SESSION = requests.Session()
+from . import budget, metrics
+from .cache import match_cache
+from .config import setting
+from .summary import SUMMARY_VERSION, MatchSummary, parse_summary
+from .ratelimit import rate_limiter
+
+# 메서드별 레이트 리밋 버킷 키
+M_ACCOUNT = "account-v1.by-riot-id"
+M_MATCH_IDS = "match-v5.ids-by-puuid"
+M_MATCH = "match-v5.match"
+
+# requests.Session은 스레드 간 공유가 보장되지 않으므로 스레드별로 1개 (app.fetch 워커용)
+_LOCAL = threading.local()
+
+
+def _session() -> requests.Session:
+    s = getattr(_LOCAL, "session", None)
+    if s is None:
+        s = _LOCAL.session = requests.Session()
+    return s
+
+
+class RiotAPIError(RuntimeError):
+    """
+    Riot API가 200/429가 아닌 응답을 준 경우. status_code로 원인 구분 (403 키, 404 없는 ID 등).
+    """
+
+    def __init__(self, status_code: int, body: Any):
+        super().__init__(f"Riot API 실패 {status_code}: {body}")
+        self.status_code = status_code
 
 
 def _riot_api_key() -> str:
-    key = st.secrets.get("RIOT_API_KEY") or os.getenv("RIOT_API_KEY", "")
+    key = setting("RIOT_API_KEY")
     if not key or not key.startswith("RGAPI-"):
         raise RuntimeError("RIOT_API_KEY가 없거나 형식이 이상합니다. (RGAPI-... 확인)")
     return key
 
 
 def _region() -> str:
-    region = (st.secrets.get("RIOT_REGION") or os.getenv("RIOT_REGION", "asia")).strip().lower()
+    region = setting("RIOT_REGION", "asia").lower()
     if region not in ("asia", "americas", "europe"):
         raise RuntimeError("RIOT_REGION은 asia/americas/europe 중 하나여야 합니다. (KR이면 asia)")
     return region
@@ -31,47 +59,108 @@ def _headers() -> Dict[str, str]:
 
 
 def _base_url() -> str:
+    # RIOT_BASE_URL: 로컬 가짜 서버 등으로 돌릴 때 (bench/). 비어 있으면 리전 호스트
+    override = setting("RIOT_BASE_URL")
+    if override:
+        return override.rstrip("/")
     return f"https://{_region()}.api.riotgames.com"
 
 
-def _get_json(url: str, params: Optional[Dict[str, Any]] = None) -> Any:
-    # ✅ 429 대응: Retry-After 있으면 그만큼, 없으면 점진 대기
+def _request(url: str, method: str, params: Optional[Dict[str, Any]] = None, stream: bool = False) -> requests.Response:
+    # ✅ 호출 전에 리미터로 자리 확보 → 응답 헤더로 한도/사용량 동기화
+    # 429는 보험: Retry-After 있으면 그만큼 전체 정지, 없으면 점진 대기
+    # 200 응답만 반환. stream=True면 본문은 호출한 쪽이 r.raw로 읽고 닫는다
+    limiter = rate_limiter()
     for i in range(6):
-        r = _SESSION.get(url, headers=_headers(), params=params, timeout=12)
+        limiter.acquire(method)
+        with metrics.span("riot.request", endpoint=method):
+            # tick 예산이 얼마 안 남았으면 응답 대기도 그만큼만
+            timeout = max(1.0, min(12.0, budget.remaining()))
+            r = _session().get(url, headers=_headers(), params=params, timeout=timeout, stream=stream)
+        limiter.update(method, r.headers)
+        metrics.count("riot.status", endpoint=method, status=r.status_code)
 
         if r.status_code == 200:
-            return r.json()
+            return r
 
         if r.status_code == 429:
+            r.close()
             ra = r.headers.get("Retry-After", "")
             wait = int(ra) if ra.isdigit() else min(2 + i * 2, 10)
-            time.sleep(wait)
+            limiter.penalize(wait)
             continue
 
         try:
             j = r.json()
         except Exception:
             j = {"status": {"status_code": r.status_code, "message": r.text[:200]}}
-        raise RuntimeError(f"Riot API 실패 {r.status_code}: {j}")
+        raise RiotAPIError(r.status_code, j)
 
     raise RuntimeError("Riot API 429: 재시도 초과")
 
 
+def _get_json(url: str, method: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    return _request(url, method, params).json()
+
+
 def get_account_by_riot_id(game_name: str, tag_line: str) -> Dict[str, Any]:
     gn = urllib.parse.quote(game_name.strip(), safe="")
     tl = urllib.parse.quote(tag_line.strip(), safe="")
     url = f"{_base_url()}/riot/account/v1/accounts/by-riot-id/{gn}/{tl}"
-    return _get_json(url)
+    return _get_json(url, M_ACCOUNT)
 
 
-def get_match_ids_by_puuid(puuid: str, start_time_sec: int, count: int = 8) -> List[str]:
+def get_match_ids_by_puuid(
+    puuid: str,
+    start_time_sec: int,
+    count: int = 8,
+    end_time_sec: Optional[int] = None,
+) -> List[str]:
     pu = urllib.parse.quote(puuid, safe="")
     url = f"{_base_url()}/lol/match/v5/matches/by-puuid/{pu}/ids"
     params = {"startTime": int(start_time_sec), "count": int(count), "queue": 420}
-    return _get_json(url, params=params)
+    if end_time_sec is not None:
+        params["endTime"] = int(end_time_sec)
+    return _get_json(url, M_MATCH_IDS, params=params)
+
+
+def get_match_summary(match_id: str) -> MatchSummary:
+    """
+    match-v5 상세를 집계용 요약(app.summary)으로만 받는다.
+    응답 본문은 스트림으로 읽으면서 필요한 필드만 남기고, 캐시에도 요약만 저장한다 (경기당 수백 바이트).
+    """
+    key = f"{match_id}@s{SUMMARY_VERSION}"
+    try:
+        cached = match_cache().get(key)
+    except sqlite3.Error:
+        cached = None
+    if cached is not None:
+        metrics.count("match_cache", result="hit")
+        return MatchSummary.from_dict(cached)
+    metrics.count("match_cache", result="miss")
 
-
-def get_match(match_id: str) -> Dict[str, Any]:
     mid = urllib.parse.quote(match_id, safe="")
     url = f"{_base_url()}/lol/match/v5/matches/{mid}"
-    return _get_json(url)
+    r = _request(url, M_MATCH, stream=True)
+    try:
+        r.raw.decode_content = True
+        # 스트림 파싱이라 본문 수신 시간도 여기 포함
+        with metrics.span("riot.read_body", endpoint=M_MATCH):
+            summary = parse_summary(match_id, r.raw)
+    finally:
+        r.close()
+
+    if summary.game_end_ms:
+        try:
+            match_cache().put(key, summary.to_dict())
+        except sqlite3.Error:
+            pass
+    return summary
+
+
+def affordable_participants(horizon_sec: float) -> int:
+    """
+    지금 레이트 리밋 안에서 horizon_sec 동안 처리 가능한 참가자 수.
+    참가자 1명 = match id 목록 1회 + 상세 1회(대부분 캐시 히트라 보수적 추정).
+    """
+    return rate_limiter().affordable({M_MATCH_IDS: 1, M_MATCH: 1}, horizon_sec)
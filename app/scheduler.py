@@ -0,0 +1,186 @@
+# app/scheduler.py
+"""
+진행 중인 모든 세션을 한 프로세스에서 집계하는 스케줄러.
+
+    python -m app.daemon --all
+
+- 매 사이클: ends_at이 남은 세션을 찾고, 각 세션의 lease(app.lock)를 잡은 것만 담당
+  (lease 연장은 만료가 가까울 때만, 남의 세션은 그 lease가 끝날 때까지 다시 시도하지 않음)
+- 참가자 1명 = 폴링 작업 1개. 세션 구분 없이 하나의 우선순위 큐에 넣고,
+  Riot 키 예산(affordable_participants)만큼만 꺼내서 처리 → 세션끼리 429로 굶기지 않음
+- 우선순위: 오래 안 본 참가자 먼저 + 종료가 임박한 세션은 URGENT_BOOST_SEC 만큼 앞당김
+  + 지난 사이클에 시간 예산 초과로 미룬 참가자(sessions.tick_backlog)는 BACKLOG_BOOST_SEC 만큼 앞당김
+- 사이클 시간 예산(every)을 세션별 몫으로 나눠 tick_participants에 넘김
+"""
+from __future__ import annotations
+
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Set, Tuple
+
+from .lock import DEFAULT_LOCK_TTL_SEC, LeaseKeeper
+from .logic import (
+    AUTO_TICK_HORIZON_SEC,
+    _backlog,
+    _iso_to_dt,
+    load_active_sessions,
+    load_participants,
+    tick_participants,
+)
+from .riot import affordable_participants
+
+log = logging.getLogger("app.scheduler")
+
+URGENT_WINDOW_SEC = 15 * 60   # 종료까지 이만큼 남은 세션은 우선
+URGENT_BOOST_SEC = 120.0      # 우선 세션 참가자는 마지막 폴링이 이만큼 더 오래된 것으로 취급
+BACKLOG_BOOST_SEC = 600.0     # 미룬 참가자는 이만큼 더 오래된 것으로 취급 (사실상 맨 앞)
+
+
+def _remaining_sec(session: Dict[str, Any]) -> float:
+    ends_dt = _iso_to_dt(session["ends_at"]).astimezone(timezone.utc)
+    return (ends_dt - datetime.now(timezone.utc)).total_seconds()
+
+
+class MultiSessionScheduler:
+    def __init__(self, owner: str, every: float = AUTO_TICK_HORIZON_SEC, ttl_sec: int = DEFAULT_LOCK_TTL_SEC):
+        self.owner = owner
+        self.every = every
+        self.ttl_sec = ttl_sec
+        # (session_id, participant_id) -> 마지막 폴링 시각(monotonic)
+        self.last_polled: Dict[Tuple[str, str], float] = {}
+        self.held: Set[str] = set()
+        self.keepers: Dict[str, LeaseKeeper] = {}
+
+    def _keeper(self, session_id: str) -> LeaseKeeper:
+        k = self.keepers.get(session_id)
+        if k is None:
+            k = self.keepers[session_id] = LeaseKeeper(session_id, self.owner, self.ttl_sec)
+        return k
+
+    def _release(self, session_id: str) -> None:
+        k = self.keepers.pop(session_id, None)
+        if k is None:
+            return
+        try:
+            k.release()
+        except Exception as e:
+            log.warning("락 해제 실패 session=%s: %s", session_id, e)
+
+    def _claim(self, sessions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        mine: List[Dict[str, Any]] = []
+        for s in sessions:
+            try:
+                got = self._keeper(s["id"]).ensure()
+            except Exception as e:
+                log.warning("락 확인 실패 session=%s: %s", s["id"], e)
+                got = False
+            if got:
+                if s["id"] not in self.held:
+                    log.info("세션 담당 시작: %s (%s)", s["id"], s.get("name", ""))
+                mine.append(s)
+            elif s["id"] in self.held:
+                log.info("세션 담당 해제(다른 runner): %s", s["id"])
+        active = {s["id"] for s in sessions}
+        for sid in self.held - active:
+            # 종료된 세션은 TTL을 기다리지 않고 바로 놓아준다
+            self._release(sid)
+            log.info("세션 종료 → 담당 해제: %s", sid)
+        for sid in set(self.keepers) - active:
+            self.keepers.pop(sid)
+
+        self.held = {s["id"] for s in mine}
+        self.last_polled = {k: v for k, v in self.last_polled.items() if k[0] in self.held}
+        return mine
+
+    def _queue(self, sessions: List[Dict[str, Any]], roster: Dict[str, List[Dict[str, Any]]]):
+        heap: List[Tuple[float, float, int, str, Dict[str, Any]]] = []
+        seq = 0
+        for s in sessions:
+            remain = _remaining_sec(s)
+            boost = URGENT_BOOST_SEC if remain < URGENT_WINDOW_SEC else 0.0
+            backlog = _backlog(s)
+            for p in roster[s["id"]]:
+                last = self.last_polled.get((s["id"], str(p["id"])), 0.0)
+                extra = BACKLOG_BOOST_SEC if str(p["id"]) in backlog else 0.0
+                heapq.heappush(heap, (last - boost - extra, remain, seq, s["id"], p))
+                seq += 1
+        return heap
+
+    def cycle(self) -> int:
+        """
+        한 사이클 실행. 반환: 신규 집계 건수 합계.
+        """
+        sessions = self._claim(load_active_sessions())
+        if not sessions:
+            return 0
+
+        roster: Dict[str, List[Dict[str, Any]]] = {}
+        for s in sessions:
+            try:
+                roster[s["id"]] = load_participants(s["id"])
+            except Exception as e:
+                log.warning("참가자 로드 실패 session=%s: %s", s["id"], e)
+                roster[s["id"]] = []
+
+        heap = self._queue(sessions, roster)
+        budget = max(1, affordable_participants(self.every))
+
+        picked: Dict[str, List[Dict[str, Any]]] = {}
+        now = time.monotonic()
+        while heap and budget > 0:
+            _key, _remain, _seq, sid, p = heapq.heappop(heap)
+            picked.setdefault(sid, []).append(p)
+            self.last_polled[(sid, str(p["id"]))] = now
+            budget -= 1
+
+        total = 0
+        by_id = {s["id"]: s for s in sessions}
+        ends_at = time.monotonic() + self.every
+        order = list(picked.items())
+        for i, (sid, plist) in enumerate(order):
+            # 남은 사이클 시간을 남은 세션 수로 나눔 (앞 세션이 일찍 끝나면 뒤 세션 몫이 커짐)
+            budget_sec = max(1.0, (ends_at - time.monotonic()) / (len(order) - i))
+            try:
+                keeper = self._keeper(sid)
+                # _claim 뒤 앞 세션들이 시간을 쓰는 동안 lease가 끝났을 수 있음 → 다시 확인 (연장할 때만 DB 호출)
+                if not keeper.ensure():
+                    log.info("세션 담당 해제(lease 만료/인수): %s → 이번 사이클 건너뜀", sid)
+                    continue
+                new_count, logs = tick_participants(
+                    by_id[sid],
+                    roster[sid],
+                    plist,
+                    budget_sec=budget_sec,
+                    heartbeat=keeper.heartbeat,
+                    fence_token=keeper.token,
+                )
+            except Exception as e:
+                log.error("tick 실패 session=%s: %s", sid, e)
+                continue
+            total += new_count
+            log.info("session=%s 참가자 %d명 폴링, 신규 %d건", sid, len(plist), new_count)
+            for line in logs:
+                log.info("  %s", line)
+        return total
+
+    def run(self, stop: threading.Event) -> None:
+        next_at = time.monotonic()
+        try:
+            while not stop.is_set():
+                try:
+                    self.cycle()
+                except Exception as e:
+                    log.error("사이클 실패: %s", e)
+                next_at += self.every
+                delay = next_at - time.monotonic()
+                if delay < 0:
+                    next_at = time.monotonic()
+                    delay = 0
+                stop.wait(delay)
+        finally:
+            for sid in list(self.keepers):
+                self._release(sid)
+            self.held = set()
@@ -0,0 +1,92 @@
+# app/seasons.py
+"""
+시즌 (여러 세션 묶음) + 시즌 리더보드 (sql/009_seasons.sql).
+
+- 세션은 만들 때 season_id를 받는다 (logic.create_session)
+- 경기 1건이 집계되면 matches insert 트리거가 season_player_stats 1행을 증분 갱신
+- 리더보드는 그 롤업 테이블만 읽는다: (season_id, 지표 desc, puuid) 인덱스 키셋 페이지네이션
+  → 세션/경기가 몇 개든 페이지 1장 = 인덱스 범위 스캔 1번
+
+    rows = load_leaderboard(season_id, "win_rate", limit=20)
+    more = load_leaderboard(season_id, "win_rate", after=leaderboard_cursor(rows[-1], "win_rate"))
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from .db import supabase_admin
+from .logic import _sb_exec
+
+# 정렬 기준: 키 -> 표시 이름 (키 = season_player_stats 열, 각각 인덱스가 있음)
+LEADERBOARD_ORDERS = {
+    "win_rate": "승률",
+    "kda": "KDA",
+    "wins": "승리 수",
+    "games": "경기 수",
+}
+LEADERBOARD_PAGE = 20
+
+
+def load_seasons() -> List[Dict[str, Any]]:
+    """
+    최근에 만든 시즌부터.
+    """
+    sb = supabase_admin()
+    r = _sb_exec(lambda: sb.table("seasons").select("*").order("created_at", desc=True).execute(), op="load_seasons")
+    return r.data or []
+
+
+def load_season(season_id: str) -> Dict[str, Any]:
+    sb = supabase_admin()
+    r = _sb_exec(lambda: sb.table("seasons").select("*").eq("id", season_id).single().execute(), op="load_season")
+    if not r.data:
+        raise RuntimeError("시즌을 찾을 수 없습니다.")
+    return r.data
+
+
+def create_season(name: str, starts_at: Optional[datetime] = None, ends_at: Optional[datetime] = None) -> Dict[str, Any]:
+    name = name.strip()
+    if not name:
+        raise ValueError("시즌 이름이 비어 있습니다.")
+    row: Dict[str, Any] = {"name": name}
+    if starts_at is not None:
+        row["starts_at"] = starts_at.isoformat()
+    if ends_at is not None:
+        row["ends_at"] = ends_at.isoformat()
+    sb = supabase_admin()
+    return _sb_exec(lambda: sb.table("seasons").insert(row).execute(), op="create_season").data[0]
+
+
+def leaderboard_cursor(row: Optional[Dict[str, Any]], order: str) -> Optional[Tuple[Any, str]]:
+    """
+    다음 페이지 커서 = 현재 페이지 마지막 행의 (지표 값, puuid).
+    """
+    return (row[order], row["puuid"]) if row else None
+
+
+def load_leaderboard(
+    season_id: str,
+    order: str = "win_rate",
+    after: Optional[Tuple[Any, str]] = None,
+    limit: int = LEADERBOARD_PAGE,
+    min_games: int = 1,
+) -> List[Dict[str, Any]]:
+    """
+    시즌 리더보드 1페이지: order desc, 같으면 puuid 오름차순. after는 leaderboard_cursor 값.
+    min_games 미만 경기 수인 플레이어는 제외 (승률 1판 100% 방지).
+    """
+    if order not in LEADERBOARD_ORDERS:
+        raise ValueError(f"알 수 없는 정렬 기준: {order}")
+    sb = supabase_admin()
+
+    def q():
+        b = sb.table("season_player_stats").select("*").eq("season_id", season_id)
+        if min_games > 1:
+            b = b.gte("games", min_games)
+        if after is not None:
+            value, puuid = after
+            b = b.or_(f'{order}.lt.{value},and({order}.eq.{value},puuid.gt."{puuid}")')
+        return b.order(order, desc=True).order("puuid").limit(limit).execute()
+
+    return _sb_exec(q, op="load_leaderboard").data or []
@@ -0,0 +1,165 @@
+# app/snapshot.py
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import streamlit as st
+
+from .db import supabase_admin
+from .logic import _sb_exec, load_participants, load_session
+from .realtime import SESSION_DISPLAY_COLUMNS, LocalPubSub, pubsub
+from .stats import session_stats
+
+# 오버레이가 허용하는 최대 지연. 이 안에서는 모든 viewer가 같은 스냅샷을 공유한다.
+SNAPSHOT_MAX_AGE_SEC = 2.0
+# realtime push가 살아 있을 때의 폴링 간격 (놓친 알림 대비용 fallback)
+SNAPSHOT_FALLBACK_MAX_AGE_SEC = 30.0
+
+# 화면에 보이는 참가자 열. version(digest)은 이 열 + SESSION_DISPLAY_COLUMNS + 최신 이벤트만으로 계산
+# → tick 진행 상태(커서/backlog/rr) 쓰기만으로는 version이 오르지 않는다
+PARTICIPANT_DISPLAY_COLUMNS = (
+    "id", "real_name", "team", "wins", "losses",
+    "kills", "deaths", "assists", "cs", "damage", "vision_score", "game_seconds",
+    "best_kda", "best_match_id",
+)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    오버레이 1화면에 필요한 읽기 전용 데이터 묶음.
+    version은 내용이 바뀔 때만 올라간다 (같은 version = 같은 화면).
+    """
+
+    session_id: str
+    version: int
+    session: Dict[str, Any]
+    participants: List[Dict[str, Any]]
+    latest_event: Optional[Dict[str, Any]]
+    fetched_at: float
+
+
+class _Entry:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.snapshot: Optional[Snapshot] = None
+        self.digest = ""
+        self.stale = True
+        self.subscribed = False
+
+
+def _load_latest_event(session_id: str) -> Optional[Dict[str, Any]]:
+    sb = supabase_admin()
+    ev = _sb_exec(
+        lambda: sb.table("events")
+        .select("*")
+        .eq("session_id", session_id)
+        .order("created_at", desc=True)
+        .order("id", desc=True)
+        .limit(1)
+        .execute()
+    )
+    return (ev.data or [None])[0]
+
+
+class SnapshotStore:
+    """
+    session_id별 스냅샷 캐시 (Streamlit 서버 프로세스 전체 공유).
+    - max_age 안이면 DB를 안 읽음
+    - 만료되면 그 세션을 처음 요청한 viewer 1명만 DB를 읽고, 나머지는 기다렸다가 결과를 같이 씀
+    - 변경 알림(app.realtime)을 구독해서 알림이 오면 invalidate → 다음 조회 때 바로 갱신
+      push가 살아 있으면 폴링은 fallback_max_age로 늘려서 idle 상태의 DB 조회를 거의 없앤다
+    """
+
+    def __init__(
+        self,
+        max_age: float = SNAPSHOT_MAX_AGE_SEC,
+        fallback_max_age: float = SNAPSHOT_FALLBACK_MAX_AGE_SEC,
+        bus: Optional[LocalPubSub] = None,
+    ):
+        self.max_age = max_age
+        self.fallback_max_age = fallback_max_age
+        self.bus = bus
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+
+    def _entry(self, session_id: str) -> _Entry:
+        with self._lock:
+            e = self._entries.get(session_id)
+            if e is None:
+                e = self._entries[session_id] = _Entry()
+            if self.bus is not None and not e.subscribed:
+                e.subscribed = True
+                self.bus.subscribe(session_id, lambda sid, _change: self.invalidate(sid))
+            return e
+
+    def is_live(self, session_id: str) -> bool:
+        return self.bus is not None and self.bus.is_live(session_id)
+
+    def _fresh(self, e: _Entry, max_age: float) -> bool:
+        s = e.snapshot
+        return s is not None and not e.stale and time.monotonic() - s.fetched_at < max_age
+
+    def get(self, session_id: str, max_age: Optional[float] = None) -> Snapshot:
+        e = self._entry(session_id)
+        if max_age is None:
+            max_age = self.fallback_max_age if self.is_live(session_id) else self.max_age
+        if self._fresh(e, max_age):
+            return e.snapshot
+        with e.lock:
+            # 기다리는 동안 다른 viewer가 갱신했으면 그걸 사용
+            if self._fresh(e, max_age):
+                return e.snapshot
+            return self._refresh(session_id, e)
+
+    def _refresh(self, session_id: str, e: _Entry) -> Snapshot:
+        # 읽는 도중 들어온 알림은 다시 stale로 남도록 먼저 내린다
+        e.stale = False
+        try:
+            session = load_session(session_id)
+            participants = load_participants(session_id)
+            latest = _load_latest_event(session_id)
+        except Exception:
+            # 읽기에 실패하면 받은 알림을 잃지 않도록 다시 stale로 (다음 조회가 바로 재시도)
+            e.stale = True
+            raise
+
+        shown = [
+            [session.get(c) for c in SESSION_DISPLAY_COLUMNS],
+            [[p.get(c) for c in PARTICIPANT_DISPLAY_COLUMNS] for p in participants],
+            latest and [latest.get("id"), latest.get("created_at")],
+        ]
+        body = json.dumps(shown, default=str)
+        digest = hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+        prev = e.snapshot
+        version = (prev.version if prev else 0) + (0 if digest == e.digest else 1)
+        if digest != e.digest:
+            session_stats(session_id).sync(participants)
+        e.snapshot = Snapshot(
+            session_id=session_id,
+            version=version,
+            session=session,
+            participants=participants,
+            latest_event=latest,
+            fetched_at=time.monotonic(),
+        )
+        e.digest = digest
+        return e.snapshot
+
+    def invalidate(self, session_id: str) -> None:
+        self._entry(session_id).stale = True
+
+
+@st.cache_resource
+def snapshot_store() -> SnapshotStore:
+    return SnapshotStore(bus=pubsub())
+
+
+def get_snapshot(session_id: str) -> Snapshot:
+    return snapshot_store().get(session_id)
@@ -0,0 +1,276 @@
+# app/stats.py
+"""
+세션별 인메모리 전적 저장소 (열 단위 배열).
+
+참가자 1명 = 행 1개, 스탯 1종 = array 1개. 경기가 집계될 때(logic._record_results) 증분 갱신하고
+팀 합계는 누적값으로 들고 있어서 O(1), 리더보드는 정렬 결과를 version 단위로 캐시한다.
+오버레이/분석 화면은 DB를 다시 읽지 않고 여기서 바로 읽는다.
+
+W/L과 누적 스탯(K/D/A, CS, 피해량, 시야, 게임 시간, 최고 KDA)의 기준값은 DB
+(session_participants, sql/008_player_game_stats.sql)이고, sync()가 그 값으로 맞춘다.
+마지막 경기 시각만 이 프로세스가 집계한 경기 기준.
+평균(KDA, CS/분, 분당 피해량 등)은 누적 열에서 바로 계산 → 리더보드 지표로도 쓸 수 있다 (DERIVED).
+"""
+from __future__ import annotations
+
+import threading
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 누적 스탯 열 (int64)
+STAT_COLUMNS = (
+    "wins",
+    "losses",
+    "kills",
+    "deaths",
+    "assists",
+    "cs",
+    "damage",
+    "vision_score",
+    "game_seconds",
+    "last_game_end_ms",
+)
+# 경기마다 결과(logic._build_result)에서 더하는 열
+_SUMMED = ("kills", "deaths", "assists", "cs", "damage", "vision_score", "game_seconds")
+TEAMS = ("A", "B")
+
+
+def _per_min(v: int, seconds: int) -> float:
+    return round(v * 60 / seconds, 1) if seconds else 0.0
+
+
+def kda_ratio(kills: int, deaths: int, assists: int) -> float:
+    return round((kills + assists) / max(deaths, 1), 2)
+
+
+# 누적 열에서 계산하는 지표 (row: 열 이름 -> 값)
+DERIVED: Dict[str, Callable[[Dict[str, int]], float]] = {
+    "games": lambda r: r["wins"] + r["losses"],
+    "kda": lambda r: kda_ratio(r["kills"], r["deaths"], r["assists"]),
+    "cs_per_min": lambda r: _per_min(r["cs"], r["game_seconds"]),
+    "damage_per_min": lambda r: _per_min(r["damage"], r["game_seconds"]),
+    "vision_per_min": lambda r: _per_min(r["vision_score"], r["game_seconds"]),
+}
+
+
+class SessionStats:
+    def __init__(self, session_id: str) -> None:
+        self.session_id = session_id
+        self.version = 0
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._names: List[str] = []
+        self._team = array("b")
+        self._cols: Dict[str, array] = {c: array("q") for c in STAT_COLUMNS}
+        # 최고 KDA 경기 (없으면 -1)
+        self._best_kda = array("d")
+        self._best_match: List[Optional[str]] = []
+        # 열별 팀 합계 [A, B]
+        self._totals: Dict[str, List[int]] = {c: [0, 0] for c in STAT_COLUMNS}
+        self._sorted: Dict[Tuple[str, bool], Tuple[int, List[int]]] = {}
+        self._rosters: Dict[str, Tuple[int, Tuple[Tuple[str, int, int], ...]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def same_roster(self, participants: List[Dict[str, Any]]) -> bool:
+        """
+        이 저장소의 참가자(id 집합)가 participants와 같은지. 인원 수만 같고 사람이 다르면 False.
+        """
+        with self._lock:
+            return len(self._ids) == len(participants) and all(str(p["id"]) in self._index for p in participants)
+
+    def _row(self, p: Dict[str, Any]) -> int:
+        pid = str(p["id"])
+        i = self._index.get(pid)
+        if i is None:
+            i = self._index[pid] = len(self._ids)
+            self._ids.append(pid)
+            self._names.append(str(p.get("real_name", "")))
+            self._team.append(0 if p.get("team") == "A" else 1)
+            for c in STAT_COLUMNS:
+                self._cols[c].append(0)
+            self._best_kda.append(-1.0)
+            self._best_match.append(None)
+        return i
+
+    def _set(self, i: int, col: str, value: int) -> bool:
+        old = self._cols[col][i]
+        if old == value:
+            return False
+        self._cols[col][i] = value
+        self._totals[col][self._team[i]] += value - old
+        return True
+
+    def _set_best(self, i: int, kda: float, match_id: Optional[str]) -> bool:
+        if self._best_kda[i] == kda and self._best_match[i] == match_id:
+            return False
+        self._best_kda[i] = kda
+        self._best_match[i] = match_id
+        return True
+
+    def _set_meta(self, i: int, p: Dict[str, Any]) -> bool:
+        changed = False
+        name = str(p.get("real_name", ""))
+        if self._names[i] != name:
+            self._names[i] = name
+            changed = True
+        t = 0 if p.get("team") == "A" else 1
+        if self._team[i] != t:
+            # 팀이 바뀌면 팀 합계도 옮긴다
+            for c in STAT_COLUMNS:
+                v = self._cols[c][i]
+                self._totals[c][self._team[i]] -= v
+                self._totals[c][t] += v
+            self._team[i] = t
+            changed = True
+        return changed
+
+    def _reorder(self, ids: List[str]) -> bool:
+        """
+        행 순서를 ids 순서로 맞춤 (ids에 없는 행은 뒤에 그대로). record()가 먼저 만든 행도 DB 순서로 돌아온다.
+        """
+        first = list(dict.fromkeys(self._index[x] for x in ids))
+        seen = set(first)
+        order = first + [i for i in range(len(self._ids)) if i not in seen]
+        if order == list(range(len(self._ids))):
+            return False
+        self._ids = [self._ids[i] for i in order]
+        self._names = [self._names[i] for i in order]
+        self._team = array("b", (self._team[i] for i in order))
+        self._cols = {c: array("q", (col[i] for i in order)) for c, col in self._cols.items()}
+        self._best_kda = array("d", (self._best_kda[i] for i in order))
+        self._best_match = [self._best_match[i] for i in order]
+        self._index = {pid: i for i, pid in enumerate(self._ids)}
+        return True
+
+    def sync(self, participants: List[Dict[str, Any]]) -> None:
+        """
+        DB 행(session_participants) 기준으로 행 추가 + 이름/팀/W/L/누적 스탯 맞춤 + 행 순서를 participants 순서로.
+        바뀐 게 없으면 version 유지. 행에 없는 열(마이그레이션 전 DB)은 건드리지 않는다.
+        """
+        with self._lock:
+            changed = False
+            for p in participants:
+                n = len(self._ids)
+                i = self._row(p)
+                changed |= i == n
+                changed |= self._set_meta(i, p)
+                changed |= self._set(i, "wins", int(p.get("wins") or 0))
+                changed |= self._set(i, "losses", int(p.get("losses") or 0))
+                for c in _SUMMED:
+                    if c in p:
+                        changed |= self._set(i, c, int(p[c] or 0))
+                if p.get("best_kda") is not None:
+                    changed |= self._set_best(i, float(p["best_kda"]), p.get("best_match_id"))
+            changed |= self._reorder([str(p["id"]) for p in participants])
+            if changed:
+                self.version += 1
+
+    def record(self, participant: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """
+        새로 집계된 경기 1건 (logic._build_result 결과) 반영.
+        """
+        with self._lock:
+            i = self._row(participant)
+            cols = self._cols
+            key = "wins" if result["result"] == "WIN" else "losses"
+            self._set(i, key, cols[key][i] + 1)
+            for c in _SUMMED:
+                self._set(i, c, cols[c][i] + int(result.get(c) or 0))
+            self._set(i, "last_game_end_ms", max(cols["last_game_end_ms"][i], int(result.get("game_end_ms") or 0)))
+            kda = kda_ratio(int(result.get("kills") or 0), int(result.get("deaths") or 0), int(result.get("assists") or 0))
+            if kda > self._best_kda[i]:
+                self._set_best(i, kda, result.get("match_id"))
+            self.version += 1
+
+    def team_total(self, col: str, team: str) -> int:
+        return self._totals[col][TEAMS.index(team)]
+
+    def team_row(self, team: str) -> Dict[str, Any]:
+        """
+        팀 합계 + 팀 기준 지표 (kda, cs_per_min 등은 팀 합계로 계산). O(1).
+        """
+        t = TEAMS.index(team)
+        row: Dict[str, Any] = {c: self._totals[c][t] for c in STAT_COLUMNS if c != "last_game_end_ms"}
+        for name, fn in DERIVED.items():
+            row[name] = fn(row)
+        return row
+
+    def get(self, participant_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            i = self._index.get(str(participant_id))
+            if i is None:
+                return None
+            return self._row_dict(i)
+
+    def _row_dict(self, i: int) -> Dict[str, Any]:
+        d: Dict[str, Any] = {"id": self._ids[i], "real_name": self._names[i], "team": TEAMS[self._team[i]]}
+        for c in STAT_COLUMNS:
+            d[c] = self._cols[c][i]
+        for name, fn in DERIVED.items():
+            d[name] = fn(d)
+        d["best_kda"] = self._best_kda[i] if self._best_kda[i] >= 0 else None
+        d["best_match_id"] = self._best_match[i]
+        return d
+
+    def _value(self, col: str) -> Callable[[int], float]:
+        if col in DERIVED:
+            fn = DERIVED[col]
+            return lambda i: fn({c: self._cols[c][i] for c in STAT_COLUMNS})
+        if col == "best_kda":
+            return self._best_kda.__getitem__
+        return self._cols[col].__getitem__
+
+    def roster(self, team: str) -> Tuple[Tuple[str, int, int, float], ...]:
+        """
+        팀 명단 (real_name, wins, losses, kda). 행 순서 = sync에 넘긴 참가자 순서.
+        """
+        with self._lock:
+            hit = self._rosters.get(team)
+            if hit is not None and hit[0] == self.version:
+                return hit[1]
+            t = TEAMS.index(team)
+            w, l = self._cols["wins"], self._cols["losses"]
+            k, d, a = self._cols["kills"], self._cols["deaths"], self._cols["assists"]
+            out = tuple(
+                (self._names[i], w[i], l[i], kda_ratio(k[i], d[i], a[i]))
+                for i in range(len(self._ids))
+                if self._team[i] == t
+            )
+            self._rosters[team] = (self.version, out)
+            return out
+
+    def leaderboard(self, col: str, limit: int = 10, desc: bool = True) -> List[Dict[str, Any]]:
+        """
+        col(누적 열, DERIVED 지표, best_kda) 기준 상위 limit명. 정렬은 version이 바뀐 뒤 첫 조회 때만 한다.
+        경기가 없는 참가자는 지표 리더보드에서 뺀다.
+        """
+        with self._lock:
+            hit = self._sorted.get((col, desc))
+            if hit is None or hit[0] != self.version:
+                value = self._value(col)
+                rows = range(len(self._ids))
+                if col not in STAT_COLUMNS:
+                    w, l = self._cols["wins"], self._cols["losses"]
+                    rows = [i for i in rows if w[i] + l[i] > 0]
+                order = sorted(rows, key=value, reverse=desc)
+                hit = self._sorted[(col, desc)] = (self.version, order)
+            return [self._row_dict(i) for i in hit[1][:limit]]
+
+
+_STATS: Dict[str, SessionStats] = {}
+_STATS_LOCK = threading.Lock()
+
+
+def session_stats(session_id: str, create: bool = True) -> Optional[SessionStats]:
+    """
+    프로세스 공유 저장소. create=False면 아직 없는 세션은 None.
+    """
+    session_id = str(session_id)
+    with _STATS_LOCK:
+        s = _STATS.get(session_id)
+        if s is None and create:
+            s = _STATS[session_id] = SessionStats(session_id)
+        return s
@@ -0,0 +1,159 @@
+# app/summary.py
+"""
+match-v5 상세에서 집계에 필요한 값만 뽑은 작은 요약.
+
+전체 문서(참가자 10명 × 수백 필드, 수십 KB)를 dict로 다 만들지 않고
+ijson이 있으면 응답 바이트를 흘려 읽으면서 필요한 필드만 모은다. 없으면 json 전체 디코드 후 투영.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import astuple, dataclass
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+try:
+    import ijson
+except ImportError:  # 선택 의존성: 없으면 전체 디코드 경로 사용
+    ijson = None
+
+# 필드를 늘리면 올려서 예전 캐시 항목을 무시하게 한다 (app.cache 키에 포함)
+SUMMARY_VERSION = 2
+
+# 참가자 1명에서 읽는 match-v5 participant 키 (ParticipantLine으로 합치는 건 _line)
+_PARTICIPANT_KEYS = frozenset({
+    "puuid",
+    "win",
+    "kills",
+    "deaths",
+    "assists",
+    "totalMinionsKilled",
+    "neutralMinionsKilled",
+    "totalDamageDealtToChampions",
+    "visionScore",
+})
+
+_TOP_KEYS = ("queueId", "gameStartTimestamp", "gameEndTimestamp", "gameDuration")
+
+
+@dataclass(frozen=True)
+class ParticipantLine:
+    puuid: str
+    win: bool
+    kills: int
+    deaths: int
+    assists: int
+    cs: int = 0            # 미니언 + 정글 몬스터
+    damage: int = 0        # 챔피언에게 가한 피해량
+    vision_score: int = 0
+
+
+@dataclass(frozen=True)
+class MatchSummary:
+    match_id: str
+    queue_id: Optional[int]
+    game_start_ms: Optional[int]
+    game_end_ms: Optional[int]
+    participants: Tuple[ParticipantLine, ...]
+    game_duration_sec: Optional[int] = None
+
+    def find(self, puuid: str) -> Optional[ParticipantLine]:
+        return next((p for p in self.participants if p.puuid == puuid), None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "match_id": self.match_id,
+            "queue_id": self.queue_id,
+            "game_start_ms": self.game_start_ms,
+            "game_end_ms": self.game_end_ms,
+            "game_duration_sec": self.game_duration_sec,
+            "participants": [list(astuple(p)) for p in self.participants],
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "MatchSummary":
+        return cls(
+            match_id=d["match_id"],
+            queue_id=d["queue_id"],
+            game_start_ms=d["game_start_ms"],
+            game_end_ms=d["game_end_ms"],
+            participants=tuple(ParticipantLine(*row) for row in d["participants"]),
+            game_duration_sec=d.get("game_duration_sec"),
+        )
+
+
+def _line(raw: Dict[str, Any]) -> ParticipantLine:
+    return ParticipantLine(
+        puuid=str(raw.get("puuid", "")),
+        win=bool(raw.get("win")),
+        kills=int(raw.get("kills", 0)),
+        deaths=int(raw.get("deaths", 0)),
+        assists=int(raw.get("assists", 0)),
+        cs=int(raw.get("totalMinionsKilled", 0)) + int(raw.get("neutralMinionsKilled", 0)),
+        damage=int(raw.get("totalDamageDealtToChampions", 0)),
+        vision_score=int(raw.get("visionScore", 0)),
+    )
+
+
+def _int_or_none(v: Any) -> Optional[int]:
+    return int(v) if v is not None else None
+
+
+def _duration_sec(info: Dict[str, Any]) -> Optional[int]:
+    """
+    게임 시간(초). 예전 패치 응답은 gameEndTimestamp가 없고 gameDuration이 ms 단위.
+    """
+    d = _int_or_none(info.get("gameDuration"))
+    if d is not None and info.get("gameEndTimestamp") is None:
+        d //= 1000
+    if d is None and info.get("gameEndTimestamp") and info.get("gameStartTimestamp"):
+        d = (int(info["gameEndTimestamp"]) - int(info["gameStartTimestamp"])) // 1000
+    return d
+
+
+def summarize(match_id: str, match: Dict[str, Any]) -> MatchSummary:
+    """
+    이미 디코드된 match-v5 dict -> 요약.
+    """
+    info = match.get("info") or {}
+    return MatchSummary(
+        match_id=match_id,
+        queue_id=_int_or_none(info.get("queueId")),
+        game_start_ms=_int_or_none(info.get("gameStartTimestamp")),
+        game_end_ms=_int_or_none(info.get("gameEndTimestamp")),
+        participants=tuple(_line(p) for p in info.get("participants") or []),
+        game_duration_sec=_duration_sec(info),
+    )
+
+
+def parse_summary(match_id: str, body: BinaryIO) -> MatchSummary:
+    """
+    응답 본문 스트림 -> 요약. ijson이 있으면 필요한 스칼라만 모으고 나머지는 버리면서 읽는다.
+    """
+    if ijson is None:
+        return summarize(match_id, json.load(body))
+
+    top: Dict[str, Any] = {}
+    players = []
+    cur: Optional[Dict[str, Any]] = None
+    for prefix, event, value in ijson.parse(body, use_float=True):
+        if prefix == "info.participants.item":
+            if event == "start_map":
+                cur = {}
+            elif event == "end_map" and cur is not None:
+                players.append(_line(cur))
+                cur = None
+        elif cur is not None and prefix.startswith("info.participants.item."):
+            key = prefix[len("info.participants.item."):]
+            if key in _PARTICIPANT_KEYS:
+                cur[key] = value
+        elif prefix.startswith("info.") and prefix[len("info."):] in _TOP_KEYS:
+            top[prefix[len("info."):]] = value
+
+    return MatchSummary(
+        match_id=match_id,
+        queue_id=_int_or_none(top.get("queueId")),
+        game_start_ms=_int_or_none(top.get("gameStartTimestamp")),
+        game_end_ms=_int_or_none(top.get("gameEndTimestamp")),
+        participants=tuple(players),
+        game_duration_sec=_duration_sec(top),
+    )
@@ -1,7 +1,15 @@
 from __future__ import annotations
 import streamlit as st
 import streamlit.components.v1 as components
-from typing import List, Dict, Any
+from datetime import datetime, timezone
+from functools import lru_cache
+from html import escape
+from string import Template
+from typing import List, Dict, Any, Optional, Tuple
+
+from dateutil import parser as dtparser
+
+from .stats import kda_ratio, session_stats
 
 BASE_CSS = """
 <style>
@@ -34,6 +42,10 @@ html, body { background: transparent !important; }
 .teamName { font-size: 11px; font-weight: 900; margin-bottom: 6px; }
 .p { display:flex; justify-content:space-between; font-size: 10px; line-height: 1.5; opacity: .92; }
 .small { font-size: 10px; opacity: .7; }
+.kda { font-size: 9px; opacity: .6; margin-left: 4px; }
+
+.grid3 { display:grid; grid-template-columns: 1fr 1fr 1fr; gap: 6px; }
+.lbTitle { font-size: 10px; font-weight: 900; margin-bottom: 4px; opacity: .85; }
 
 .scoreBig {
   height: 160px;
@@ -82,56 +94,40 @@ html, body { background: transparent !important; }
 </style>
 """
 
-def _split_teams(participants: List[Dict[str, Any]]):
-    a = [p for p in participants if p["team"] == "A"]
-    b = [p for p in participants if p["team"] == "B"]
-    return a, b
+# ====== 템플릿 (모듈 로드 시 1번만 컴파일) ======
+_PLAYER_TPL = Template(
+    '<div class="p"><span>$name</span><span>$wins승 $losses패<span class="kda">$kda</span></span></div>'
+)
 
-def render_view_roster(session, participants):
-    a, b = _split_teams(participants)
-
-    def team_block(team_name, plist):
-        lines = ""
-        for p in plist:
-            lines += f"""
-              <div class="p">
-                <span>{p['real_name']}</span>
-                <span>{p['wins']}승 {p['losses']}패</span>
-              </div>
-            """
-        return f"""
+_TEAM_TPL = Template("""
           <div class="teamBox">
-            <div class="teamName">{team_name}</div>
-            {lines}
+            <div class="teamName">$team_name</div>
+            $lines
           </div>
-        """
+""")
 
-    html = f"""
-    {BASE_CSS}
+_ROSTER_TPL = Template("""
+    $css
     <div class="wrap">
       <div class="card">
         <div class="row">
           <div>
-            <div class="title">{session['name']}</div>
+            <div class="title">$name</div>
             <div class="sub">팀별 개인 전적</div>
           </div>
           <div class="badge">LIVE</div>
         </div>
         <div class="hr"></div>
         <div class="grid2">
-          {team_block(session['team_a_name'], a)}
-          {team_block(session['team_b_name'], b)}
+          $team_a
+          $team_b
         </div>
       </div>
     </div>
-    """
-    components.html(html, height=240, width=370)
-
-
+""")
 
-def render_view_score(session):
-    html = f"""
-    {BASE_CSS}
+_SCORE_TPL = Template("""
+    $css
     <div class="wrap">
       <div class="card">
         <div class="row">
@@ -140,27 +136,232 @@ def render_view_score(session):
         </div>
         <div class="hr"></div>
         <div class="scoreBig">
-          <div class="scoreNums">{session['team_a_wins']} <span class="vs">VS</span> {session['team_b_wins']}</div>
-          <div class="teamLine">{session['team_a_name']}  vs  {session['team_b_name']}</div>
+          <div class="scoreNums">$a_wins <span class="vs">VS</span> $b_wins</div>
+          <div class="teamLine">$a_name  vs  $b_name</div>
+          $team_stats
           <div class="small">Solo Ranked (420) · 세션 시작 이후 집계</div>
         </div>
       </div>
     </div>
-    """
-    components.html(html, height=240, width=370)
-
-def render_popup_result(real_name: str, is_win: bool, extra_text: str = "방금 종료된 경기 결과"):
-    cls = "win" if is_win else "loss"
-    title = "승리" if is_win else "패배"
-    st.markdown(
-        f"""
-        <div class="popup {cls}">
-          <div class="popupTitle">{title}</div>
-          <div class="popupName">{real_name}</div>
-          <div class="popupSub">{extra_text}</div>
+""")
+
+_TEAM_STATS_TPL = Template(
+    '<div class="small">K/D/A $a_kills/$a_deaths/$a_assists ($a_kda) · $b_kills/$b_deaths/$b_assists ($b_kda)</div>'
+)
+
+_LEADER_TPL = Template('<div class="p"><span>$name</span><span>$value</span></div>')
+
+_LEADERS_TPL = Template("""
+    $css
+    <div class="wrap">
+      <div class="card">
+        <div class="row">
+          <div>
+            <div class="title">$name</div>
+            <div class="sub">개인 스탯 TOP $limit</div>
+          </div>
+          <div class="badge">LIVE</div>
         </div>
-        """,
-        unsafe_allow_html=True
+        <div class="hr"></div>
+        <div class="grid3">
+          $boards
+        </div>
+      </div>
+    </div>
+""")
+
+# 리더보드 화면: (제목, app.stats 지표)
+LEADER_BOARDS = (("KDA", "kda"), ("CS/분", "cs_per_min"), ("피해량/분", "damage_per_min"))
+LEADER_LIMIT = 5
+
+_POPUP_TPL = Template("""
+        $css
+        <div class="popup $cls">
+          <div class="popupTitle">$title</div>
+          <div class="popupName">$name</div>
+          <div class="popupSub">$sub</div>
+        </div>
+""")
+
+_COUNTDOWN_TPL = Template("### ⏱️ 남은 시간: **$remain**")
+
+# 렌더 결과 캐시 크기 (세션 수 × 화면 종류 정도면 충분)
+_FRAGMENT_CACHE_SIZE = 256
+
+
+def _split_teams(participants: List[Dict[str, Any]]):
+    a = [p for p in participants if p["team"] == "A"]
+    b = [p for p in participants if p["team"] == "B"]
+    return a, b
+
+
+def _players_key(plist: List[Dict[str, Any]]) -> Tuple[Tuple[str, int, int, float], ...]:
+    return tuple(
+        (
+            str(p["real_name"]),
+            int(p["wins"]),
+            int(p["losses"]),
+            kda_ratio(int(p.get("kills") or 0), int(p.get("deaths") or 0), int(p.get("assists") or 0)),
+        )
+        for p in plist
+    )
+
+
+def _kda_label(wins: int, losses: int, kda: float) -> str:
+    return f"{kda:.1f}" if wins + losses else ""
+
+
+@lru_cache(maxsize=_FRAGMENT_CACHE_SIZE)
+def _team_block(team_name: str, players: Tuple[Tuple[str, int, int, float], ...]) -> str:
+    lines = "\n".join(
+        _PLAYER_TPL.substitute(name=escape(n), wins=w, losses=l, kda=_kda_label(w, l, k)) for n, w, l, k in players
     )
+    return _TEAM_TPL.substitute(team_name=escape(team_name), lines=lines)
 
 
+@lru_cache(maxsize=_FRAGMENT_CACHE_SIZE)
+def _roster_fragment(name: str, a_name: str, b_name: str, a_players, b_players) -> str:
+    return _ROSTER_TPL.substitute(
+        css=BASE_CSS,
+        name=escape(name),
+        team_a=_team_block(a_name, a_players),
+        team_b=_team_block(b_name, b_players),
+    )
+
+
+@lru_cache(maxsize=_FRAGMENT_CACHE_SIZE)
+def _score_fragment(a_name: str, b_name: str, a_wins: int, b_wins: int, team_stats: str = "") -> str:
+    return _SCORE_TPL.substitute(
+        css=BASE_CSS, a_name=escape(a_name), b_name=escape(b_name), a_wins=a_wins, b_wins=b_wins, team_stats=team_stats
+    )
+
+
+@lru_cache(maxsize=_FRAGMENT_CACHE_SIZE)
+def _leaders_fragment(name: str, boards: Tuple[Tuple[str, Tuple[Tuple[str, str], ...]], ...]) -> str:
+    blocks = []
+    for title, rows in boards:
+        lines = "\n".join(_LEADER_TPL.substitute(name=escape(n), value=escape(v)) for n, v in rows)
+        blocks.append(f'<div class="teamBox"><div class="lbTitle">{escape(title)}</div>{lines}</div>')
+    return _LEADERS_TPL.substitute(css=BASE_CSS, name=escape(name), limit=LEADER_LIMIT, boards="\n".join(blocks))
+
+
+@lru_cache(maxsize=_FRAGMENT_CACHE_SIZE)
+def _popup_fragment(real_name: str, is_win: bool, sub: str) -> str:
+    return _POPUP_TPL.substitute(
+        css=BASE_CSS,
+        cls="win" if is_win else "loss",
+        title="승리" if is_win else "패배",
+        name=escape(real_name),
+        sub=escape(sub),
+    )
+
+
+def roster_html(session: Dict[str, Any], participants: List[Dict[str, Any]]) -> str:
+    """
+    같은 (세션명, 팀명, 참가자 전적)이면 같은 문자열 객체를 돌려줌
+    → components.html 인자가 그대로라 Streamlit이 iframe을 다시 만들지 않음.
+    """
+    stats = session_stats(session["id"], create=False) if "id" in session else None
+    if stats is not None and stats.same_roster(participants):
+        # 인메모리 전적(app.stats)에 같은 참가자가 다 있으면 명단 스캔 없이 캐시된 튜플 사용
+        a_key, b_key = stats.roster("A"), stats.roster("B")
+    else:
+        a, b = _split_teams(participants)
+        a_key, b_key = _players_key(a), _players_key(b)
+    return _roster_fragment(
+        str(session["name"]),
+        str(session["team_a_name"]),
+        str(session["team_b_name"]),
+        a_key,
+        b_key,
+    )
+
+
+def _team_stats_line(session: Dict[str, Any]) -> str:
+    stats = session_stats(session["id"], create=False) if "id" in session else None
+    if stats is None:
+        return ""
+    a, b = stats.team_row("A"), stats.team_row("B")
+    if not (a["games"] or b["games"]):
+        return ""
+    return _TEAM_STATS_TPL.substitute(
+        a_kills=a["kills"], a_deaths=a["deaths"], a_assists=a["assists"], a_kda=f"{a['kda']:.1f}",
+        b_kills=b["kills"], b_deaths=b["deaths"], b_assists=b["assists"], b_kda=f"{b['kda']:.1f}",
+    )
+
+
+def score_html(session: Dict[str, Any]) -> str:
+    return _score_fragment(
+        str(session["team_a_name"]),
+        str(session["team_b_name"]),
+        int(session["team_a_wins"]),
+        int(session["team_b_wins"]),
+        _team_stats_line(session),
+    )
+
+
+def has_leaders(session: Dict[str, Any]) -> bool:
+    """
+    리더보드 화면을 보여줄 만큼 집계된 경기가 있는지 (app.stats 기준).
+    """
+    stats = session_stats(session["id"], create=False) if "id" in session else None
+    return stats is not None and bool(stats.leaderboard("games", limit=1))
+
+
+def leaders_html(session: Dict[str, Any]) -> str:
+    """
+    KDA / CS/분 / 피해량/분 TOP N. app.stats 리더보드(version 단위 정렬 캐시)에서 바로 읽는다.
+    """
+    stats = session_stats(session["id"], create=False)
+    boards = []
+    for title, metric in LEADER_BOARDS:
+        rows = stats.leaderboard(metric, limit=LEADER_LIMIT) if stats is not None else []
+        boards.append((title, tuple((str(r["real_name"]), f"{r[metric]:g}") for r in rows)))
+    return _leaders_fragment(str(session["name"]), tuple(boards))
+
+
+def fmt_remain(seconds: int) -> str:
+    if seconds < 0:
+        seconds = 0
+    h = seconds // 3600
+    m = (seconds % 3600) // 60
+    s = seconds % 60
+    return f"{h:02d}:{m:02d}:{s:02d}"
+
+
+def render_view_roster(session, participants):
+    components.html(roster_html(session, participants), height=240, width=370)
+
+
+def render_view_score(session):
+    components.html(score_html(session), height=240, width=370)
+
+
+def render_view_leaders(session):
+    components.html(leaders_html(session), height=240, width=370)
+
+
+def render_popup_result(
+    real_name: str,
+    is_win: bool,
+    kda_text: Optional[str] = None,
+    extra_text: str = "방금 종료된 경기 결과",
+):
+    # 팝업은 iframe 밖(st.markdown)이라 스타일도 같이 넣는다
+    st.markdown(_popup_fragment(str(real_name), bool(is_win), kda_text or extra_text), unsafe_allow_html=True)
+
+
+def render_countdown(ends_at: Optional[str]) -> None:
+    """
+    세션 ends_at 기준 남은 시간 표시 (예전 pages/1_Overlay.py 인라인 타이머).
+    """
+    if not ends_at:
+        return
+    try:
+        ends_dt = dtparser.isoparse(ends_at).astimezone(timezone.utc)
+    except Exception:
+        return
+    remain_sec = int((ends_dt - datetime.now(timezone.utc)).total_seconds())
+    st.markdown(_COUNTDOWN_TPL.substitute(remain=fmt_remain(remain_sec)))
+    if remain_sec <= 0:
+        st.warning("타임어택 종료! (이후 종료된 경기는 집계되지 않습니다)")
@@ -0,0 +1,227 @@
+# bench/fake_riot.py
+"""
+로컬 가짜 Riot API 서버 (app.riot이 RIOT_BASE_URL로 붙음).
+
+- /riot/account/v1/accounts/by-riot-id/<gn>/<tl>
+- /lol/match/v5/matches/by-puuid/<puuid>/ids?startTime=&endTime=&count=
+- /lol/match/v5/matches/<match_id>
+
+경기는 FakeWorld가 미리 만들어 두고 release(n)으로 n번째 경기까지 "종료된 것"으로 공개한다.
+latency / 429 비율 / 응답 크기(participant당 더미 필드)를 조절할 수 있고, 엔드포인트별 호출 수를 센다.
+"""
+from __future__ import annotations
+
+import json
+import random
+import threading
+import urllib.parse
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep
+from typing import Any, Dict, List, Optional, Tuple
+
+QUEUE_SOLO_RANKED = 420
+
+
+@dataclass
+class FakeMatch:
+    match_id: str
+    start_ms: int
+    end_ms: int
+    puuids: List[str]
+    winners: frozenset
+
+
+@dataclass
+class FakeWorld:
+    """
+    players명(세션 참가자)이 games_per_player판씩, 한 판에 shared명씩 같이 들어간 경기 목록.
+    나머지 자리는 세션 밖 플레이어로 채운다.
+    """
+
+    players: int
+    games_per_player: int = 3
+    shared: int = 2
+    started_ms: int = 0
+    span_ms: int = 3 * 3600 * 1000
+    game_ms: int = 25 * 60 * 1000
+    filler_fields: int = 120
+    matches: List[FakeMatch] = field(default_factory=list)
+    released: int = 0
+
+    def __post_init__(self) -> None:
+        self.shared = max(1, min(self.shared, self.players, 10))
+        total = max(1, self.players * self.games_per_player // self.shared)
+        rnd = random.Random(42)
+        # started_ms ~ started_ms + span_ms 안에 시간순으로 배치 → release 순서 = 종료 순서 (커서 기반 조회와 맞음)
+        # 같은 참가자의 다음 경기는 players/shared 칸 뒤이므로 그보다 길면 경기 시간을 줄여 겹치지 않게 한다
+        step = max(1, (self.span_ms - 60_000 - self.game_ms) // max(1, total - 1))
+        game_ms = max(1, min(self.game_ms, step * max(1, self.players // self.shared) - 1))
+        for j in range(total):
+            mine = [self.puuid((j * self.shared + k) % self.players) for k in range(self.shared)]
+            others = [f"other-{j}-{k}" for k in range(10 - len(mine))]
+            puuids = mine + others
+            start = self.started_ms + 60_000 + j * step
+            winners = frozenset(rnd.sample(puuids, 5))
+            self.matches.append(FakeMatch(f"KR_{7000000000 + j}", start, start + game_ms, puuids, winners))
+
+    @staticmethod
+    def riot_id(i: int) -> Tuple[str, str]:
+        return f"bench{i}", "KR1"
+
+    @staticmethod
+    def puuid(i: int) -> str:
+        return f"puuid-bench{i}-kr1"
+
+    def release(self, n: int) -> None:
+        self.released = max(0, min(n, len(self.matches)))
+
+    def match_ids(self, puuid: str, start_sec: int, end_sec: Optional[int], count: int) -> List[str]:
+        out = [
+            m.match_id
+            for m in self.matches[: self.released]
+            if puuid in m.puuids and m.start_ms // 1000 >= start_sec and (end_sec is None or m.start_ms // 1000 <= end_sec)
+        ]
+        return list(reversed(out))[:count]  # Riot처럼 최신순
+
+    def match_doc(self, match_id: str) -> Optional[Dict[str, Any]]:
+        m = next((x for x in self.matches[: self.released] if x.match_id == match_id), None)
+        if m is None:
+            return None
+        filler = {f"stat{k}": k for k in range(self.filler_fields)}
+        return {
+            "metadata": {"matchId": m.match_id, "participants": m.puuids},
+            "info": {
+                "queueId": QUEUE_SOLO_RANKED,
+                "gameStartTimestamp": m.start_ms,
+                "gameEndTimestamp": m.end_ms,
+                "gameDuration": (m.end_ms - m.start_ms) // 1000,
+                "participants": [
+                    {
+                        "puuid": pu,
+                        "win": pu in m.winners,
+                        "kills": (i * 3) % 11,
+                        "deaths": (i * 5) % 9,
+                        "assists": (i * 7) % 13,
+                        "totalMinionsKilled": 120 + (i * 17) % 90,
+                        "neutralMinionsKilled": (i * 11) % 40,
+                        "totalDamageDealtToChampions": 9000 + (i * 2311) % 21000,
+                        "visionScore": 10 + (i * 3) % 35,
+                        "challenges": filler,
+                        "perks": {"styles": [{"selections": [{"perk": 8000 + k} for k in range(4)]}]},
+                    }
+                    for i, pu in enumerate(m.puuids)
+                ],
+            },
+        }
+
+
+class FakeRiotServer:
+    def __init__(
+        self,
+        world: FakeWorld,
+        latency_sec: float = 0.03,
+        p429: float = 0.0,
+        retry_after: int = 1,
+        app_limit: str = "500:1",
+    ):
+        self.world = world
+        self.latency_sec = latency_sec
+        self.p429 = p429
+        self.retry_after = retry_after
+        self.app_limit = app_limit
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+        self._rnd = random.Random(7)
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-riot", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeRiotServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+    def _count(self, kind: str) -> bool:
+        """
+        호출 1건 기록. 429를 낼 차례면 True.
+        """
+        with self._lock:
+            self.calls[kind] += 1
+            throttled = self.p429 > 0 and self._rnd.random() < self.p429
+            if throttled:
+                self.calls["429"] += 1
+            return throttled
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # 헤더/본문 분리 전송 + delayed ACK로 40ms씩 밀리지 않게
+
+            def log_message(self, fmt, *args):
+                pass
+
+            def _send(self, code: int, doc: Any = None, headers: Optional[Dict[str, str]] = None) -> None:
+                body = json.dumps(doc, separators=(",", ":")).encode("utf-8") if doc is not None else b""
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json;charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("X-App-Rate-Limit", server.app_limit)
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urllib.parse.urlsplit(self.path)
+                parts = [urllib.parse.unquote(x) for x in url.path.strip("/").split("/")]
+                qs = {k: v[0] for k, v in urllib.parse.parse_qs(url.query).items()}
+
+                if parts[:5] == ["riot", "account", "v1", "accounts", "by-riot-id"] and len(parts) == 7:
+                    kind = "account"
+                elif parts[:5] == ["lol", "match", "v5", "matches", "by-puuid"] and len(parts) == 7:
+                    kind = "match_ids"
+                elif parts[:4] == ["lol", "match", "v5", "matches"] and len(parts) == 5:
+                    kind = "match"
+                else:
+                    self._send(404, {"status": {"status_code": 404, "message": "not found"}})
+                    return
+
+                if server.latency_sec > 0:
+                    sleep(server.latency_sec)
+                if server._count(kind):
+                    self._send(429, {"status": {"status_code": 429}}, {"Retry-After": str(server.retry_after)})
+                    return
+
+                if kind == "account":
+                    gn, tl = parts[5], parts[6]
+                    self._send(200, {"puuid": f"puuid-{gn}-{tl}".lower(), "gameName": gn, "tagLine": tl})
+                elif kind == "match_ids":
+                    end = qs.get("endTime")
+                    ids = server.world.match_ids(
+                        parts[5], int(qs.get("startTime", 0)), int(end) if end else None, int(qs.get("count", 20))
+                    )
+                    self._send(200, ids)
+                else:
+                    doc = server.world.match_doc(parts[4])
+                    if doc is None:
+                        self._send(404, {"status": {"status_code": 404, "message": "Data not found"}})
+                    else:
+                        self._send(200, doc)
+
+        return Handler
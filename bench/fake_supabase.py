@@ -0,0 +1,463 @@
+# bench/fake_supabase.py
+"""
+인메모리 Supabase 대역 (app.db.use_client로 끼워 넣음).
+
+app/ 코드가 실제로 쓰는 PostgREST query builder 부분집합만 흉내 낸다:
+table().select/insert/update/upsert/delete + eq/gt/gte/lt/lte/in_/or_ + order/limit/range/single + execute,
+rpc("record_match_results") (sql/001_record_match_results.sql ~ 011을 파이썬으로 옮긴 것).
+
+execute() 1번 = DB 왕복 1번으로 세고, 설정한 latency만큼 지연한다.
+error_rate 비율로 순간 장애(httpx.ReadError)를 내고, unique 위반/single 0건은 실제와 같은 APIError(code)로 던진다.
+"""
+from __future__ import annotations
+
+import copy
+import random
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from time import monotonic, sleep
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from postgrest.exceptions import APIError
+
+# 테이블별 insert 기본값 (sql/ 마이그레이션의 default와 맞춤)
+_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "sessions": {"team_a_wins": 0, "team_b_wins": 0, "tick_rr_cursor": 0, "tick_lock_until": None, "tick_lock_owner": None, "tick_backlog": {},
+                 "season_id": None},
+    "session_participants": {
+        "wins": 0, "losses": 0, "puuid": None, "match_cursor_ms": None, "seen_match_ids": [],
+        "kills": 0, "deaths": 0, "assists": 0, "cs": 0, "damage": 0, "vision_score": 0, "game_seconds": 0,
+        "best_kda": None, "best_match_id": None,
+    },
+    "matches": {},
+    "events": {},
+    "players": {},
+    "seasons": {},
+    "season_player_stats": {},
+    "tick_leases": {},
+}
+
+# record_match_results가 경기별로 저장하고 참가자별로 누적하는 스탯 (sql/008_player_game_stats.sql)
+_GAME_STATS = ("kills", "deaths", "assists", "cs", "damage", "vision_score", "game_seconds")
+
+# 중복 insert를 막는 unique 키 (on conflict do nothing 용)
+_UNIQUE: Dict[str, Tuple[str, ...]] = {
+    "matches": ("session_id", "match_id", "participant_puuid"),
+    "players": ("riot_key",),
+}
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass
+class Result:
+    data: Any
+    count: Optional[int] = None
+
+
+def _coerce(row_value: Any, raw: str) -> Any:
+    raw = raw.strip('"')
+    if isinstance(row_value, bool):
+        return raw.lower() == "true"
+    if isinstance(row_value, int):
+        try:
+            return int(raw)
+        except ValueError:
+            return raw
+    if isinstance(row_value, float):
+        try:
+            return float(raw)
+        except ValueError:
+            return raw
+    return raw
+
+
+def _cmp(op: str, row_value: Any, raw: Any) -> bool:
+    if op == "is":
+        return row_value is None if str(raw).lower() == "null" else row_value == raw
+    if row_value is None:
+        return False
+    v = _coerce(row_value, raw) if isinstance(raw, str) else raw
+    if op == "eq":
+        return str(row_value) == str(v)
+    if op == "neq":
+        return str(row_value) != str(v)
+    if op == "gt":
+        return row_value > v
+    if op == "gte":
+        return row_value >= v
+    if op == "lt":
+        return row_value < v
+    if op == "lte":
+        return row_value <= v
+    raise ValueError(f"지원하지 않는 연산자: {op}")
+
+
+def _split_top(expr: str) -> List[str]:
+    out, depth, cur, quoted = [], 0, "", False
+    for ch in expr:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0 and not quoted:
+            out.append(cur)
+            cur = ""
+        else:
+            cur += ch
+    if cur:
+        out.append(cur)
+    return out
+
+
+def _parse_logic(expr: str) -> Callable[[Dict[str, Any]], bool]:
+    """
+    or_()/and() 필터 문자열 -> 행 판정 함수. 예) 'a.is.null,and(b.eq."x",c.gt.3)'
+    """
+    preds = []
+    for part in _split_top(expr):
+        if part.startswith("and(") and part.endswith(")"):
+            inner = _split_top(part[4:-1])
+            subs = [_parse_logic(x) for x in inner]
+            preds.append(lambda row, subs=subs: all(f(row) for f in subs))
+            continue
+        col, op, raw = part.split(".", 2)
+        preds.append(lambda row, col=col, op=op, raw=raw: _cmp(op, row.get(col), raw))
+    return lambda row: any(f(row) for f in preds)
+
+
+class _Query:
+    def __init__(self, db: "FakeSupabase", table: str):
+        self.db = db
+        self.table = table
+        self.op = "select"
+        self.cols = "*"
+        self.payload: Any = None
+        self.on_conflict: Optional[str] = None
+        self.filters: List[Callable[[Dict[str, Any]], bool]] = []
+        self.orders: List[Tuple[str, bool]] = []
+        self.lo: Optional[int] = None
+        self.hi: Optional[int] = None
+        self.one = False
+
+    # ---- 동작 ----
+    def select(self, cols: str = "*", **_kw) -> "_Query":
+        self.cols = cols
+        return self
+
+    def insert(self, payload: Any, **_kw) -> "_Query":
+        self.op, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload: Any, on_conflict: str = "", **_kw) -> "_Query":
+        self.op, self.payload, self.on_conflict = "upsert", payload, on_conflict
+        return self
+
+    def update(self, payload: Dict[str, Any], **_kw) -> "_Query":
+        self.op, self.payload = "update", payload
+        return self
+
+    def delete(self, **_kw) -> "_Query":
+        self.op = "delete"
+        return self
+
+    # ---- 필터 ----
+    def _f(self, op: str, col: str, value: Any) -> "_Query":
+        self.filters.append(lambda row: _cmp(op, row.get(col), value))
+        return self
+
+    def eq(self, col, value):
+        return self._f("eq", col, value)
+
+    def neq(self, col, value):
+        return self._f("neq", col, value)
+
+    def gt(self, col, value):
+        return self._f("gt", col, value)
+
+    def gte(self, col, value):
+        return self._f("gte", col, value)
+
+    def lt(self, col, value):
+        return self._f("lt", col, value)
+
+    def lte(self, col, value):
+        return self._f("lte", col, value)
+
+    def in_(self, col, values):
+        wanted = {str(v) for v in values}
+        self.filters.append(lambda row: str(row.get(col)) in wanted)
+        return self
+
+    def or_(self, expr: str) -> "_Query":
+        self.filters.append(_parse_logic(expr))
+        return self
+
+    # ---- 정렬/범위 ----
+    def order(self, col: str, desc: bool = False, **_kw) -> "_Query":
+        self.orders.append((col, desc))
+        return self
+
+    def limit(self, n: int) -> "_Query":
+        self.lo, self.hi = 0, n - 1
+        return self
+
+    def range(self, lo: int, hi: int) -> "_Query":
+        self.lo, self.hi = lo, hi
+        return self
+
+    def single(self) -> "_Query":
+        self.one = True
+        return self
+
+    def execute(self) -> Result:
+        return self.db._execute(self)
+
+
+class _Rpc:
+    def __init__(self, db: "FakeSupabase", name: str, params: Dict[str, Any]):
+        self.db = db
+        self.name = name
+        self.params = params
+
+    def execute(self) -> Result:
+        return self.db._execute_rpc(self)
+
+
+class FakeSupabase:
+    """
+    스레드 안전한 인메모리 테이블 묶음. round_trips / latency_sec로 DB 비용을 흉내·측정한다.
+    """
+
+    def __init__(self, latency_sec: float = 0.0, error_rate: float = 0.0):
+        self.latency_sec = latency_sec
+        self.error_rate = error_rate
+        self._rnd = random.Random(11)
+        self.round_trips = 0
+        self.tables: Dict[str, List[Dict[str, Any]]] = {name: [] for name in _DEFAULTS}
+        self._ids = 0
+        self._lock = threading.Lock()
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, name)
+
+    def rpc(self, name: str, params: Dict[str, Any]) -> _Rpc:
+        return _Rpc(self, name, params)
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.round_trips = 0
+
+    # ---- 내부 ----
+    def _round_trip(self) -> None:
+        with self._lock:
+            self.round_trips += 1
+        if self.latency_sec > 0:
+            sleep(self.latency_sec)
+        with self._lock:
+            failed = self.error_rate > 0 and self._rnd.random() < self.error_rate
+        if failed:
+            raise httpx.ReadError("[Errno 11] Resource temporarily unavailable")
+
+    def _new_row(self, table: str, values: Dict[str, Any]) -> Dict[str, Any]:
+        self._ids += 1
+        row = {"id": self._ids, **copy.deepcopy(_DEFAULTS.get(table, {}))}
+        if table in ("events", "matches", "sessions"):
+            row["created_at"] = _now_iso()
+        row.update(copy.deepcopy(values))
+        return row
+
+    def _conflict(self, table: str, values: Dict[str, Any], cols: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        if not cols:
+            return None
+        key = tuple(str(values.get(c)) for c in cols)
+        return next((r for r in self.tables[table] if tuple(str(r.get(c)) for c in cols) == key), None)
+
+    def _insert(self, table: str, values: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if self._conflict(table, values, _UNIQUE.get(table, ())) is not None:
+            raise APIError({"code": "23505", "message": f"duplicate key value violates unique constraint ({table})"})
+        row = self._new_row(table, values)
+        self.tables[table].append(row)
+        return row
+
+    def _project(self, row: Dict[str, Any], cols: str) -> Dict[str, Any]:
+        if cols.strip() == "*":
+            return copy.deepcopy(row)
+        return {c.strip(): copy.deepcopy(row.get(c.strip())) for c in cols.split(",")}
+
+    def _execute(self, q: _Query) -> Result:
+        self._round_trip()
+        with self._lock:
+            rows = self.tables.setdefault(q.table, [])
+            if q.op == "insert":
+                payload = q.payload if isinstance(q.payload, list) else [q.payload]
+                return Result([copy.deepcopy(self._insert(q.table, v)) for v in payload])
+
+            if q.op == "upsert":
+                payload = q.payload if isinstance(q.payload, list) else [q.payload]
+                cols = tuple(c.strip() for c in (q.on_conflict or "id").split(","))
+                out = []
+                for v in payload:
+                    hit = self._conflict(q.table, v, cols)
+                    if hit is None:
+                        hit = self._new_row(q.table, v)
+                        rows.append(hit)
+                    else:
+                        hit.update(copy.deepcopy(v))
+                    out.append(copy.deepcopy(hit))
+                return Result(out)
+
+            matched = [r for r in rows if all(f(r) for f in q.filters)]
+
+            if q.op == "update":
+                for r in matched:
+                    r.update(copy.deepcopy(q.payload))
+                return Result([copy.deepcopy(r) for r in matched])
+
+            if q.op == "delete":
+                gone = {id(r) for r in matched}
+                self.tables[q.table] = [r for r in rows if id(r) not in gone]
+                return Result([copy.deepcopy(r) for r in matched])
+
+            for col, desc in reversed(q.orders):
+                matched.sort(key=lambda r, col=col: (r.get(col) is None, r.get(col)), reverse=desc)
+            if q.lo is not None:
+                matched = matched[q.lo:q.hi + 1]
+            data = [self._project(r, q.cols) for r in matched]
+            if q.one:
+                if len(data) != 1:
+                    raise APIError({"code": "PGRST116", "message": f"JSON object requested, {len(data)} rows returned"})
+                return Result(data[0])
+            return Result(data)
+
+    def _execute_rpc(self, call: _Rpc) -> Result:
+        self._round_trip()
+        p = call.params
+        with self._lock:
+            if call.name == "record_match_results":
+                self._check_fence(p["p_session_id"], p.get("p_fence_token"))
+                self._save_tick_state(p["p_session_id"], p.get("p_cursors"), p.get("p_backlog"), p.get("p_rr_cursor"))
+                return Result(self._record_match_results(p["p_session_id"], p["p_results"] or []))
+            if call.name == "acquire_tick_lease":
+                return Result(self._acquire_tick_lease(p["p_session_id"], p["p_owner"], int(p["p_ttl_sec"])))
+            if call.name == "release_tick_lease":
+                for row in self.tables["tick_leases"]:
+                    if str(row["session_id"]) == str(p["p_session_id"]) and row["owner"] == p["p_owner"] and row["token"] == p["p_token"]:
+                        row["owner"], row["expires_at"] = None, monotonic()
+                return Result(None)
+        raise RuntimeError(f"알 수 없는 rpc: {call.name}")
+
+    # sql/010_tick_leases.sql 과 같은 규칙 (만료 시각은 monotonic 초)
+    def _acquire_tick_lease(self, session_id: Any, owner: str, ttl_sec: int) -> Dict[str, Any]:
+        now = monotonic()
+        row = next((r for r in self.tables["tick_leases"] if str(r["session_id"]) == str(session_id)), None)
+        if row is None:
+            row = self._new_row("tick_leases", {"session_id": session_id, "owner": owner, "token": 1, "expires_at": now + ttl_sec})
+            self.tables["tick_leases"].append(row)
+            acquired = True
+        elif row["owner"] == owner and row["expires_at"] > now:
+            row["expires_at"] = now + ttl_sec
+            acquired = True
+        elif row["owner"] is None or row["expires_at"] <= now:
+            row.update(owner=owner, token=row["token"] + 1, expires_at=now + ttl_sec)
+            acquired = True
+        else:
+            acquired = False
+        return {"acquired": acquired, "owner": row["owner"], "token": row["token"], "ttl_left_sec": max(0.0, row["expires_at"] - now)}
+
+    def _check_fence(self, session_id: Any, token: Optional[int]) -> None:
+        if token is None:
+            return
+        row = next((r for r in self.tables["tick_leases"] if str(r["session_id"]) == str(session_id)), None)
+        if row is None or row["owner"] is None or row["token"] != token:
+            raise APIError({"code": "P0F01", "message": f"tick lease token {token} is stale"})
+
+    def _save_tick_state(self, session_id: Any, cursors: Optional[List[Dict[str, Any]]], backlog: Any, rr_cursor: Optional[int]) -> None:
+        # sql/011_fenced_tick_state.sql: 커서 / 미룬 작업 / rr 위치 (fence 확인 뒤 같은 트랜잭션)
+        by_id = {str(p["id"]): p for p in self.tables["session_participants"]}
+        for c in cursors or ():
+            p = by_id.get(str(c["id"]))
+            if p is not None and str(p["session_id"]) == str(session_id):
+                p["match_cursor_ms"] = c.get("match_cursor_ms")
+                p["seen_match_ids"] = list(c.get("seen_match_ids") or [])
+        if backlog is None and rr_cursor is None:
+            return
+        session = next(s for s in self.tables["sessions"] if str(s["id"]) == str(session_id))
+        if backlog is not None:
+            session["tick_backlog"] = copy.deepcopy(backlog)
+        if rr_cursor is not None:
+            session["tick_rr_cursor"] = int(rr_cursor)
+
+    def _season_rollup(self, season_id: Any, r: Dict[str, Any], p: Optional[Dict[str, Any]], line: Dict[str, int], win: bool) -> None:
+        # sql/009_seasons.sql 의 matches insert 트리거
+        key = {"season_id": season_id, "puuid": r["participant_puuid"]}
+        row = self._conflict("season_player_stats", key, ("season_id", "puuid"))
+        if row is None:
+            row = self._new_row("season_player_stats", {
+                **key, "real_name": None, "games": 0, "wins": 0, "losses": 0, "last_game_end_ms": None,
+                **{c: 0 for c in _GAME_STATS},
+            })
+            self.tables["season_player_stats"].append(row)
+        if p is not None:
+            row["real_name"] = p["real_name"]
+        row["games"] += 1
+        row["wins" if win else "losses"] += 1
+        for c in _GAME_STATS:
+            row[c] += line[c]
+        row["last_game_end_ms"] = max(row["last_game_end_ms"] or 0, int(r["game_end_ms"]))
+        row["win_rate"] = round(row["wins"] / max(row["games"], 1), 4)
+        row["kda"] = round((row["kills"] + row["assists"]) / max(row["deaths"], 1), 2)
+
+    def _record_match_results(self, session_id: Any, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # sql/001_record_match_results.sql (+ 008 누적 스탯) 과 같은 규칙
+        session = next(s for s in self.tables["sessions"] if str(s["id"]) == str(session_id))
+        by_id = {str(p["id"]): p for p in self.tables["session_participants"]}
+        applied, touched = [], []
+        for r in results:
+            key = {"session_id": session_id, "match_id": r["match_id"], "participant_puuid": r["participant_puuid"]}
+            if self._conflict("matches", key, _UNIQUE["matches"]) is not None:
+                continue
+            line = {c: int(r.get(c) or 0) for c in _GAME_STATS}
+            self._insert("matches", {**key, "result": r["result"], "team": r["team"], "game_end_ms": int(r["game_end_ms"]), **line})
+
+            win = r["result"] == "WIN"
+            p = by_id.get(str(r["participant_id"]))
+            if p is not None and str(p["session_id"]) == str(session_id):
+                p["wins" if win else "losses"] += 1
+                for c in _GAME_STATS:
+                    p[c] += line[c]
+                kda = round((line["kills"] + line["assists"]) / max(line["deaths"], 1), 2)
+                if p["best_kda"] is None or kda > p["best_kda"]:
+                    p["best_kda"], p["best_match_id"] = kda, r["match_id"]
+                touched.append(p)
+            if session.get("season_id") is not None:
+                self._season_rollup(session["season_id"], r, p, line, win)
+            if win:
+                session["team_a_wins" if r["team"] == "A" else "team_b_wins"] += 1
+
+            self._insert("events", {
+                "session_id": session_id,
+                "real_name": r["real_name"],
+                "result": r["result"],
+                "match_id": r["match_id"],
+                "kda_text": r.get("kda_text"),
+            })
+            applied.append({"participant_id": r["participant_id"], "match_id": r["match_id"], "result": r["result"]})
+
+        uniq = {str(p["id"]): p for p in touched}
+        return {
+            "applied": applied,
+            "team_a_wins": session["team_a_wins"],
+            "team_b_wins": session["team_b_wins"],
+            "participants": [
+                {"id": p["id"], "wins": p["wins"], "losses": p["losses"], **{c: p[c] for c in _GAME_STATS},
+                 "best_kda": p["best_kda"], "best_match_id": p["best_match_id"]}
+                for p in uniq.values()
+            ],
+        }
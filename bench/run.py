@@ -0,0 +1,256 @@
+# bench/run.py
+"""
+tick 파이프라인 오프라인 벤치마크 (네트워크/실제 키 없이).
+
+    python -m bench.run --players 10 --ticks 6
+    python -m bench.run --players 40 --riot-latency-ms 80 --p429 0.05 --mode auto
+    python -m bench.run --json > result.json
+
+가짜 Riot 서버(bench.fake_riot)를 RIOT_BASE_URL로, 인메모리 Supabase(bench.fake_supabase)를
+app.db.use_client로 끼워서 app.logic.tick_session / tick_session_auto를 그대로 돌린다.
+tick마다 경기를 조금씩 공개(release)해서 "새 경기 몇 판 + 나머지는 변화 없음" 상황을 만든다.
+
+tick별로 보고하는 값:
+- wall_ms   : tick 함수 1번의 경과 시간
+- riot      : Riot 호출 수 (account / match_ids / match, 429 포함)
+- db        : DB 왕복 수 (execute 1번 = 1)
+- sleep_ms  : app 코드의 time.sleep 합계 (레이트 리밋 대기 + 재시도 대기, 워커 스레드 합산)
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from .fake_riot import FakeRiotServer, FakeWorld
+from .fake_supabase import FakeSupabase
+
+
+class SleepMeter:
+    """
+    time.sleep을 감싸서 app 코드가 잔 시간을 합산. (bench 모듈은 from time import sleep이라 제외됨)
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._orig = time.sleep
+        self.total = 0.0
+
+    def _sleep(self, sec: float) -> None:
+        with self._lock:
+            self.total += max(0.0, sec)
+        self._orig(sec)
+
+    def install(self) -> None:
+        time.sleep = self._sleep
+
+    def uninstall(self) -> None:
+        time.sleep = self._orig
+
+    def reset(self) -> None:
+        with self._lock:
+            self.total = 0.0
+
+
+def _configure_env(args, riot: FakeRiotServer, cache_dir: str) -> None:
+    os.environ.update(
+        {
+            "RIOT_API_KEY": "RGAPI-bench",
+            "RIOT_REGION": "asia",
+            "RIOT_BASE_URL": riot.base_url,
+            "RIOT_APP_RATE_LIMIT": args.app_limit,
+            "MATCH_CACHE_PATH": os.path.join(cache_dir, "match_cache.sqlite3"),
+            "OVERLAY_PUBSUB": "local",
+        }
+    )
+
+
+def _reset_app_state() -> None:
+    """
+    모드마다 프로세스 싱글턴(리미터, 디스크 캐시, 플레이어 디렉터리 등)과 모듈 캐시를 비운다.
+    """
+    import streamlit as st
+
+    from app import logic, stats
+
+    st.cache_resource.clear()
+    logic._PROCESSED.clear()
+    stats._STATS.clear()
+
+
+def _seed(db: FakeSupabase, world: FakeWorld, started: datetime, ends: datetime) -> str:
+    session = db.table("sessions").insert(
+        {
+            "name": "bench",
+            "team_a_name": "A팀",
+            "team_b_name": "B팀",
+            "started_at": started.isoformat(),
+            "ends_at": ends.isoformat(),
+        }
+    ).execute().data[0]
+    half = world.players // 2
+    rows = []
+    for i in range(world.players):
+        gn, tl = world.riot_id(i)
+        rows.append(
+            {
+                "session_id": session["id"],
+                "real_name": f"참가자{i}",
+                "riot_game_name": gn,
+                "riot_tag_line": tl,
+                "team": "A" if i < half else "B",
+            }
+        )
+    db.table("session_participants").insert(rows).execute()
+    return str(session["id"])
+
+
+def run_mode(args, mode: str) -> List[Dict[str, Any]]:
+    from app import db as app_db
+    from app.logic import tick_session, tick_session_auto
+
+    now = datetime.now(timezone.utc)
+    started = now - timedelta(hours=args.hours)
+    ends = now + timedelta(hours=1)
+
+    world = FakeWorld(
+        players=args.players,
+        games_per_player=args.games,
+        shared=args.shared,
+        started_ms=int(started.timestamp() * 1000),
+        span_ms=int(args.hours * 3600 * 1000),
+        filler_fields=args.filler_fields,
+    )
+    riot = FakeRiotServer(
+        world,
+        latency_sec=args.riot_latency_ms / 1000,
+        p429=args.p429,
+        retry_after=args.retry_after,
+        app_limit=args.app_limit,
+    ).start()
+    db = FakeSupabase(latency_sec=args.db_latency_ms / 1000, error_rate=args.db_error_rate)
+    meter = SleepMeter()
+
+    rows: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="bench-") as cache_dir:
+        _configure_env(args, riot, cache_dir)
+        _reset_app_state()
+        app_db.use_client(db)
+        error_rate, db.error_rate = db.error_rate, 0.0
+        session_id = _seed(db, world, started, ends)
+        db.error_rate = error_rate
+        meter.install()
+        try:
+            total = len(world.matches)
+            for t in range(1, args.ticks + 1):
+                world.release(-(-total * t // args.ticks))
+                riot.reset_counters()
+                db.reset_counters()
+                meter.reset()
+
+                t0 = time.perf_counter()
+                try:
+                    if mode == "auto":
+                        new_count, logs = tick_session_auto(session_id, horizon_sec=args.horizon)
+                    else:
+                        new_count, logs = tick_session(session_id)
+                except Exception as e:
+                    new_count, logs = 0, [f"tick 자체 실패: {e}"]
+                wall = time.perf_counter() - t0
+
+                rows.append(
+                    {
+                        "mode": mode,
+                        "tick": t,
+                        "released": world.released,
+                        "new": new_count,
+                        "wall_ms": round(wall * 1000, 1),
+                        "riot": sum(v for k, v in riot.calls.items() if k != "429"),
+                        "riot_account": riot.calls["account"],
+                        "riot_match_ids": riot.calls["match_ids"],
+                        "riot_match": riot.calls["match"],
+                        "riot_429": riot.calls["429"],
+                        "db": db.round_trips,
+                        "sleep_ms": round(meter.total * 1000, 1),
+                        "errors": len(logs),
+                    }
+                )
+        finally:
+            meter.uninstall()
+            app_db.use_client(None)
+            riot.stop()
+            _reset_app_state()
+    return rows
+
+
+_COLUMNS = ("mode", "tick", "released", "new", "wall_ms", "riot", "riot_match_ids", "riot_match", "riot_429", "db", "sleep_ms", "errors")
+
+
+def _print_table(rows: List[Dict[str, Any]]) -> None:
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in _COLUMNS}
+    print("  ".join(c.rjust(widths[c]) for c in _COLUMNS))
+    for r in rows:
+        print("  ".join(str(r[c]).rjust(widths[c]) for c in _COLUMNS))
+
+
+def _print_summary(rows: List[Dict[str, Any]]) -> None:
+    for mode in dict.fromkeys(r["mode"] for r in rows):
+        rs = [r for r in rows if r["mode"] == mode]
+        walls = [r["wall_ms"] for r in rs]
+        print(
+            f"[{mode}] ticks={len(rs)} new={sum(r['new'] for r in rs)} "
+            f"wall p50={statistics.median(walls):.1f}ms max={max(walls):.1f}ms "
+            f"riot={sum(r['riot'] for r in rs)} (429={sum(r['riot_429'] for r in rs)}) "
+            f"db={sum(r['db'] for r in rs)} sleep={sum(r['sleep_ms'] for r in rs):.0f}ms"
+        )
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="tick 파이프라인 오프라인 벤치마크")
+    ap.add_argument("--mode", choices=("manual", "auto", "both"), default="both",
+                    help="manual=tick_session, auto=tick_session_auto")
+    ap.add_argument("--players", type=int, default=10, help="세션 참가자 수")
+    ap.add_argument("--games", type=int, default=3, help="참가자당 세션 중 경기 수")
+    ap.add_argument("--shared", type=int, default=2, help="한 경기에 같이 들어간 세션 참가자 수")
+    ap.add_argument("--ticks", type=int, default=6)
+    ap.add_argument("--hours", type=float, default=3.0, help="세션 시작 후 경과 시간")
+    ap.add_argument("--horizon", type=float, default=15.0, help="tick_session_auto horizon_sec")
+    ap.add_argument("--riot-latency-ms", type=float, default=30.0)
+    ap.add_argument("--db-latency-ms", type=float, default=15.0)
+    ap.add_argument("--db-error-rate", type=float, default=0.0, help="DB 호출을 순간 장애로 실패시킬 확률")
+    ap.add_argument("--p429", type=float, default=0.0, help="Riot 응답을 429로 바꿀 확률")
+    ap.add_argument("--retry-after", type=int, default=1, help="429 응답의 Retry-After(초)")
+    ap.add_argument("--app-limit", default="500:1,30000:600", help="가짜 서버/리미터 앱 한도")
+    ap.add_argument("--filler-fields", type=int, default=120, help="participant당 더미 필드 수 (응답 크기)")
+    ap.add_argument("--json", action="store_true", help="tick별 결과를 JSON으로 출력")
+    args = ap.parse_args(argv)
+
+    # streamlit 런타임 밖이라 나오는 ScriptRunContext 경고가 표를 덮지 않게
+    # (설정 파싱이 로그 레벨을 다시 덮어쓰므로 파싱을 먼저 끝낸 뒤 내린다)
+    from streamlit import config as st_config
+    from streamlit.logger import set_log_level
+
+    st_config.get_option("logger.level")
+    set_log_level("error")
+
+    modes = ("manual", "auto") if args.mode == "both" else (args.mode,)
+    rows: List[Dict[str, Any]] = []
+    for mode in modes:
+        rows.extend(run_mode(args, mode))
+
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return
+    _print_table(rows)
+    print()
+    _print_summary(rows)
+
+
+if __name__ == "__main__":
+    main()
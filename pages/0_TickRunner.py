@@ -1,14 +1,15 @@
 from __future__ import annotations
 
+import json
 import time
 import uuid
-from datetime import datetime, timezone, timedelta
 
 import streamlit as st
 from streamlit_autorefresh import st_autorefresh
 
-from app.db import supabase_admin
-from app.logic import tick_session_auto, load_session
+from app.lock import LeaseKeeper
+from app.logic import tick_session_auto
+from app.metrics import last_tick, recent_ticks
 from app.riot import get_account_by_riot_id
 
 st.set_page_config(page_title="Tick Runner", layout="centered")
@@ -47,7 +48,11 @@ runner_id = st.session_state["runner_id"]
 if "last_tick_at" not in st.session_state:
     st.session_state["last_tick_at"] = 0.0
 
-sb = supabase_admin()
+# lease 상태는 탭(브라우저 세션)마다 유지 → rerun마다 DB에 쓰지 않고 만료가 가까울 때만 연장
+keeper = st.session_state.get("lease_keeper")
+if keeper is None or keeper.session_id != session_id:
+    keeper = st.session_state["lease_keeper"] = LeaseKeeper(session_id, runner_id, LOCK_TTL_SEC)
+
 st_autorefresh(interval=REFRESH_MS, key="tick_runner_refresh")
 now = time.time()
 
@@ -55,46 +60,14 @@ st.title("Tick Runner (집계 전용)")
 st.caption("이 페이지는 Riot API 집계를 수행합니다. Overlay는 읽기 전용으로 두세요.")
 st.caption(f"Session: {session_id}")
 st.caption(f"Runner ID: {runner_id}")
+st.caption("브라우저 없이 돌리려면: python -m app.daemon --session <ID> (같은 락 사용)")
 
-
-def try_acquire_lock(session_id: str) -> bool:
-    """
-    sessions.tick_lock_until이 비었거나 만료된 경우에만 락 획득.
-    """
-    now_dt = datetime.now(timezone.utc)
-    now_iso = now_dt.isoformat()
-    lock_until = (now_dt + timedelta(seconds=LOCK_TTL_SEC)).isoformat()
-
-    r = (
-        sb.table("sessions")
-        .update({"tick_lock_until": lock_until, "tick_lock_owner": runner_id})
-        .eq("id", session_id)
-        .or_(f"tick_lock_until.is.null,tick_lock_until.lt.{now_iso}")
-        .execute()
-    )
-    return bool(r.data)
-
-
-def refresh_lock(session_id: str) -> None:
-    """
-    내가 락 소유자일 때만 TTL 연장(heartbeat)
-    """
-    now_dt = datetime.now(timezone.utc)
-    lock_until = (now_dt + timedelta(seconds=LOCK_TTL_SEC)).isoformat()
-    (
-        sb.table("sessions")
-        .update({"tick_lock_until": lock_until})
-        .eq("id", session_id)
-        .eq("tick_lock_owner", runner_id)
-        .execute()
-    )
-
-
-# ====== 락 획득 시도 ======
+# ====== 리더 lease (app.lock) ======
+# 리더: 남은 시간이 ttl의 1/3 아래일 때만 연장 / 대기: 현재 리더 lease가 끝날 때까지 DB 호출 없음
 acquired = False
 lock_err = None
 try:
-    acquired = try_acquire_lock(session_id)
+    acquired = keeper.ensure()
 except Exception as e:
     lock_err = e
     acquired = False
@@ -102,23 +75,15 @@ except Exception as e:
 if lock_err:
     st.error(f"락 획득 시도 중 에러: {lock_err}")
 
+lease = keeper.lease
 if not acquired:
     st.warning("다른 Tick Runner가 집계 중입니다. (이 창은 대기 상태)")
-    try:
-        s = load_session(session_id)
-        st.caption(f"세션: {s.get('name','')} | 현재 락 소유자: {s.get('tick_lock_owner')}")
-        st.caption(f"lock_until: {s.get('tick_lock_until')}")
-    except Exception as e:
-        st.error(f"세션 로드 실패: {e}")
+    if lease is not None:
+        st.caption(f"현재 락 소유자: {lease.owner} | 남은 시간: {int(lease.remaining())}초 (만료되면 이 창이 이어받음)")
     st.stop()
 
 st.success("✅ 락 획득 성공! 이 Runner가 집계를 수행합니다.")
-
-# ====== 락 연장(heartbeat) ======
-try:
-    refresh_lock(session_id)
-except Exception as e:
-    st.error(f"락 연장 실패: {e}")
+st.caption(f"lease token: {lease.token} | 남은 시간: {int(lease.remaining())}초")
 
 # ====== tick 실행 ======
 remain = int(max(0, TICK_EVERY - (now - st.session_state["last_tick_at"])))
@@ -127,8 +92,40 @@ st.caption(f"다음 tick까지: {remain}초 | TICK_EVERY={TICK_EVERY}s | LOCK_TT
 if now - st.session_state["last_tick_at"] >= TICK_EVERY:
     st.session_state["last_tick_at"] = now
     try:
-        new_count, logs = tick_session_auto(session_id)
+        # tick 시간 예산 = TICK_EVERY, 조회가 진행되는 동안 lease 연장 (예산 초과분은 다음 tick으로)
+        # 집계 쓰기는 lease token으로 fencing → 그 사이 다른 runner가 넘겨받았으면 반영 안 됨
+        new_count, logs = tick_session_auto(
+            session_id,
+            horizon_sec=TICK_EVERY,
+            heartbeat=keeper.heartbeat,
+            fence_token=keeper.token,
+        )
         st.success(f"tick 실행 완료: 신규 {new_count}건")
         st.text_area("tick logs (참가자별 실패 원인 포함)", "\n".join(logs) if logs else "(로그 없음)", height=260)
     except Exception as e:
         st.error(f"tick 자체 실패: {e}")
+
+# ====== 마지막 tick 계측 (app.metrics) ======
+# 어디서 시간이 갔는지: Riot 응답 대기 / 레이트 리밋 대기 / DB 왕복 / DB 재시도 sleep
+last = last_tick(session_id)
+if last is not None:
+    st.subheader("tick 계측")
+    history = recent_ticks(session_id)
+    st.caption(f"마지막 tick: {last.wall_sec * 1000:.0f}ms | 최근 {len(history)}회")
+    st.bar_chart({"ms": last.totals_by_name()}, horizontal=True)
+    st.line_chart({"wall_ms": [round(m.wall_sec * 1000) for m in history]})
+    st.dataframe(last.rows(), use_container_width=True, hide_index=True)
+
+    c1, c2 = st.columns(2)
+    c1.download_button(
+        "JSON 내보내기",
+        json.dumps([m.to_dict() for m in history], ensure_ascii=False),
+        file_name=f"tick-metrics-{session_id}.json",
+        mime="application/json",
+    )
+    c2.download_button(
+        "Prometheus 내보내기",
+        last.to_prometheus(),
+        file_name=f"tick-metrics-{session_id}.prom",
+        mime="text/plain",
+    )
@@ -1,13 +1,11 @@
 import time
-from datetime import datetime, timezone
-from dateutil import parser as dtparser
 
 import streamlit as st
 from streamlit_autorefresh import st_autorefresh
 
-from app.db import supabase_admin
-from app.logic import load_session, load_participants
-from app.ui import render_view_roster, render_view_score, render_popup_result
+from app.logic import event_cursor, load_events_after
+from app.snapshot import get_snapshot
+from app.ui import has_leaders, render_countdown, render_view_leaders, render_view_roster, render_view_score, render_popup_result
 
 st.set_page_config(page_title="Overlay", layout="centered")
 
@@ -20,17 +18,9 @@ if not session_id:
 ROTATE_SECONDS = 8       # 화면 A/B 전환 주기
 POPUP_SECONDS = 4.0      # 팝업 유지 시간
 
-def _fmt_remain(seconds: int) -> str:
-    if seconds < 0:
-        seconds = 0
-    h = seconds // 3600
-    m = (seconds % 3600) // 60
-    s = seconds % 60
-    return f"{h:02d}:{m:02d}:{s:02d}"
-
 # ====== 상태 ======
-if "last_event_at" not in st.session_state:
-    st.session_state["last_event_at"] = datetime.now(timezone.utc)
+if "popup_queue" not in st.session_state:
+    st.session_state["popup_queue"] = []
 
 if "popup_until" not in st.session_state:
     st.session_state["popup_until"] = 0.0
@@ -44,63 +34,56 @@ if "popup_kda" not in st.session_state:
 now = time.time()
 
 # ====== 리프레시 ======
-refresh_ms = 500 if now < st.session_state["popup_until"] else 2000
+# 팝업이 떠 있거나 대기 중일 때만 짧게 (팝업 전환 지연을 줄임). 평소에는 2초.
+# 스냅샷은 realtime 알림으로 invalidate되므로 rerun 간격을 줄여도 새 데이터가 더 빨리 오지 않는다
+busy = now < st.session_state["popup_until"] or bool(st.session_state["popup_queue"])
+refresh_ms = 500 if busy else 2000
 st_autorefresh(interval=refresh_ms, key="overlay_refresh")
 
-sb = supabase_admin()
-
-# ====== 데이터 로드 (읽기 전용) ======
+# ====== 데이터 로드 (읽기 전용, 프로세스 공유 스냅샷) ======
+# 같은 서버의 모든 오버레이 viewer가 DB 조회 1번을 공유 (변경 알림이 오면 즉시 갱신)
 try:
-    session = load_session(session_id)
-    participants = load_participants(session_id)
+    snap = get_snapshot(session_id)
 except Exception:
     st.stop()
+session = snap.session
+participants = snap.participants
 
 # ====== ✅ 제한시간 타이머 표시 (ends_at 기준) ======
-# ui.py로 나중에 옮겨도 되고, 일단 Overlay 상단에 최소 표시만
-try:
-    ends_at = session.get("ends_at")
-    if ends_at:
-        ends_dt = dtparser.isoparse(ends_at).astimezone(timezone.utc)
-        remain_sec = int((ends_dt - datetime.now(timezone.utc)).total_seconds())
-        st.markdown(f"### ⏱️ 남은 시간: **{_fmt_remain(remain_sec)}**")
-        if remain_sec <= 0:
-            st.warning("타임어택 종료! (이후 종료된 경기는 집계되지 않습니다)")
-except Exception:
-    pass
+render_countdown(session.get("ends_at"))
 
-# ====== 최신 이벤트 1개 확인 → 새 이벤트면 팝업 ======
-try:
-    ev = (
-        sb.table("events")
-        .select("*")
-        .eq("session_id", session_id)
-        .order("created_at", desc=True)
-        .limit(1)
-        .execute()
-    )
-    latest = (ev.data or [None])[0]
-except Exception:
-    latest = None
+# ====== 이벤트 피드 → 팝업 큐 ======
+# 처음 열었을 때의 최신 이벤트까지는 지난 결과 → 그 이후 이벤트만 팝업
+if "event_cursor" not in st.session_state:
+    st.session_state["event_cursor"] = event_cursor(snap.latest_event)
 
-if latest:
+# 스냅샷의 최신 이벤트가 커서와 다를 때만 "커서 이후" 피드 조회 (한 tick에 여러 건이어도 전부 받음)
+if event_cursor(snap.latest_event) not in (None, st.session_state["event_cursor"]):
     try:
-        latest_time = dtparser.isoparse(latest["created_at"]).astimezone(timezone.utc)
-        if latest_time > st.session_state["last_event_at"]:
-            st.session_state["last_event_at"] = latest_time
-            st.session_state["popup_is_win"] = (latest["result"] == "WIN")
-            st.session_state["popup_name"] = latest["real_name"]
-            st.session_state["popup_kda"] = latest.get("kda_text")
-            st.session_state["popup_until"] = time.time() + POPUP_SECONDS
+        new_events = load_events_after(session_id, st.session_state["event_cursor"])
     except Exception:
-        pass
-
-# ====== 화면 A/B 번갈아 렌더 ======
-mode = int(time.time() // ROTATE_SECONDS) % 2  # 0: roster, 1: score
+        new_events = []
+    if new_events:
+        st.session_state["popup_queue"].extend(new_events)
+        st.session_state["event_cursor"] = event_cursor(new_events[-1])
+
+# 큐에서 하나씩 POPUP_SECONDS 간격으로 재생
+if st.session_state["popup_queue"] and time.time() >= st.session_state["popup_until"]:
+    ev = st.session_state["popup_queue"].pop(0)
+    st.session_state["popup_is_win"] = (ev["result"] == "WIN")
+    st.session_state["popup_name"] = ev["real_name"]
+    st.session_state["popup_kda"] = ev.get("kda_text")
+    st.session_state["popup_until"] = time.time() + POPUP_SECONDS
+
+# ====== 화면 번갈아 렌더 (집계된 경기가 있으면 개인 스탯 리더보드까지) ======
+views = 3 if has_leaders(session) else 2
+mode = int(time.time() // ROTATE_SECONDS) % views  # 0: roster, 1: score, 2: leaders
 if mode == 0:
     render_view_roster(session, participants)
-else:
+elif mode == 1:
     render_view_score(session)
+else:
+    render_view_leaders(session)
 
 # ====== 팝업 ======
 if time.time() < st.session_state["popup_until"]:
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import streamlit as st
+
+from app.seasons import (
+    LEADERBOARD_ORDERS,
+    LEADERBOARD_PAGE,
+    leaderboard_cursor,
+    load_leaderboard,
+    load_seasons,
+)
+
+st.set_page_config(page_title="Season Leaderboard", layout="centered")
+st.title("시즌 리더보드")
+st.caption("시즌에 묶인 모든 세션의 경기를 PUUID 기준으로 누적 (season_player_stats 롤업만 읽음)")
+
+# ====== 시즌 선택 ======
+try:
+    seasons = load_seasons()
+except Exception as e:
+    st.error(f"시즌 목록을 불러오지 못했습니다: {e}")
+    st.stop()
+
+if not seasons:
+    st.info("아직 시즌이 없습니다. Home에서 시즌을 만들고 세션을 시즌에 묶어 주세요.")
+    st.stop()
+
+names = {x["id"]: x["name"] for x in seasons}
+default_id = st.query_params.get("season", "")
+ids = list(names)
+season_id = st.selectbox(
+    "시즌",
+    ids,
+    index=ids.index(default_id) if default_id in names else 0,
+    format_func=lambda sid: names[sid],
+)
+
+col1, col2 = st.columns(2)
+order = col1.radio("정렬", list(LEADERBOARD_ORDERS), format_func=LEADERBOARD_ORDERS.get, horizontal=True)
+min_games = int(col2.number_input("최소 경기 수", min_value=1, max_value=100, value=3, step=1))
+
+# ====== 페이지 커서 (키셋) ======
+# 보기 조건이 바뀌면 첫 페이지부터. cursors[i] = i번째 페이지를 읽을 커서 (0번은 None)
+view_key = (season_id, order, min_games)
+if st.session_state.get("lb_view") != view_key:
+    st.session_state["lb_view"] = view_key
+    st.session_state["lb_cursors"] = [None]
+cursors = st.session_state["lb_cursors"]
+page = len(cursors) - 1
+
+try:
+    # 1행 더 읽어서 다음 페이지가 있는지 확인
+    rows = load_leaderboard(season_id, order, after=cursors[-1], limit=LEADERBOARD_PAGE + 1, min_games=min_games)
+except Exception as e:
+    st.error(f"리더보드 조회 실패: {e}")
+    st.stop()
+
+has_next = len(rows) > LEADERBOARD_PAGE
+rows = rows[:LEADERBOARD_PAGE]
+
+if not rows:
+    st.info("조건에 맞는 플레이어가 없습니다.")
+else:
+    table = []
+    for i, r in enumerate(rows):
+        games = int(r["games"])
+        minutes = int(r["game_seconds"]) / 60
+        table.append({
+            "순위": page * LEADERBOARD_PAGE + i + 1,
+            "이름": r.get("real_name") or r["puuid"][:8],
+            "경기": games,
+            "승": int(r["wins"]),
+            "패": int(r["losses"]),
+            "승률": f"{float(r['win_rate']) * 100:.1f}%",
+            "KDA": float(r["kda"]),
+            "CS/분": round(int(r["cs"]) / minutes, 1) if minutes else 0.0,
+            "피해량/분": round(int(r["damage"]) / minutes, 1) if minutes else 0.0,
+        })
+    st.dataframe(table, hide_index=True, use_container_width=True)
+
+prev_col, info_col, next_col = st.columns([1, 2, 1])
+if prev_col.button("◀ 이전", disabled=page == 0):
+    cursors.pop()
+    st.rerun()
+info_col.caption(f"{page + 1} 페이지 · 페이지당 {LEADERBOARD_PAGE}명")
+if next_col.button("다음 ▶", disabled=not has_next):
+    cursors.append(leaderboard_cursor(rows[-1], order))
+    st.rerun()
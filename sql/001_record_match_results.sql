@@ -0,0 +1,85 @@
+-- sql/001_record_match_results.sql
+-- tick 1번 분량의 경기 결과를 한 번의 RPC로 원자적으로 반영.
+-- - matches insert (unique 제약으로 중복이면 건너뜀)
+-- - 개인 W/L, 팀 승수는 서버에서 +1 (클라이언트 스냅샷 값 사용 안 함)
+-- - 오버레이 팝업용 events insert
+--
+-- p_results: [{participant_id, participant_puuid, match_id, result, team, game_end_ms, real_name, kda_text}, ...]
+-- 반환: {applied: [{participant_id, match_id, result}], team_a_wins, team_b_wins,
+--        participants: [{id, wins, losses}]}  (이번 호출에서 바뀐 참가자만)
+
+create or replace function public.record_match_results(
+  p_session_id public.sessions.id%type,
+  p_results jsonb
+) returns jsonb
+language plpgsql
+as $$
+declare
+  r jsonb;
+  v_pid public.session_participants.id%type;
+  v_pids public.session_participants.id%type[] := '{}';
+  v_inserted int;
+  v_applied jsonb := '[]'::jsonb;
+  v_win boolean;
+  v_out jsonb;
+begin
+  for r in select value from jsonb_array_elements(coalesce(p_results, '[]'::jsonb)) loop
+    insert into public.matches (session_id, match_id, participant_puuid, result, team, game_end_ms)
+    values (
+      p_session_id,
+      r->>'match_id',
+      r->>'participant_puuid',
+      r->>'result',
+      r->>'team',
+      (r->>'game_end_ms')::bigint
+    )
+    on conflict do nothing;
+
+    get diagnostics v_inserted = row_count;
+    if v_inserted = 0 then
+      continue;
+    end if;
+
+    v_pid := r->>'participant_id';
+    v_win := (r->>'result') = 'WIN';
+
+    update public.session_participants
+       set wins = wins + (case when v_win then 1 else 0 end),
+           losses = losses + (case when v_win then 0 else 1 end)
+     where id = v_pid and session_id = p_session_id;
+
+    if v_win then
+      update public.sessions
+         set team_a_wins = team_a_wins + (case when r->>'team' = 'A' then 1 else 0 end),
+             team_b_wins = team_b_wins + (case when r->>'team' = 'A' then 0 else 1 end)
+       where id = p_session_id;
+    end if;
+
+    insert into public.events (session_id, real_name, result, match_id, kda_text)
+    values (p_session_id, r->>'real_name', r->>'result', r->>'match_id', r->>'kda_text');
+
+    v_pids := array_append(v_pids, v_pid);
+    v_applied := v_applied || jsonb_build_object(
+      'participant_id', r->'participant_id',
+      'match_id', r->>'match_id',
+      'result', r->>'result'
+    );
+  end loop;
+
+  select jsonb_build_object(
+           'applied', v_applied,
+           'team_a_wins', s.team_a_wins,
+           'team_b_wins', s.team_b_wins,
+           'participants', coalesce((
+             select jsonb_agg(jsonb_build_object('id', p.id, 'wins', p.wins, 'losses', p.losses))
+               from public.session_participants p
+              where p.id = any(v_pids)
+           ), '[]'::jsonb)
+         )
+    into v_out
+    from public.sessions s
+   where s.id = p_session_id;
+
+  return v_out;
+end;
+$$;
@@ -0,0 +1,4 @@
+-- sql/002_tick_rr_cursor.sql
+-- 자동 집계 라운드로빈 위치를 세션에 저장 (브라우저 탭/daemon 재시작과 무관하게 이어서 진행)
+alter table public.sessions
+  add column if not exists tick_rr_cursor integer not null default 0;
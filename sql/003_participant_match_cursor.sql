@@ -0,0 +1,7 @@
+-- sql/003_participant_match_cursor.sql
+-- 참가자별 증분 조회 커서
+-- - match_cursor_ms: 마지막으로 확인한 경기의 종료 시각(ms). 다음 조회는 이 시각 이후 시작한 경기만 요청
+-- - seen_match_ids: 최근 확인한 match id (경계에 걸친 id를 다시 받지 않도록)
+alter table public.session_participants
+  add column if not exists match_cursor_ms bigint,
+  add column if not exists seen_match_ids text[] not null default '{}';
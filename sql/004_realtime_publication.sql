@@ -0,0 +1,4 @@
+-- sql/004_realtime_publication.sql
+-- 오버레이 push 갱신용: Supabase Realtime(postgres_changes)으로 변경을 내보낼 테이블 (app/realtime.py WATCHED)
+alter publication supabase_realtime add table public.events;
+alter publication supabase_realtime add table public.sessions;
@@ -0,0 +1,4 @@
+-- sql/005_events_feed_index.sql
+-- 오버레이 이벤트 피드 ("세션의 (created_at, id) 이후 이벤트, 오름차순") 용 인덱스
+create index if not exists events_session_created_id_idx
+  on public.events (session_id, created_at, id);
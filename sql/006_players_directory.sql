@@ -0,0 +1,12 @@
+-- sql/006_players_directory.sql
+-- 세션을 넘어 재사용하는 Riot ID -> PUUID 디렉터리
+-- riot_key: "게임닉#태그"를 trim + 소문자로 정규화한 값 (app.players.riot_key)
+create table if not exists public.players (
+  riot_key   text primary key,
+  game_name  text not null,
+  tag_line   text not null,
+  puuid      text not null,
+  updated_at timestamptz not null default now()
+);
+
+create index if not exists players_puuid_idx on public.players (puuid);
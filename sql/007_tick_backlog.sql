@@ -0,0 +1,6 @@
+-- sql/007_tick_backlog.sql
+-- tick 시간 예산 안에 못 끝낸 작업 (다음 tick이 먼저 처리)
+-- - {"participants": {"<participant_id>": ["KR_...", ...]}}
+--   목록 = 이미 받은 match id (다음 tick은 id 조회 없이 상세만), 빈 목록 = id 조회부터 다시
+alter table public.sessions
+  add column if not exists tick_backlog jsonb not null default '{}'::jsonb;
@@ -0,0 +1,137 @@
+-- sql/008_player_game_stats.sql
+-- 경기별 개인 스탯 + 참가자별 누적 (record_match_results가 같은 트랜잭션에서 갱신)
+-- - matches: 경기 1건의 K/D/A, CS, 챔피언 피해량, 시야 점수, 게임 시간(초)
+-- - session_participants: 위 값의 세션 누적 + 최고 KDA 경기
+--   평균(KDA, CS/분, 분당 피해량)은 누적 / (wins + losses) 또는 / game_seconds 로 바로 계산
+--   팀 합계는 참가자 누적의 합 (app.stats가 프로세스 메모리에 유지)
+alter table public.matches
+  add column if not exists kills integer,
+  add column if not exists deaths integer,
+  add column if not exists assists integer,
+  add column if not exists cs integer,
+  add column if not exists damage integer,
+  add column if not exists vision_score integer,
+  add column if not exists game_seconds integer;
+
+alter table public.session_participants
+  add column if not exists kills integer not null default 0,
+  add column if not exists deaths integer not null default 0,
+  add column if not exists assists integer not null default 0,
+  add column if not exists cs integer not null default 0,
+  add column if not exists damage bigint not null default 0,
+  add column if not exists vision_score integer not null default 0,
+  add column if not exists game_seconds integer not null default 0,
+  add column if not exists best_kda numeric(6, 2),
+  add column if not exists best_match_id text;
+
+-- sql/001_record_match_results.sql 갱신
+-- p_results 항목에 kills, deaths, assists, cs, damage, vision_score, game_seconds 추가 (없으면 0)
+-- 반환 participants에 누적 스탯 열 포함
+create or replace function public.record_match_results(
+  p_session_id public.sessions.id%type,
+  p_results jsonb
+) returns jsonb
+language plpgsql
+as $$
+declare
+  r jsonb;
+  v_pid public.session_participants.id%type;
+  v_pids public.session_participants.id%type[] := '{}';
+  v_inserted int;
+  v_applied jsonb := '[]'::jsonb;
+  v_win boolean;
+  v_k int;
+  v_d int;
+  v_a int;
+  v_kda numeric(6, 2);
+  v_out jsonb;
+begin
+  for r in select value from jsonb_array_elements(coalesce(p_results, '[]'::jsonb)) loop
+    v_k := coalesce((r->>'kills')::int, 0);
+    v_d := coalesce((r->>'deaths')::int, 0);
+    v_a := coalesce((r->>'assists')::int, 0);
+
+    insert into public.matches (
+      session_id, match_id, participant_puuid, result, team, game_end_ms,
+      kills, deaths, assists, cs, damage, vision_score, game_seconds
+    )
+    values (
+      p_session_id,
+      r->>'match_id',
+      r->>'participant_puuid',
+      r->>'result',
+      r->>'team',
+      (r->>'game_end_ms')::bigint,
+      v_k,
+      v_d,
+      v_a,
+      coalesce((r->>'cs')::int, 0),
+      coalesce((r->>'damage')::int, 0),
+      coalesce((r->>'vision_score')::int, 0),
+      coalesce((r->>'game_seconds')::int, 0)
+    )
+    on conflict do nothing;
+
+    get diagnostics v_inserted = row_count;
+    if v_inserted = 0 then
+      continue;
+    end if;
+
+    v_pid := r->>'participant_id';
+    v_win := (r->>'result') = 'WIN';
+    v_kda := round((v_k + v_a)::numeric / greatest(v_d, 1), 2);
+
+    update public.session_participants
+       set wins = wins + (case when v_win then 1 else 0 end),
+           losses = losses + (case when v_win then 0 else 1 end),
+           kills = kills + v_k,
+           deaths = deaths + v_d,
+           assists = assists + v_a,
+           cs = cs + coalesce((r->>'cs')::int, 0),
+           damage = damage + coalesce((r->>'damage')::int, 0),
+           vision_score = vision_score + coalesce((r->>'vision_score')::int, 0),
+           game_seconds = game_seconds + coalesce((r->>'game_seconds')::int, 0),
+           best_match_id = case when best_kda is null or v_kda > best_kda then r->>'match_id' else best_match_id end,
+           best_kda = greatest(coalesce(best_kda, v_kda), v_kda)
+     where id = v_pid and session_id = p_session_id;
+
+    if v_win then
+      update public.sessions
+         set team_a_wins = team_a_wins + (case when r->>'team' = 'A' then 1 else 0 end),
+             team_b_wins = team_b_wins + (case when r->>'team' = 'A' then 0 else 1 end)
+       where id = p_session_id;
+    end if;
+
+    insert into public.events (session_id, real_name, result, match_id, kda_text)
+    values (p_session_id, r->>'real_name', r->>'result', r->>'match_id', r->>'kda_text');
+
+    v_pids := array_append(v_pids, v_pid);
+    v_applied := v_applied || jsonb_build_object(
+      'participant_id', r->'participant_id',
+      'match_id', r->>'match_id',
+      'result', r->>'result'
+    );
+  end loop;
+
+  select jsonb_build_object(
+           'applied', v_applied,
+           'team_a_wins', s.team_a_wins,
+           'team_b_wins', s.team_b_wins,
+           'participants', coalesce((
+             select jsonb_agg(jsonb_build_object(
+                      'id', p.id, 'wins', p.wins, 'losses', p.losses,
+                      'kills', p.kills, 'deaths', p.deaths, 'assists', p.assists,
+                      'cs', p.cs, 'damage', p.damage, 'vision_score', p.vision_score,
+                      'game_seconds', p.game_seconds, 'best_kda', p.best_kda, 'best_match_id', p.best_match_id
+                    ))
+               from public.session_participants p
+              where p.id = any(v_pids)
+           ), '[]'::jsonb)
+         )
+    into v_out
+    from public.sessions s
+   where s.id = p_session_id;
+
+  return v_out;
+end;
+$$;
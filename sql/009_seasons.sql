@@ -0,0 +1,132 @@
+-- sql/009_seasons.sql
+-- 시즌: 여러 세션(내전)을 묶어서 PUUID 기준 누적 전적을 유지
+-- - sessions.season_id: 세션이 속한 시즌 (없으면 시즌 집계 안 함)
+-- - season_player_stats: (season_id, puuid)별 누적. matches insert 트리거가 1행씩 증분 갱신
+--   → 리더보드는 세션/경기 수와 무관하게 인덱스 범위 스캔 1번 (app.seasons)
+create table if not exists public.seasons (
+  id         uuid primary key default gen_random_uuid(),
+  name       text not null,
+  starts_at  timestamptz,
+  ends_at    timestamptz,
+  created_at timestamptz not null default now()
+);
+
+alter table public.sessions
+  add column if not exists season_id uuid references public.seasons (id) on delete set null;
+
+create index if not exists sessions_season_idx on public.sessions (season_id);
+
+create table if not exists public.season_player_stats (
+  season_id        uuid not null references public.seasons (id) on delete cascade,
+  puuid            text not null,
+  real_name        text,
+  games            integer not null default 0,
+  wins             integer not null default 0,
+  losses           integer not null default 0,
+  kills            integer not null default 0,
+  deaths           integer not null default 0,
+  assists          integer not null default 0,
+  cs               integer not null default 0,
+  damage           bigint  not null default 0,
+  vision_score     integer not null default 0,
+  game_seconds     integer not null default 0,
+  last_game_end_ms bigint,
+  win_rate         numeric(5, 4) generated always as (round(wins::numeric / greatest(games, 1), 4)) stored,
+  kda              numeric(6, 2) generated always as (round((kills + assists)::numeric / greatest(deaths, 1), 2)) stored,
+  updated_at       timestamptz not null default now(),
+  primary key (season_id, puuid)
+);
+
+-- 리더보드 정렬별 키셋 페이지네이션 (metric desc, puuid) — app.seasons.LEADERBOARD_ORDERS
+create index if not exists season_player_stats_win_rate_idx on public.season_player_stats (season_id, win_rate desc, puuid);
+create index if not exists season_player_stats_kda_idx on public.season_player_stats (season_id, kda desc, puuid);
+create index if not exists season_player_stats_wins_idx on public.season_player_stats (season_id, wins desc, puuid);
+create index if not exists season_player_stats_games_idx on public.season_player_stats (season_id, games desc, puuid);
+
+-- 새로 집계된 경기 1건(matches 1행) → 시즌 누적 +1
+-- record_match_results는 on conflict do nothing으로 insert하므로 중복 경기는 트리거가 안 돈다
+create or replace function public.season_player_stats_on_match()
+returns trigger
+language plpgsql
+as $$
+declare
+  v_season uuid;
+  v_name text;
+  v_win int := case when new.result = 'WIN' then 1 else 0 end;
+begin
+  select season_id into v_season from public.sessions where id = new.session_id;
+  if v_season is null then
+    return null;
+  end if;
+
+  select real_name into v_name
+    from public.session_participants
+   where session_id = new.session_id and puuid = new.participant_puuid
+   limit 1;
+
+  insert into public.season_player_stats as s (
+    season_id, puuid, real_name, games, wins, losses,
+    kills, deaths, assists, cs, damage, vision_score, game_seconds, last_game_end_ms
+  )
+  values (
+    v_season, new.participant_puuid, v_name, 1, v_win, 1 - v_win,
+    coalesce(new.kills, 0), coalesce(new.deaths, 0), coalesce(new.assists, 0),
+    coalesce(new.cs, 0), coalesce(new.damage, 0), coalesce(new.vision_score, 0), coalesce(new.game_seconds, 0),
+    new.game_end_ms
+  )
+  on conflict (season_id, puuid) do update
+    set real_name = coalesce(excluded.real_name, s.real_name),
+        games = s.games + 1,
+        wins = s.wins + excluded.wins,
+        losses = s.losses + excluded.losses,
+        kills = s.kills + excluded.kills,
+        deaths = s.deaths + excluded.deaths,
+        assists = s.assists + excluded.assists,
+        cs = s.cs + excluded.cs,
+        damage = s.damage + excluded.damage,
+        vision_score = s.vision_score + excluded.vision_score,
+        game_seconds = s.game_seconds + excluded.game_seconds,
+        last_game_end_ms = greatest(s.last_game_end_ms, excluded.last_game_end_ms),
+        updated_at = now();
+
+  return null;
+end;
+$$;
+
+drop trigger if exists matches_season_rollup on public.matches;
+create trigger matches_season_rollup
+  after insert on public.matches
+  for each row execute function public.season_player_stats_on_match();
+
+-- 이미 경기가 있는 세션을 시즌에 넣거나 뺐을 때 시즌 누적을 matches에서 다시 계산 (관리용)
+--   select public.rebuild_season_player_stats('<season_id>');
+create or replace function public.rebuild_season_player_stats(p_season_id uuid)
+returns void
+language sql
+as $$
+  delete from public.season_player_stats where season_id = p_season_id;
+
+  insert into public.season_player_stats (
+    season_id, puuid, real_name, games, wins, losses,
+    kills, deaths, assists, cs, damage, vision_score, game_seconds, last_game_end_ms
+  )
+  select p_season_id,
+         m.participant_puuid,
+         (array_agg(sp.real_name order by m.game_end_ms desc) filter (where sp.real_name is not null))[1],
+         count(*),
+         count(*) filter (where m.result = 'WIN'),
+         count(*) filter (where m.result <> 'WIN'),
+         coalesce(sum(m.kills), 0),
+         coalesce(sum(m.deaths), 0),
+         coalesce(sum(m.assists), 0),
+         coalesce(sum(m.cs), 0),
+         coalesce(sum(m.damage), 0),
+         coalesce(sum(m.vision_score), 0),
+         coalesce(sum(m.game_seconds), 0),
+         max(m.game_end_ms)
+    from public.matches m
+    join public.sessions s on s.id = m.session_id
+    left join public.session_participants sp on sp.session_id = m.session_id and sp.puuid = m.participant_puuid
+   where s.season_id = p_season_id
+   group by m.participant_puuid;
+$$;
@@ -0,0 +1,190 @@
+-- sql/010_tick_leases.sql
+-- 집계 runner 리더 lease (sessions.tick_lock_* 대체)
+-- - 세션당 1행. sessions(점수가 갱신되는 행)과 분리해서 lease 쓰기가 점수 갱신과 경합하지 않게
+-- - token: 다른 runner가(또는 만료 후 다시) 인수할 때마다 +1 되는 fencing token
+--   record_match_results(p_fence_token)는 token이 현재 값과 다르면 거부 (SQLSTATE P0F01)
+--   → 락을 잃은 runner의 늦은 tick이 같은 경기를 두 번 반영하지 못함
+-- - ttl_left_sec: 서버 시각 기준 남은 시간 (runner 시계와 무관하게 만료 시점 계산)
+-- (sessions.id가 uuid인 기본 스키마 기준)
+create table if not exists public.tick_leases (
+  session_id uuid primary key references public.sessions (id) on delete cascade,
+  owner      text,
+  token      bigint not null default 0,
+  expires_at timestamptz not null default now()
+);
+
+-- 획득 / 연장. 내 lease면 연장(token 유지), 비었거나 만료면 인수(token + 1), 남의 유효한 lease면 그대로.
+-- 반환: {acquired, owner, token, ttl_left_sec}
+create or replace function public.acquire_tick_lease(
+  p_session_id uuid,
+  p_owner text,
+  p_ttl_sec integer
+) returns jsonb
+language plpgsql
+as $$
+declare
+  l public.tick_leases;
+begin
+  insert into public.tick_leases as t (session_id, owner, token, expires_at)
+  values (p_session_id, p_owner, 1, now() + make_interval(secs => p_ttl_sec))
+  on conflict (session_id) do update
+    set owner = excluded.owner,
+        token = case when t.owner = excluded.owner and t.expires_at > now() then t.token else t.token + 1 end,
+        expires_at = excluded.expires_at
+    where (t.owner = excluded.owner and t.expires_at > now())
+       or t.owner is null
+       or t.expires_at <= now()
+  returning * into l;
+
+  if found then
+    return jsonb_build_object(
+      'acquired', true, 'owner', l.owner, 'token', l.token,
+      'ttl_left_sec', extract(epoch from l.expires_at - now())
+    );
+  end if;
+
+  select * into l from public.tick_leases where session_id = p_session_id;
+  return jsonb_build_object(
+    'acquired', false, 'owner', l.owner, 'token', l.token,
+    'ttl_left_sec', greatest(0, extract(epoch from l.expires_at - now()))
+  );
+end;
+$$;
+
+-- 종료 시 바로 놓아줌 (token은 유지 → 다음 인수자가 +1)
+create or replace function public.release_tick_lease(
+  p_session_id uuid,
+  p_owner text,
+  p_token bigint
+) returns void
+language sql
+as $$
+  update public.tick_leases
+     set owner = null, expires_at = now()
+   where session_id = p_session_id and owner = p_owner and token = p_token;
+$$;
+
+-- sql/008_player_game_stats.sql의 record_match_results + fencing token 확인
+-- p_fence_token이 null이면 확인 안 함 (수동 tick 등 lease 없이 부르는 경우)
+drop function if exists public.record_match_results(public.sessions.id%type, jsonb);
+
+create or replace function public.record_match_results(
+  p_session_id public.sessions.id%type,
+  p_results jsonb,
+  p_fence_token bigint default null
+) returns jsonb
+language plpgsql
+as $$
+declare
+  r jsonb;
+  v_pid public.session_participants.id%type;
+  v_pids public.session_participants.id%type[] := '{}';
+  v_inserted int;
+  v_applied jsonb := '[]'::jsonb;
+  v_win boolean;
+  v_k int;
+  v_d int;
+  v_a int;
+  v_kda numeric(6, 2);
+  v_out jsonb;
+begin
+  if p_fence_token is not null then
+    -- for share: 이 트랜잭션이 끝날 때까지 다른 runner가 lease를 인수(token + 1)하지 못함
+    perform 1
+       from public.tick_leases
+      where session_id = p_session_id and owner is not null and token = p_fence_token
+      for share;
+    if not found then
+      raise exception 'tick lease token % is stale', p_fence_token using errcode = 'P0F01';
+    end if;
+  end if;
+
+  for r in select value from jsonb_array_elements(coalesce(p_results, '[]'::jsonb)) loop
+    v_k := coalesce((r->>'kills')::int, 0);
+    v_d := coalesce((r->>'deaths')::int, 0);
+    v_a := coalesce((r->>'assists')::int, 0);
+
+    insert into public.matches (
+      session_id, match_id, participant_puuid, result, team, game_end_ms,
+      kills, deaths, assists, cs, damage, vision_score, game_seconds
+    )
+    values (
+      p_session_id,
+      r->>'match_id',
+      r->>'participant_puuid',
+      r->>'result',
+      r->>'team',
+      (r->>'game_end_ms')::bigint,
+      v_k,
+      v_d,
+      v_a,
+      coalesce((r->>'cs')::int, 0),
+      coalesce((r->>'damage')::int, 0),
+      coalesce((r->>'vision_score')::int, 0),
+      coalesce((r->>'game_seconds')::int, 0)
+    )
+    on conflict do nothing;
+
+    get diagnostics v_inserted = row_count;
+    if v_inserted = 0 then
+      continue;
+    end if;
+
+    v_pid := r->>'participant_id';
+    v_win := (r->>'result') = 'WIN';
+    v_kda := round((v_k + v_a)::numeric / greatest(v_d, 1), 2);
+
+    update public.session_participants
+       set wins = wins + (case when v_win then 1 else 0 end),
+           losses = losses + (case when v_win then 0 else 1 end),
+           kills = kills + v_k,
+           deaths = deaths + v_d,
+           assists = assists + v_a,
+           cs = cs + coalesce((r->>'cs')::int, 0),
+           damage = damage + coalesce((r->>'damage')::int, 0),
+           vision_score = vision_score + coalesce((r->>'vision_score')::int, 0),
+           game_seconds = game_seconds + coalesce((r->>'game_seconds')::int, 0),
+           best_match_id = case when best_kda is null or v_kda > best_kda then r->>'match_id' else best_match_id end,
+           best_kda = greatest(coalesce(best_kda, v_kda), v_kda)
+     where id = v_pid and session_id = p_session_id;
+
+    if v_win then
+      update public.sessions
+         set team_a_wins = team_a_wins + (case when r->>'team' = 'A' then 1 else 0 end),
+             team_b_wins = team_b_wins + (case when r->>'team' = 'A' then 0 else 1 end)
+       where id = p_session_id;
+    end if;
+
+    insert into public.events (session_id, real_name, result, match_id, kda_text)
+    values (p_session_id, r->>'real_name', r->>'result', r->>'match_id', r->>'kda_text');
+
+    v_pids := array_append(v_pids, v_pid);
+    v_applied := v_applied || jsonb_build_object(
+      'participant_id', r->'participant_id',
+      'match_id', r->>'match_id',
+      'result', r->>'result'
+    );
+  end loop;
+
+  select jsonb_build_object(
+           'applied', v_applied,
+           'team_a_wins', s.team_a_wins,
+           'team_b_wins', s.team_b_wins,
+           'participants', coalesce((
+             select jsonb_agg(jsonb_build_object(
+                      'id', p.id, 'wins', p.wins, 'losses', p.losses,
+                      'kills', p.kills, 'deaths', p.deaths, 'assists', p.assists,
+                      'cs', p.cs, 'damage', p.damage, 'vision_score', p.vision_score,
+                      'game_seconds', p.game_seconds, 'best_kda', p.best_kda, 'best_match_id', p.best_match_id
+                    ))
+               from public.session_participants p
+              where p.id = any(v_pids)
+           ), '[]'::jsonb)
+         )
+    into v_out
+    from public.sessions s
+   where s.id = p_session_id;
+
+  return v_out;
+end;
+$$;
@@ -0,0 +1,149 @@
+-- sql/011_fenced_tick_state.sql
+-- tick 진행 상태(참가자 커서 / 미룬 작업 / 라운드로빈 위치)도 fencing token 확인과 같은 트랜잭션에서 저장
+-- - 010까지는 결과만 fenced였고 커서/backlog/rr는 따로 update → 락을 잃은 runner가
+--   새 리더의 커서를 되돌리거나 새 리더가 미룬 참가자를 지울 수 있었음
+-- - p_cursors: [{"id", "match_cursor_ms", "seen_match_ids"}] (새 경기가 있던 참가자만)
+-- - p_backlog: sessions.tick_backlog 새 값 (null이면 그대로, sql/007_tick_backlog.sql)
+-- - p_rr_cursor: sessions.tick_rr_cursor 새 값 (null이면 그대로, sql/002_tick_rr_cursor.sql)
+-- p_results가 비어 있어도 위 값을 저장하려면 이 함수 1번으로 부른다
+drop function if exists public.record_match_results(public.sessions.id%type, jsonb, bigint);
+
+create or replace function public.record_match_results(
+  p_session_id public.sessions.id%type,
+  p_results jsonb,
+  p_fence_token bigint default null,
+  p_cursors jsonb default null,
+  p_backlog jsonb default null,
+  p_rr_cursor integer default null
+) returns jsonb
+language plpgsql
+as $$
+declare
+  r jsonb;
+  c jsonb;
+  v_pid public.session_participants.id%type;
+  v_pids public.session_participants.id%type[] := '{}';
+  v_inserted int;
+  v_applied jsonb := '[]'::jsonb;
+  v_win boolean;
+  v_k int;
+  v_d int;
+  v_a int;
+  v_kda numeric(6, 2);
+  v_out jsonb;
+begin
+  if p_fence_token is not null then
+    -- for share: 이 트랜잭션이 끝날 때까지 다른 runner가 lease를 인수(token + 1)하지 못함
+    perform 1
+       from public.tick_leases
+      where session_id = p_session_id and owner is not null and token = p_fence_token
+      for share;
+    if not found then
+      raise exception 'tick lease token % is stale', p_fence_token using errcode = 'P0F01';
+    end if;
+  end if;
+
+  for c in select value from jsonb_array_elements(coalesce(p_cursors, '[]'::jsonb)) loop
+    v_pid := c->>'id';
+    update public.session_participants
+       set match_cursor_ms = (c->>'match_cursor_ms')::bigint,
+           seen_match_ids = array(select jsonb_array_elements_text(coalesce(c->'seen_match_ids', '[]'::jsonb)))
+     where id = v_pid and session_id = p_session_id;
+  end loop;
+
+  if p_backlog is not null or p_rr_cursor is not null then
+    update public.sessions
+       set tick_backlog = coalesce(p_backlog, tick_backlog),
+           tick_rr_cursor = coalesce(p_rr_cursor, tick_rr_cursor)
+     where id = p_session_id;
+  end if;
+
+  for r in select value from jsonb_array_elements(coalesce(p_results, '[]'::jsonb)) loop
+    v_k := coalesce((r->>'kills')::int, 0);
+    v_d := coalesce((r->>'deaths')::int, 0);
+    v_a := coalesce((r->>'assists')::int, 0);
+
+    insert into public.matches (
+      session_id, match_id, participant_puuid, result, team, game_end_ms,
+      kills, deaths, assists, cs, damage, vision_score, game_seconds
+    )
+    values (
+      p_session_id,
+      r->>'match_id',
+      r->>'participant_puuid',
+      r->>'result',
+      r->>'team',
+      (r->>'game_end_ms')::bigint,
+      v_k,
+      v_d,
+      v_a,
+      coalesce((r->>'cs')::int, 0),
+      coalesce((r->>'damage')::int, 0),
+      coalesce((r->>'vision_score')::int, 0),
+      coalesce((r->>'game_seconds')::int, 0)
+    )
+    on conflict do nothing;
+
+    get diagnostics v_inserted = row_count;
+    if v_inserted = 0 then
+      continue;
+    end if;
+
+    v_pid := r->>'participant_id';
+    v_win := (r->>'result') = 'WIN';
+    v_kda := round((v_k + v_a)::numeric / greatest(v_d, 1), 2);
+
+    update public.session_participants
+       set wins = wins + (case when v_win then 1 else 0 end),
+           losses = losses + (case when v_win then 0 else 1 end),
+           kills = kills + v_k,
+           deaths = deaths + v_d,
+           assists = assists + v_a,
+           cs = cs + coalesce((r->>'cs')::int, 0),
+           damage = damage + coalesce((r->>'damage')::int, 0),
+           vision_score = vision_score + coalesce((r->>'vision_score')::int, 0),
+           game_seconds = game_seconds + coalesce((r->>'game_seconds')::int, 0),
+           best_match_id = case when best_kda is null or v_kda > best_kda then r->>'match_id' else best_match_id end,
+           best_kda = greatest(coalesce(best_kda, v_kda), v_kda)
+     where id = v_pid and session_id = p_session_id;
+
+    if v_win then
+      update public.sessions
+         set team_a_wins = team_a_wins + (case when r->>'team' = 'A' then 1 else 0 end),
+             team_b_wins = team_b_wins + (case when r->>'team' = 'A' then 0 else 1 end)
+       where id = p_session_id;
+    end if;
+
+    insert into public.events (session_id, real_name, result, match_id, kda_text)
+    values (p_session_id, r->>'real_name', r->>'result', r->>'match_id', r->>'kda_text');
+
+    v_pids := array_append(v_pids, v_pid);
+    v_applied := v_applied || jsonb_build_object(
+      'participant_id', r->'participant_id',
+      'match_id', r->>'match_id',
+      'result', r->>'result'
+    );
+  end loop;
+
+  select jsonb_build_object(
+           'applied', v_applied,
+           'team_a_wins', s.team_a_wins,
+           'team_b_wins', s.team_b_wins,
+           'participants', coalesce((
+             select jsonb_agg(jsonb_build_object(
+                      'id', p.id, 'wins', p.wins, 'losses', p.losses,
+                      'kills', p.kills, 'deaths', p.deaths, 'assists', p.assists,
+                      'cs', p.cs, 'damage', p.damage, 'vision_score', p.vision_score,
+                      'game_seconds', p.game_seconds, 'best_kda', p.best_kda, 'best_match_id', p.best_match_id
+                    ))
+               from public.session_participants p
+              where p.id = any(v_pids)
+           ), '[]'::jsonb)
+         )
+    into v_out
+    from public.sessions s
+   where s.id = p_session_id;
+
+  return v_out;
+end;
+$$;